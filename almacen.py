@@ -0,0 +1,844 @@
+import os
+import json
+import bisect
+import threading
+import unicodedata
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from datetime import datetime, timedelta
+from precios import materializar, materializar_lote
+from clientes import DirectorioClientes
+from archivo import ArchivoCotizaciones
+from metricas import cronometrado
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se bloquea dentro del proceso
+    fcntl = None
+
+# Archivos del almacén de cotizaciones
+COTIZACIONES_LOG = "cotizaciones.jsonl"
+COTIZACIONES_JSON_ANTIGUO = "cotizaciones.json"
+ID_INICIAL = 1500
+# Cotizaciones por bloque al materializar montos en una reescritura del log
+TAMANO_BLOQUE_MONTOS = 1000
+
+
+def _fsync_directorio(ruta):
+    """Sincroniza el directorio para que los renombres y archivos nuevos sobrevivan a un corte."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(ruta)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def normalizar_texto(texto):
+    """Texto en minúsculas y sin tildes, para búsquedas por prefijo."""
+    descompuesto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold().strip()
+
+
+def _parsear_fecha(fecha):
+    """Convierte 'dd/mm/aaaa' en date, o None si no hay fecha válida."""
+    try:
+        return datetime.strptime(fecha, "%d/%m/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _resumen(registro):
+    """Datos de una cotización (ya hidratada) que se usan en los listados."""
+    cliente = registro.get("datos del cliente") or {}
+    return {
+        "id": registro["id"],
+        "fecha": registro.get("fecha", ""),
+        "nombre": cliente.get("Nombre del cliente", ""),
+        "ruc": str(cliente.get("RUC", "")).strip(),
+    }
+
+
+def _serializar(registro):
+    """Convierte una cotización en una línea del log (JSON compacto terminado en salto de línea)."""
+    return (json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _materializadas(cotizaciones):
+    """Genera las cotizaciones con sus montos guardados, calculados por bloques (ver ``materializar_lote``)."""
+    iterador = iter(cotizaciones)
+    while True:
+        bloque = list(islice(iterador, TAMANO_BLOQUE_MONTOS))
+        if not bloque:
+            return
+        yield from materializar_lote(bloque)
+
+
+def _renumerar_repetidos(registros, siguiente):
+    """Da un id nuevo a los registros cuyo id ya apareció antes en la lista (o que no tienen id).
+
+    La primera aparición conserva su id; las siguientes reciben ids a partir
+    de ``siguiente`` (y de uno más que el mayor id de la lista) y guardan el
+    id que tenían en ``"id_anterior"``. Modifica los registros y devuelve
+    ``(reasignaciones, siguiente id libre)``, donde cada reasignación es
+    ``{"posicion", "id_anterior", "id_nuevo"}`` (posición en la lista, desde 0).
+    """
+    ids = [r.get("id") for r in registros if isinstance(r.get("id"), int)]
+    siguiente = max([siguiente] + [i + 1 for i in ids])
+    vistos = set()
+    reasignaciones = []
+    for posicion, registro in enumerate(registros):
+        id_cotizacion = registro.get("id")
+        if isinstance(id_cotizacion, int) and id_cotizacion not in vistos:
+            vistos.add(id_cotizacion)
+            continue
+        registro["id"] = siguiente
+        registro["id_anterior"] = id_cotizacion
+        reasignaciones.append({"posicion": posicion, "id_anterior": id_cotizacion, "id_nuevo": siguiente})
+        vistos.add(siguiente)
+        siguiente += 1
+    return reasignaciones, siguiente
+
+
+class AlmacenCotizaciones:
+    """Almacén de cotizaciones sobre un log de solo-anexado (JSONL).
+
+    Cada cotización es una línea del archivo. Las escrituras se anexan al final
+    con fsync bajo un bloqueo de archivo, de modo que nunca se reescribe el
+    archivo completo para guardar una cotización. En memoria se mantiene un
+    índice id -> posición en bytes que se actualiza leyendo solo la cola nueva
+    del log. El siguiente id se guarda en un archivo de secuencia aparte.
+
+    Los datos del cliente no se copian en cada cotización: se registran en el
+    directorio de clientes (``<log>.clientes.jsonl``) y la línea guarda solo
+    la referencia ``"cliente": {"RUC", "version"}``. Al leer, las cotizaciones
+    se devuelven con ``"datos del cliente"`` completo, como siempre.
+
+    Las cotizaciones de años anteriores se pueden pasar con ``archivar()`` a
+    segmentos comprimidos de solo-lectura (``<log>.archivo/``, ver
+    ``archivo.py``). Al abrir el almacén solo se indexa el log del año en
+    curso; las archivadas se leen de a una por su id cuando se piden.
+    """
+
+    def __init__(self, ruta=COTIZACIONES_LOG, id_inicial=ID_INICIAL):
+        self.ruta = ruta
+        self.ruta_secuencia = ruta + ".seq"
+        self.ruta_bloqueo = ruta + ".lock"
+        self.id_inicial = id_inicial
+        self.clientes = DirectorioClientes(ruta + ".clientes.jsonl")
+        self.archivo = ArchivoCotizaciones(ruta + ".archivo")
+
+        self._mutex = threading.RLock()
+        self._profundidad_bloqueo = 0
+
+        self._inodo = None
+        self._reiniciar_indice()
+        self._suscriptores = []
+
+        # Caché de todas() compartida por las sesiones del proceso
+        self._generacion = 0        # sube con cada escritura hecha desde este proceso
+        self._cache_todas = None    # lista de cotizaciones ya parseadas
+        self._cache_estado = None   # (inodo, tamaño, mtime, generación) del log al llenarla
+        self._cache_fin = 0         # bytes del log cubiertos por la caché
+        self.estadisticas_todas = {"aciertos": 0, "incrementales": 0, "completas": 0, "parseos_evitados": 0}
+
+    # ------------------------------------------------------------------
+    # Bloqueo
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _bloqueo(self):
+        """Bloqueo exclusivo entre hilos y entre procesos (reentrante dentro del hilo)."""
+        with self._mutex:
+            if self._profundidad_bloqueo:
+                self._profundidad_bloqueo += 1
+                try:
+                    yield
+                finally:
+                    self._profundidad_bloqueo -= 1
+                return
+
+            with open(self.ruta_bloqueo, "a+b") as archivo_bloqueo:
+                if fcntl:
+                    fcntl.flock(archivo_bloqueo.fileno(), fcntl.LOCK_EX)
+                self._profundidad_bloqueo = 1
+                try:
+                    yield
+                finally:
+                    self._profundidad_bloqueo = 0
+                    if fcntl:
+                        fcntl.flock(archivo_bloqueo.fileno(), fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+    def _reiniciar_indice(self):
+        self._offsets = {}   # id -> posición de la línea en el log
+        self._fin = 0        # bytes del log ya indexados (siempre termina en línea completa)
+        self._max_id = None
+        self._repetidos = set()  # ids que aparecen en más de una línea del log
+
+        # Índices secundarios para el listado paginado
+        self._resumenes = {}   # id -> {"id", "fecha", "nombre", "ruc"}
+        self._por_ruc = {}     # RUC -> [ids]
+        self._nombres = []     # [(nombre normalizado, id)], ordenado bajo demanda
+        self._fechas = []      # [(fecha, id)], ordenado bajo demanda
+        self._indices_ordenados = True
+
+    def _indexar_registro(self, registro, offset):
+        """Agrega un registro leído del log al índice en memoria."""
+        id_cotizacion = registro.get("id")
+        if id_cotizacion is None:
+            return
+        if id_cotizacion in self._offsets:
+            self._repetidos.add(id_cotizacion)
+            self._desindexar(id_cotizacion)
+        self._offsets[id_cotizacion] = offset
+        if self._max_id is None or id_cotizacion > self._max_id:
+            self._max_id = id_cotizacion
+
+        resumen = _resumen(registro)
+        self._resumenes[id_cotizacion] = resumen
+        self._por_ruc.setdefault(resumen["ruc"], []).append(id_cotizacion)
+        self._nombres.append((normalizar_texto(resumen["nombre"]), id_cotizacion))
+        fecha = _parsear_fecha(resumen["fecha"])
+        if fecha:
+            self._fechas.append((fecha, id_cotizacion))
+        self._indices_ordenados = False
+
+    def _desindexar(self, id_cotizacion):
+        """Quita un id repetido de los índices secundarios (la última línea prevalece).
+
+        Las líneas anteriores con ese id dejan de verse en ``obtener`` y
+        ``buscar``; ``renumerar_repetidos`` les da un id propio.
+        """
+        resumen = self._resumenes.pop(id_cotizacion)
+        self._por_ruc[resumen["ruc"]].remove(id_cotizacion)
+        self._nombres.remove((normalizar_texto(resumen["nombre"]), id_cotizacion))
+        fecha = _parsear_fecha(resumen["fecha"])
+        if fecha:
+            self._fechas.remove((fecha, id_cotizacion))
+        del self._offsets[id_cotizacion]
+
+    def _ordenar_indices(self):
+        if not self._indices_ordenados:
+            self._nombres.sort()
+            self._fechas.sort()
+            self._indices_ordenados = True
+
+    def _refrescar(self):
+        """Indexa las líneas nuevas del log (escritas por este u otro proceso)."""
+        with self._mutex:
+            try:
+                estado = os.stat(self.ruta)
+            except FileNotFoundError:
+                self._reiniciar_indice()
+                self._inodo = None
+                return
+
+            # El log fue reemplazado o truncado: se vuelve a indexar desde cero
+            if estado.st_ino != self._inodo or estado.st_size < self._fin:
+                self._reiniciar_indice()
+                self._inodo = estado.st_ino
+
+            if estado.st_size == self._fin:
+                return
+
+            with open(self.ruta, "rb") as archivo:
+                archivo.seek(self._fin)
+                offset = self._fin
+                for linea in archivo:
+                    if not linea.endswith(b"\n"):
+                        break  # escritura incompleta (en curso o interrumpida)
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        registro = None  # línea corrupta: se omite
+                    if isinstance(registro, dict):
+                        self._indexar_registro(self._hidratar(registro), offset)
+                    offset += len(linea)
+                self._fin = offset
+
+    def _reparar_cola(self):
+        """Elimina una última línea incompleta que haya dejado un corte (requiere el bloqueo)."""
+        self._refrescar()
+        if os.path.exists(self.ruta) and os.path.getsize(self.ruta) > self._fin:
+            with open(self.ruta, "r+b") as archivo:
+                archivo.truncate(self._fin)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+
+    # ------------------------------------------------------------------
+    # Secuencia de ids
+    # ------------------------------------------------------------------
+    def _leer_secuencia(self):
+        try:
+            with open(self.ruta_secuencia, "r") as archivo:
+                return int(archivo.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _escribir_secuencia(self, siguiente):
+        """Guarda el siguiente id de forma atómica (archivo temporal + rename)."""
+        temporal = self.ruta_secuencia + ".tmp"
+        with open(temporal, "w") as archivo:
+            archivo.write(str(siguiente))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta_secuencia)
+        _fsync_directorio(self.ruta_secuencia)
+
+    def _siguiente_id(self):
+        """Siguiente id libre: el mayor entre la secuencia guardada y el último id del log."""
+        candidatos = [self.id_inicial]
+        secuencia = self._leer_secuencia()
+        if secuencia is not None:
+            candidatos.append(secuencia)
+        if self._max_id is not None:
+            candidatos.append(self._max_id + 1)
+        max_archivado = self.archivo.max_id()
+        if max_archivado is not None:
+            candidatos.append(max_archivado + 1)
+        return max(candidatos)
+
+    # ------------------------------------------------------------------
+    # Clientes
+    # ------------------------------------------------------------------
+    def _compactar(self, registro):
+        """Reemplaza "datos del cliente" por la referencia al directorio (requiere el bloqueo).
+
+        El directorio se escribe sin fsync; quien anexa llama a
+        ``self.clientes.sincronizar()`` antes de escribir las cotizaciones.
+        """
+        if "datos del cliente" not in registro:
+            return registro
+        compacto = {}
+        for clave, valor in registro.items():
+            if clave == "datos del cliente":
+                compacto["cliente"] = self.clientes.registrar(valor, sincronizar=False)
+            elif clave != "cliente":
+                compacto[clave] = valor
+        return compacto
+
+    def _hidratar(self, registro):
+        """Devuelve la cotización con "datos del cliente" completo a partir de su referencia."""
+        referencia = registro.get("cliente")
+        if referencia is None or "datos del cliente" in registro:
+            return registro
+        hidratado = {}
+        for clave, valor in registro.items():
+            if clave == "cliente":
+                hidratado["datos del cliente"] = self.clientes.version(referencia["RUC"], referencia["version"])
+            else:
+                hidratado[clave] = valor
+        return hidratado
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def suscribir(self, funcion):
+        """Registra una función sin argumentos que se llama después de cada escritura."""
+        self._suscriptores.append(funcion)
+
+    def _notificar(self):
+        for funcion in list(self._suscriptores):
+            funcion()
+
+    def _anexar(self, registros):
+        """Anexa registros completos al log con una sola escritura y un fsync (requiere el bloqueo)."""
+        datos = b"".join(_serializar(self._compactar(registro)) for registro in registros)
+        self.clientes.sincronizar()  # las referencias deben ser durables antes que las cotizaciones
+        nuevo = not os.path.exists(self.ruta)
+        with open(self.ruta, "ab") as archivo:
+            archivo.write(datos)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        if nuevo:
+            _fsync_directorio(self.ruta)
+        self._generacion += 1
+        self._refrescar()
+
+    def agregar(self, datos_cliente, productos, fecha=None):
+        """Guarda una nueva cotización y la devuelve con su id asignado."""
+        return self.agregar_lote([{"datos del cliente": datos_cliente, "productos": productos, "fecha": fecha}])[0]
+
+    @cronometrado("almacen.agregar_lote")
+    def agregar_lote(self, cotizaciones):
+        """Guarda varias cotizaciones nuevas con una sola escritura y un solo fsync.
+
+        Cada elemento trae "datos del cliente", "productos" y opcionalmente
+        "fecha" (dd/mm/aaaa). Devuelve las cotizaciones con su id asignado.
+        """
+        guardadas = []
+        with self._bloqueo():
+            self._reparar_cola()
+            siguiente = self._siguiente_id()
+            hoy = datetime.now().strftime("%d/%m/%Y")
+            for datos in cotizaciones:
+                cotizacion = {
+                    "id": siguiente,
+                    "fecha": datos.get("fecha") or hoy,
+                    "datos del cliente": datos["datos del cliente"],
+                    "productos": datos["productos"]
+                }
+                # Los montos se calculan una sola vez, al guardar
+                materializar(cotizacion)
+                guardadas.append(cotizacion)
+                siguiente += 1
+            if guardadas:
+                self._anexar(guardadas)
+                self._escribir_secuencia(siguiente)
+        if guardadas:
+            self._notificar()
+        return guardadas
+
+    def reescribir(self, cotizaciones):
+        """Reemplaza todo el contenido del log de forma atómica (compactación o edición masiva).
+
+        Las cotizaciones sin montos guardados (las anteriores a que se
+        guardaran) se materializan al pasar.
+        """
+        with self._bloqueo():
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "wb") as archivo:
+                for cotizacion in _materializadas(cotizaciones):
+                    archivo.write(_serializar(self._compactar(cotizacion)))
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            self.clientes.sincronizar()
+            os.replace(temporal, self.ruta)
+            _fsync_directorio(self.ruta)
+            self._generacion += 1
+            self._refrescar()
+            siguiente = self._siguiente_id()
+            self._escribir_secuencia(siguiente)
+        self._notificar()
+
+    def _reemplazar_log(self, lineas):
+        """Reemplaza el log por ``lineas`` (bytes ya serializados) de forma atómica (requiere el bloqueo)."""
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.writelines(lineas)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta)
+        _fsync_directorio(self.ruta)
+        self._generacion += 1
+        self._refrescar()
+
+    def renumerar_repetidos(self):
+        """Da un id nuevo a las cotizaciones del log que repiten el id de una línea anterior.
+
+        Repara logs migrados antes de que la migración detectara ids
+        repetidos: la primera línea con cada id lo conserva y las demás
+        reciben el siguiente id de la secuencia. Devuelve las reasignaciones
+        (ver ``_renumerar_repetidos``; la posición es el número de línea desde 0).
+        """
+        with self._bloqueo():
+            self._reparar_cola()
+            if not self._repetidos:
+                return []
+            with open(self.ruta, "rb") as archivo:
+                lineas = archivo.readlines()
+            registros, posiciones = [], []
+            for numero, linea in enumerate(lineas):
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue  # las líneas ilegibles se conservan tal cual
+                if isinstance(registro, dict):
+                    registros.append(registro)
+                    posiciones.append(numero)
+            reasignaciones, siguiente = _renumerar_repetidos(registros, self._siguiente_id())
+            for reasignacion in reasignaciones:
+                numero = posiciones[reasignacion["posicion"]]
+                lineas[numero] = _serializar(registros[reasignacion["posicion"]])
+                reasignacion["posicion"] = numero
+            self._reemplazar_log(lineas)
+            self._escribir_secuencia(siguiente)
+        self._notificar()
+        return reasignaciones
+
+    def archivar(self, anio=None):
+        """Pasa al archivo las cotizaciones con fecha anterior al año ``anio`` (por defecto, el actual).
+
+        Primero se escriben los segmentos de cada año y después se reescribe
+        el log solo con las que quedan, así que un corte a mitad de camino no
+        pierde nada (a lo sumo quedan en los dos lados y prevalece el log).
+        Las cotizaciones sin fecha válida y las líneas que no se pueden leer
+        se quedan en el log. Si hay ids repetidos no archiva nada (lanza
+        ValueError): hay que renumerarlos antes con ``renumerar_repetidos()``.
+        Devuelve ``{año: cantidad archivada}``.
+        """
+        anio = anio or datetime.now().year
+        with self._bloqueo():
+            self._reparar_cola()
+            por_anio = {}
+            quedan = []
+            vistos, repetidos = set(), set()
+            if os.path.exists(self.ruta):
+                with open(self.ruta, "rb") as archivo:
+                    for linea in archivo:
+                        try:
+                            registro = json.loads(linea)
+                        except ValueError:
+                            registro = None
+                        if not isinstance(registro, dict) or registro.get("id") is None:
+                            quedan.append(linea)
+                            continue
+                        if registro["id"] in vistos:
+                            repetidos.add(registro["id"])
+                        vistos.add(registro["id"])
+                        fecha = _parsear_fecha(registro.get("fecha"))
+                        if fecha and fecha.year < anio:
+                            por_anio.setdefault(fecha.year, []).append(registro)
+                        else:
+                            quedan.append(linea)
+            if repetidos:
+                raise ValueError(
+                    "No se archiva: hay ids repetidos en el log ("
+                    + ", ".join(str(i) for i in sorted(repetidos, key=str))
+                    + "). Renumérelos antes con 'python almacen.py renumerar'."
+                )
+            if not por_anio:
+                return {}
+
+            for anio_segmento, registros in sorted(por_anio.items()):
+                resumenes = {r["id"]: _resumen(self._hidratar(r)) for r in registros}
+                self.archivo.escribir(anio_segmento, registros, resumenes)
+
+            siguiente = self._siguiente_id()
+            self._reemplazar_log(quedan)
+            self._escribir_secuencia(max(siguiente, self._siguiente_id()))
+        self._notificar()
+        return {anio_segmento: len(registros) for anio_segmento, registros in sorted(por_anio.items())}
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def obtener(self, id_cotizacion):
+        """Devuelve una cotización leyendo solo su línea del log (o su registro archivado), o None si no existe."""
+        self._refrescar()
+        offset = self._offsets.get(id_cotizacion)
+        if offset is None:
+            registro = self.archivo.obtener(id_cotizacion)
+            return self._hidratar(registro) if registro is not None else None
+        with open(self.ruta, "rb") as archivo:
+            archivo.seek(offset)
+            return self._hidratar(json.loads(archivo.readline()))
+
+    def recorrer(self, desde=0):
+        """Recorre el log desde la posición ``desde`` y genera pares (posición siguiente, cotización).
+
+        Solo entrega líneas completas, así que la última posición generada
+        sirve para continuar más tarde desde ahí.
+        """
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, "rb") as archivo:
+            archivo.seek(desde)
+            offset = desde
+            for linea in archivo:
+                if not linea.endswith(b"\n"):
+                    break
+                offset += len(linea)
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if isinstance(registro, dict):
+                    yield offset, self._hidratar(registro)
+
+    def recorrer_archivo(self):
+        """Genera las cotizaciones archivadas (hidratadas), de la más antigua a la más reciente.
+
+        Se omiten las que también están en el log, donde prevalece su versión.
+        """
+        self._refrescar()
+        for registro in self.archivo.recorrer():
+            if registro.get("id") not in self._offsets:
+                yield self._hidratar(registro)
+
+    def identidad_log(self):
+        """Identifica el archivo del log (cambia si se reescribe), o None si no existe."""
+        try:
+            return os.stat(self.ruta).st_ino
+        except FileNotFoundError:
+            return None
+
+    @cronometrado("almacen.todas")
+    def todas(self):
+        """Devuelve todas las cotizaciones en orden de escritura.
+
+        Incluye primero las archivadas. El resultado se guarda en memoria y se
+        reutiliza mientras el log no cambie (mismo inodo, tamaño, mtime y
+        generación) ni el archivo. Si el log solo creció, se parsean
+        únicamente las líneas nuevas. Las cotizaciones devueltas se comparten
+        entre llamadas y no deben modificarse.
+        """
+        with self._mutex:
+            try:
+                estado = os.stat(self.ruta)
+            except FileNotFoundError:
+                estado = None
+            archivo = self.archivo.identidad()
+            if estado is None and not archivo:
+                self._cache_todas, self._cache_estado, self._cache_fin = None, None, 0
+                return []
+            clave = ((estado.st_ino, estado.st_size, estado.st_mtime_ns) if estado else (None, 0, None)) + (
+                self._generacion, archivo)
+            estadisticas = self.estadisticas_todas
+
+            if self._cache_todas is not None and clave == self._cache_estado:
+                estadisticas["aciertos"] += 1
+                estadisticas["parseos_evitados"] += len(self._cache_todas)
+                return list(self._cache_todas)
+
+            anterior = self._cache_estado
+            if (self._cache_todas is not None and anterior[0] == clave[0]
+                    and anterior[4] == archivo and clave[1] >= self._cache_fin):
+                # El log solo creció: se parsea la cola nueva
+                estadisticas["incrementales"] += 1
+                estadisticas["parseos_evitados"] += len(self._cache_todas)
+                cotizaciones = self._cache_todas
+            else:
+                estadisticas["completas"] += 1
+                cotizaciones = list(self.recorrer_archivo())
+                self._cache_fin = 0
+
+            for offset, registro in self.recorrer(self._cache_fin):
+                cotizaciones.append(registro)
+                self._cache_fin = offset
+            self._cache_todas = cotizaciones
+            self._cache_estado = clave
+            return list(cotizaciones)
+
+    def obtener_varias(self, ids):
+        """Devuelve varias cotizaciones abriendo el log una sola vez (las archivadas, del archivo)."""
+        self._refrescar()
+        cotizaciones = []
+        with open(self.ruta, "rb") if self._offsets else nullcontext() as archivo:
+            for id_cotizacion in ids:
+                offset = self._offsets.get(id_cotizacion)
+                if offset is None:
+                    registro = self.archivo.obtener(id_cotizacion)
+                    if registro is not None:
+                        cotizaciones.append(self._hidratar(registro))
+                    continue
+                archivo.seek(offset)
+                cotizaciones.append(self._hidratar(json.loads(archivo.readline())))
+        return cotizaciones
+
+    def _filtrar(self, ruc=None, nombre=None, desde=None, hasta=None):
+        """Ids que cumplen los filtros, o None si no hay ningún filtro (requiere el mutex)."""
+        self._refrescar()
+        self._ordenar_indices()
+        candidatos = None
+
+        if ruc:
+            candidatos = set(self._por_ruc.get(str(ruc).strip(), ()))
+
+        if nombre:
+            prefijo = normalizar_texto(nombre)
+            inicio = bisect.bisect_left(self._nombres, (prefijo,))
+            por_nombre = set()
+            for nombre_normalizado, id_cotizacion in self._nombres[inicio:]:
+                if not nombre_normalizado.startswith(prefijo):
+                    break
+                por_nombre.add(id_cotizacion)
+            candidatos = por_nombre if candidatos is None else candidatos & por_nombre
+
+        if desde or hasta:
+            inicio = bisect.bisect_left(self._fechas, (desde,)) if desde else 0
+            fin = len(self._fechas)
+            if hasta:
+                fin = bisect.bisect_left(self._fechas, (hasta + timedelta(days=1),))
+            por_fecha = {id_cotizacion for _, id_cotizacion in self._fechas[inicio:fin]}
+            candidatos = por_fecha if candidatos is None else candidatos & por_fecha
+
+        return candidatos
+
+    def _resumenes_archivados(self, desde=None, hasta=None):
+        """Resúmenes de las cotizaciones archivadas, de la más reciente a la más antigua (requiere el mutex).
+
+        Con ``desde``/``hasta`` solo se abren los segmentos de esos años.
+        """
+        for anio in reversed(self.archivo.anios()):
+            if (desde and anio < desde.year) or (hasta and anio > hasta.year):
+                continue
+            segmento = self.archivo.segmento(anio)
+            if segmento is None:
+                continue
+            for resumen in reversed(segmento.resumenes()):
+                if resumen["id"] not in self._offsets:
+                    yield resumen
+
+    def _filtrar_archivo(self, ruc=None, nombre=None, desde=None, hasta=None):
+        """Resúmenes archivados que cumplen los filtros, por id (requiere el mutex)."""
+        ruc = str(ruc).strip() if ruc else None
+        prefijo = normalizar_texto(nombre) if nombre else None
+        encontrados = {}
+        for resumen in self._resumenes_archivados(desde, hasta):
+            if ruc and resumen["ruc"] != ruc:
+                continue
+            if prefijo and not normalizar_texto(resumen["nombre"]).startswith(prefijo):
+                continue
+            if desde or hasta:
+                fecha = _parsear_fecha(resumen["fecha"])
+                if fecha is None or (desde and fecha < desde) or (hasta and fecha > hasta):
+                    continue
+            encontrados[resumen["id"]] = resumen
+        return encontrados
+
+    def buscar(self, ruc=None, nombre=None, desde=None, hasta=None, pagina=1, por_pagina=20):
+        """Busca cotizaciones usando los índices y devuelve solo una página de resúmenes.
+
+        ``ruc`` es exacto, ``nombre`` es un prefijo sin distinguir mayúsculas ni
+        tildes, y ``desde``/``hasta`` son fechas (inclusive). Los resultados van
+        de la más reciente a la más antigua. Devuelve ``(total, resumenes)``;
+        cada resumen tiene id, fecha, nombre y RUC, sin los productos.
+        """
+        with self._mutex:
+            candidatos = self._filtrar(ruc, nombre, desde, hasta)
+
+            inicio = max(pagina - 1, 0) * por_pagina
+            if candidatos is None:
+                total = len(self._offsets) + len(self.archivo)
+                # Sin filtros se recorre el índice desde el final sin ordenar nada; las
+                # archivadas van después y solo se abren si la página llega hasta ellas
+                resumenes = [self._resumenes[i] for i in islice(reversed(self._offsets), inicio, inicio + por_pagina)]
+                if len(resumenes) < por_pagina:
+                    saltar = max(inicio - len(self._offsets), 0)
+                    resumenes += islice(self._resumenes_archivados(), saltar, saltar + por_pagina - len(resumenes))
+            else:
+                archivados = self._filtrar_archivo(ruc, nombre, desde, hasta)
+                total = len(candidatos) + len(archivados)
+                seleccion = sorted(candidatos | archivados.keys(), reverse=True)[inicio:inicio + por_pagina]
+                resumenes = [self._resumenes.get(i) or archivados[i] for i in seleccion]
+
+            return total, [dict(resumen) for resumen in resumenes]
+
+    def buscar_ids(self, ruc=None, nombre=None, desde=None, hasta=None):
+        """Todos los ids que cumplen los filtros, en orden ascendente."""
+        with self._mutex:
+            candidatos = self._filtrar(ruc, nombre, desde, hasta)
+            if candidatos is None:
+                return sorted(set(self._offsets) | {r["id"] for r in self._resumenes_archivados()})
+            return sorted(candidatos | self._filtrar_archivo(ruc, nombre, desde, hasta).keys())
+
+    def ids(self):
+        """Ids de las cotizaciones del log (sin las archivadas), en orden de escritura."""
+        self._refrescar()
+        return list(self._offsets)
+
+    def __len__(self):
+        self._refrescar()
+        return len(self._offsets) + len(self.archivo)
+
+    def __bool__(self):
+        # Un almacén vacío sigue siendo un almacén: "almacen or obtener_almacen()" no debe cambiarlo
+        return True
+
+    def ids_repetidos(self):
+        """Ids que aparecen en más de una línea del log (solo se ve la última)."""
+        self._refrescar()
+        return sorted(self._repetidos)
+
+    # ------------------------------------------------------------------
+    # Migración
+    # ------------------------------------------------------------------
+    def migrar_desde_json(self, ruta_json=COTIZACIONES_JSON_ANTIGUO):
+        """Migra una sola vez el arreglo JSON antiguo al log.
+
+        Conserva los ids existentes y renombra el archivo antiguo a
+        ``<ruta>.migrado`` para no volver a importarlo. Las sesiones
+        concurrentes de la versión antigua podían dar el mismo id a dos
+        cotizaciones: la primera lo conserva y las demás (y las que no tengan
+        id) reciben uno nuevo de la secuencia. Los montos se materializan
+        como en las cotizaciones nuevas. Devuelve
+        ``(cantidad migrada, reasignaciones)`` (ver ``_renumerar_repetidos``).
+        """
+        with self._bloqueo():
+            if not os.path.exists(ruta_json):
+                return 0, []
+            self._refrescar()
+            if self._offsets or len(self.archivo):
+                return 0, []  # el log ya tiene datos: no se mezcla con el archivo antiguo
+            try:
+                with open(ruta_json, "r") as archivo:
+                    cotizaciones = json.load(archivo)
+            except json.JSONDecodeError:
+                cotizaciones = []
+            cotizaciones = [c for c in cotizaciones if isinstance(c, dict)] if isinstance(cotizaciones, list) else []
+            reasignaciones = []
+            if cotizaciones:
+                reasignaciones, siguiente = _renumerar_repetidos(cotizaciones, self._siguiente_id())
+                materializar_lote(cotizaciones)
+                self._anexar(cotizaciones)
+                self._escribir_secuencia(max(siguiente, self._siguiente_id()))
+            os.replace(ruta_json, ruta_json + ".migrado")
+            _fsync_directorio(ruta_json)
+            return len(cotizaciones), reasignaciones
+
+
+def informar_reasignaciones(reasignaciones, origen):
+    """Imprime una línea por cada cotización que recibió un id nuevo."""
+    for r in reasignaciones:
+        print(f"{origen}: la cotización en la posición {r['posicion']} tenía el id {r['id_anterior']} "
+              f"(repetido o vacío) y ahora es la {r['id_nuevo']}")
+
+
+_almacenes = {}
+_almacenes_lock = threading.Lock()
+
+
+def obtener_almacen(ruta=COTIZACIONES_LOG):
+    """Devuelve el almacén compartido del proceso, migrando el JSON antiguo la primera vez."""
+    with _almacenes_lock:
+        almacen = _almacenes.get(ruta)
+        if almacen is None:
+            almacen = AlmacenCotizaciones(ruta)
+            ruta_json = os.path.join(os.path.dirname(ruta), COTIZACIONES_JSON_ANTIGUO)
+            _, reasignaciones = almacen.migrar_desde_json(ruta_json)
+            informar_reasignaciones(reasignaciones, ruta_json)
+            _almacenes[ruta] = almacen
+        return almacen
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Uso: python almacen.py migrar [cotizaciones.json] | renumerar | compactar | archivar [año]
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrar":
+        ruta_json = sys.argv[2] if len(sys.argv) > 2 else COTIZACIONES_JSON_ANTIGUO
+        migradas, reasignaciones = AlmacenCotizaciones().migrar_desde_json(ruta_json)
+        informar_reasignaciones(reasignaciones, ruta_json)
+        print(f"Cotizaciones migradas: {migradas} ({len(reasignaciones)} con id nuevo)")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "renumerar":
+        # Da un id propio a las cotizaciones del log que comparten id (logs migrados con ids repetidos)
+        almacen = AlmacenCotizaciones()
+        reasignaciones = almacen.renumerar_repetidos()
+        informar_reasignaciones(reasignaciones, almacen.ruta)
+        print(f"Cotizaciones con id nuevo: {len(reasignaciones)}")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "compactar":
+        # Reescribe el log pasando los datos de cliente copiados al directorio de clientes
+        almacen = AlmacenCotizaciones()
+        antes = os.path.getsize(almacen.ruta) if os.path.exists(almacen.ruta) else 0
+        almacen.reescribir(cotizacion for _, cotizacion in almacen.recorrer())
+        despues = os.path.getsize(almacen.ruta) + os.path.getsize(almacen.clientes.ruta)
+        print(f"Log compactado: {antes} -> {despues} bytes ({len(almacen.clientes)} clientes)")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "archivar":
+        # Pasa a segmentos comprimidos por año las cotizaciones anteriores al año indicado (o al actual)
+        almacen = AlmacenCotizaciones()
+        try:
+            archivadas = almacen.archivar(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+        for anio, cantidad in archivadas.items():
+            segmento = almacen.archivo.segmento(anio)
+            print(f"{anio}: {cantidad} cotizaciones archivadas ({os.path.getsize(segmento.ruta)} bytes en {segmento.ruta})")
+        if not archivadas:
+            print("No hay cotizaciones de años anteriores en el log")
+    else:
+        print("Uso: python almacen.py migrar [cotizaciones.json] | renumerar | compactar | archivar [año]")
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import threading
+from almacen import obtener_almacen, normalizar_texto
+from precios import linea_de, tasa_de, totales_de
+
+# Cantidad de elementos que se mantienen en los rankings
+TOP = 10
+# Segundos mínimos entre dos escrituras del archivo de estadísticas
+INTERVALO_GUARDADO = 30
+VERSION = 1
+
+
+def _mes(fecha):
+    """'dd/mm/aaaa' -> 'aaaa-mm' (o 'sin fecha')."""
+    try:
+        dia, mes, anio = fecha.split("/")
+        return f"{int(anio):04d}-{int(mes):02d}"
+    except (AttributeError, ValueError):
+        return "sin fecha"
+
+
+def _actualizar_top(top, clave, valor, valores):
+    """Mantiene ``top`` (lista de claves, de mayor a menor valor) tras subir el valor de ``clave``.
+
+    Los valores solo crecen (las cotizaciones se anexan), así que una clave
+    que no está en el ranking solo puede entrar cuando su propio valor sube.
+    """
+    if clave not in top:
+        if len(top) >= TOP and valor <= valores[top[-1]]:
+            return
+        top.append(clave)
+    top.sort(key=lambda k: valores[k], reverse=True)
+    del top[TOP:]
+
+
+class AnaliticaVentas:
+    """Estadísticas de ventas mantenidas de forma incremental.
+
+    Guarda el volumen cotizado por mes, por cliente (RUC) y por producto, y
+    los rankings de clientes y productos ya ordenados. Recuerda hasta qué
+    posición del log del almacén procesó, de modo que al actualizarse solo
+    lee las cotizaciones nuevas (las archivadas se suman una vez, al
+    empezar de cero). Se persiste junto al almacén en
+    ``<log>.analitica.json``; si el log fue reescrito, se reconstruye desde cero.
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self.ruta = almacen.ruta + ".analitica.json"
+        self._lock = threading.Lock()
+        self._ultimo_guardado = 0
+        self._datos = self._vacio()
+        self._cargar()
+
+    def _vacio(self):
+        return {
+            "version": VERSION,
+            "log": self.almacen.identidad_log(),
+            "posicion": 0,
+            "archivo": False,  # ya se sumaron las cotizaciones archivadas
+            "cotizaciones": 0,
+            "total": 0,  # céntimos
+            "por_mes": {},
+            "por_cliente": {},
+            "por_producto": {},
+            "top_clientes": [],
+            "top_productos": [],
+        }
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except (FileNotFoundError, ValueError):
+            return
+        if datos.get("version") == VERSION:
+            self._datos = datos
+
+    def _guardar(self):
+        """Escribe las estadísticas de forma atómica (requiere el lock)."""
+        temporal = f"{self.ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(self._datos, archivo, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporal, self.ruta)
+        self._ultimo_guardado = time.monotonic()
+
+    def _aplicar(self, cotizacion):
+        """Suma una cotización a todos los agregados."""
+        datos = self._datos
+        total = totales_de(cotizacion)["total"]
+        datos["cotizaciones"] += 1
+        datos["total"] += total
+
+        mes = datos["por_mes"].setdefault(_mes(cotizacion.get("fecha")), {"cotizaciones": 0, "total": 0})
+        mes["cotizaciones"] += 1
+        mes["total"] += total
+
+        cliente = cotizacion.get("datos del cliente") or {}
+        ruc = str(cliente.get("RUC", "")).strip()
+        por_cliente = datos["por_cliente"]
+        fila = por_cliente.setdefault(ruc, {"nombre": "", "cotizaciones": 0, "total": 0})
+        fila["nombre"] = cliente.get("Nombre del cliente", fila["nombre"])
+        fila["cotizaciones"] += 1
+        fila["total"] += total
+        _actualizar_top(datos["top_clientes"], ruc, fila["total"], {k: por_cliente[k]["total"] for k in datos["top_clientes"] + [ruc]})
+
+        tasa = tasa_de(cotizacion)
+        por_producto = datos["por_producto"]
+        for producto in cotizacion.get("productos", []):
+            clave = normalizar_texto(producto.get("descripcion"))
+            fila = por_producto.setdefault(
+                clave, {"descripcion": producto.get("descripcion", ""), "veces": 0, "cantidad": 0, "total": 0}
+            )
+            fila["veces"] += 1
+            fila["cantidad"] += producto.get("cantidad", 0)
+            fila["total"] += linea_de(producto, tasa)["total"]
+            _actualizar_top(datos["top_productos"], clave, fila["veces"],
+                            {k: por_producto[k]["veces"] for k in datos["top_productos"] + [clave]})
+
+    def actualizar(self, forzar_guardado=False):
+        """Procesa las cotizaciones escritas desde la última actualización."""
+        with self._lock:
+            identidad = self.almacen.identidad_log()
+            try:
+                tamano = os.path.getsize(self.almacen.ruta)
+            except FileNotFoundError:
+                tamano = 0
+            if identidad != self._datos["log"] or tamano < self._datos["posicion"]:
+                # El log fue reemplazado (reescritura o edición masiva): se recalcula todo
+                self._datos = self._vacio()
+
+            cambios = False
+            if not self._datos.get("archivo"):
+                # Al archivar se reescribe el log, así que esto se hace al empezar de cero
+                for cotizacion in self.almacen.recorrer_archivo():
+                    self._aplicar(cotizacion)
+                    cambios = True
+                self._datos["archivo"] = True
+            for posicion, cotizacion in self.almacen.recorrer(self._datos["posicion"]):
+                self._aplicar(cotizacion)
+                self._datos["posicion"] = posicion
+                cambios = True
+
+            # Si el proceso se corta antes de guardar, lo pendiente se vuelve a leer del log
+            if forzar_guardado or (cambios and time.monotonic() - self._ultimo_guardado >= INTERVALO_GUARDADO):
+                self._guardar()
+
+    def reconstruir(self):
+        """Descarta los agregados y los vuelve a calcular leyendo todo el almacén."""
+        with self._lock:
+            self._datos = self._vacio()
+        self.actualizar(forzar_guardado=True)
+
+    def resumen(self):
+        """Datos listos para el dashboard: totales, serie por mes y rankings (montos en céntimos)."""
+        with self._lock:
+            datos = self._datos
+            return {
+                "cotizaciones": datos["cotizaciones"],
+                "total": datos["total"],
+                "por_mes": dict(sorted(datos["por_mes"].items())),
+                "top_clientes": [dict(datos["por_cliente"][ruc], ruc=ruc) for ruc in datos["top_clientes"]],
+                "top_productos": [dict(datos["por_producto"][clave]) for clave in datos["top_productos"]],
+            }
+
+
+_analiticas = {}
+_analiticas_lock = threading.Lock()
+
+
+def obtener_analitica(almacen=None):
+    """Devuelve las estadísticas compartidas del almacén, suscritas a sus escrituras."""
+    almacen = almacen or obtener_almacen()
+    with _analiticas_lock:
+        analitica = _analiticas.get(almacen.ruta)
+        if analitica is None:
+            analitica = AnaliticaVentas(almacen)
+            almacen.suscribir(analitica.actualizar)
+            _analiticas[almacen.ruta] = analitica
+    return analitica
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Uso: python analitica.py reconstruir
+    if len(sys.argv) >= 2 and sys.argv[1] == "reconstruir":
+        analitica = obtener_analitica()
+        analitica.reconstruir()
+        print(f"Estadísticas reconstruidas: {analitica.resumen()['cotizaciones']} cotizaciones")
+    else:
+        print("Uso: python analitica.py reconstruir")
@@ -0,0 +1,313 @@
+import re
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import metricas
+from almacen import obtener_almacen
+from catalogo import obtener_catalogo
+from clientes import normalizar_ruc, ruc_valido
+from importacion import validar_lineas
+from pdf_cache import clave_cotizacion
+from trabajos_pdf import obtener_cola
+
+# Dirección por defecto: solo la máquina local (el ERP corre en el mismo servidor)
+HOST = "127.0.0.1"
+PUERTO = 8765
+# Tamaño máximo del cuerpo de un POST
+MAX_CUERPO_BYTES = 1024 * 1024
+# Segundos que un pedido de PDF espera al pool antes de responder 504
+ESPERA_PDF_SEGUNDOS = 60
+# Segundos que una conexión keep-alive puede quedar inactiva antes de cerrarse
+INACTIVIDAD_SEGUNDOS = 15
+# Cotizaciones por página en el listado (por defecto y como máximo)
+POR_PAGINA = 20
+MAX_POR_PAGINA = 200
+CAMPOS_CLIENTE = ["Nombre del cliente", "RUC", "Telefono", "E-mail", "Dirección"]
+
+_RUTA_COTIZACION = re.compile(r"^/cotizaciones/(\d+)(/pdf)?/?$")
+
+
+class ErrorAPI(Exception):
+    """Error que se devuelve al cliente con su código HTTP y un mensaje."""
+
+    def __init__(self, estado, mensaje, cabeceras=None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+        self.cabeceras = cabeceras
+
+
+def _fecha(texto):
+    """'dd/mm/aaaa' o 'aaaa-mm-dd' -> date."""
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ErrorAPI(400, f"fecha inválida: {texto} (dd/mm/aaaa o aaaa-mm-dd)")
+
+
+def _entero(texto, nombre, minimo=1, maximo=None):
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise ErrorAPI(400, f"{nombre} debe ser un número entero")
+    if valor < minimo:
+        raise ErrorAPI(400, f"{nombre} debe ser al menos {minimo}")
+    return min(valor, maximo) if maximo else valor
+
+
+def _etag(datos):
+    return '"' + hashlib.sha256(datos).hexdigest()[:32] + '"'
+
+
+def validar_cotizacion(cuerpo):
+    """Datos del cliente, productos y fecha de una cotización nueva recibida por la API.
+
+    Se aceptan las mismas líneas que en la aplicación (precio cero incluido).
+    Lanza ``ErrorAPI`` (400) con todos los problemas encontrados.
+    """
+    if not isinstance(cuerpo, dict):
+        raise ErrorAPI(400, "el cuerpo debe ser un objeto JSON")
+    cliente = cuerpo.get("datos del cliente")
+    productos = cuerpo.get("productos")
+    if not isinstance(cliente, dict):
+        raise ErrorAPI(400, 'falta "datos del cliente"')
+    if not isinstance(productos, list) or not all(isinstance(p, dict) for p in productos):
+        raise ErrorAPI(400, '"productos" debe ser una lista de objetos')
+
+    datos_cliente = {campo: str(cliente.get(campo) or "").strip() for campo in CAMPOS_CLIENTE}
+    datos_cliente["RUC"] = normalizar_ruc(datos_cliente["RUC"])
+    problemas = [f"falta {campo}" for campo, valor in datos_cliente.items() if not valor]
+    if datos_cliente["RUC"] and not ruc_valido(datos_cliente["RUC"]):
+        problemas.append("RUC inválido")
+    validos, errores = validar_lineas(productos)
+    problemas += errores
+    if not validos and not errores:
+        problemas.append("la cotización no tiene productos")
+    fecha = cuerpo.get("fecha")
+    if fecha:
+        fecha = _fecha(str(fecha)).strftime("%d/%m/%Y")
+    if problemas:
+        raise ErrorAPI(400, "; ".join(problemas))
+    return datos_cliente, validos, fecha
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende un pedido HTTP/1.1; la conexión se reutiliza mientras el cliente la mantenga abierta.
+
+    ``GET /cotizaciones`` (filtros ruc, nombre, desde, hasta, pagina, por_pagina),
+    ``POST /cotizaciones``, ``GET /cotizaciones/<id>`` y ``GET /cotizaciones/<id>/pdf``.
+    Las respuestas de lectura llevan ETag y devuelven 304 si el cliente ya tiene
+    esa versión; el ETag del PDF es la clave de la caché de PDFs, así que se
+    responde sin generarlo ni leerlo.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "AcesmaAPI/1.0"
+    timeout = INACTIVIDAD_SEGUNDOS
+    # Cabecera y cuerpo salen en escrituras separadas: con Nagle cada respuesta
+    # esperaría el ACK retrasado del cliente (~40 ms) en una conexión keep-alive
+    disable_nagle_algorithm = True
+
+    # ------------------------------------------------------------------
+    # Respuestas
+    # ------------------------------------------------------------------
+    def _enviar(self, estado, cuerpo=b"", tipo="application/json; charset=utf-8", cabeceras=None):
+        self.send_response(estado)
+        if estado != 304:
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        if estado != 304 and self.command != "HEAD":
+            self.wfile.write(cuerpo)
+
+    def _json(self, estado, datos, cabeceras=None):
+        cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._enviar(estado, cuerpo, cabeceras=cabeceras)
+
+    def _vigente(self, etag):
+        """True si el cliente mandó ``If-None-Match`` con este ETag."""
+        pedidas = self.headers.get("If-None-Match")
+        if not pedidas:
+            return False
+        return pedidas.strip() == "*" or etag in (e.strip().removeprefix("W/") for e in pedidas.split(","))
+
+    def _con_etag(self, cuerpo, tipo="application/json; charset=utf-8", etag=None, cabeceras=None):
+        etag = etag or _etag(cuerpo)
+        cabeceras = dict(cabeceras or {}, ETag=etag, **{"Cache-Control": "no-cache"})
+        if self._vigente(etag):
+            self._enviar(304, cabeceras=cabeceras)
+        else:
+            self._enviar(200, cuerpo, tipo, cabeceras)
+
+    def log_message(self, formato, *args):
+        # Sin un renglón por pedido en la consola; los tiempos van a metricas
+        pass
+
+    # ------------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------------
+    def _atender(self, metodo):
+        inicio = time.perf_counter()
+        self._cuerpo_leido = False
+        nombre = "otro"
+        try:
+            url = urlsplit(self.path)
+            coincidencia = _RUTA_COTIZACION.match(url.path)
+            if url.path.rstrip("/") == "/cotizaciones":
+                nombre = "listar" if metodo == "GET" else "crear"
+                if metodo == "GET":
+                    self.listar(parse_qs(url.query))
+                elif metodo == "POST":
+                    self.crear()
+                else:
+                    raise ErrorAPI(405, "método no permitido", {"Allow": "GET, POST"})
+            elif coincidencia:
+                nombre = "pdf" if coincidencia.group(2) else "obtener"
+                if metodo != "GET":
+                    raise ErrorAPI(405, "método no permitido", {"Allow": "GET"})
+                if coincidencia.group(2):
+                    self.pdf(int(coincidencia.group(1)))
+                else:
+                    self.obtener(int(coincidencia.group(1)))
+            else:
+                raise ErrorAPI(404, "ruta no encontrada")
+        except ErrorAPI as e:
+            self._error(e.estado, e.mensaje, e.cabeceras)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            self._error(500, str(e))
+        metricas.registrar(f"api.{nombre}", (time.perf_counter() - inicio) * 1000)
+
+    def _error(self, estado, mensaje, cabeceras=None):
+        # Si quedó un cuerpo sin leer, la conexión ya no sirve para el siguiente pedido
+        if not self._cuerpo_leido and self.headers.get("Content-Length", "0").strip() != "0":
+            cabeceras = dict(cabeceras or {}, Connection="close")
+        self._json(estado, {"error": mensaje}, cabeceras)
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_HEAD(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def do_PUT(self):
+        self._atender("PUT")
+
+    def do_DELETE(self):
+        self._atender("DELETE")
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+    def listar(self, parametros):
+        def parametro(nombre):
+            valores = parametros.get(nombre)
+            return valores[0].strip() if valores and valores[0].strip() else None
+
+        pagina = _entero(parametro("pagina") or "1", "pagina")
+        por_pagina = _entero(parametro("por_pagina") or str(POR_PAGINA), "por_pagina", maximo=MAX_POR_PAGINA)
+        desde, hasta = parametro("desde"), parametro("hasta")
+        total, resumenes = self.server.almacen.buscar(
+            ruc=parametro("ruc"), nombre=parametro("nombre"),
+            desde=_fecha(desde) if desde else None, hasta=_fecha(hasta) if hasta else None,
+            pagina=pagina, por_pagina=por_pagina,
+        )
+        cuerpo = {"total": total, "pagina": pagina, "por_pagina": por_pagina, "cotizaciones": resumenes}
+        self._con_etag(json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def crear(self):
+        largo = self.headers.get("Content-Length")
+        if largo is None:
+            raise ErrorAPI(411, "falta Content-Length")
+        largo = _entero(largo, "Content-Length", minimo=0)
+        if largo > MAX_CUERPO_BYTES:
+            raise ErrorAPI(413, f"el cuerpo supera {MAX_CUERPO_BYTES} bytes")
+        datos = self.rfile.read(largo)
+        self._cuerpo_leido = True
+        try:
+            cuerpo = json.loads(datos or b"null")
+        except ValueError:
+            raise ErrorAPI(400, "el cuerpo no es JSON válido")
+
+        datos_cliente, productos, fecha = validar_cotizacion(cuerpo)
+        # Igual que al guardar desde la aplicación: cada línea queda con su código del catálogo
+        self.server.catalogo.registrar(productos)
+        cotizacion = self.server.almacen.agregar(datos_cliente, productos, fecha)
+        self._json(201, cotizacion, {"Location": f"/cotizaciones/{cotizacion['id']}"})
+
+    def _cotizacion(self, id_cotizacion):
+        cotizacion = self.server.almacen.obtener(id_cotizacion)
+        if cotizacion is None:
+            raise ErrorAPI(404, f"no existe la cotización {id_cotizacion}")
+        return cotizacion
+
+    def obtener(self, id_cotizacion):
+        cotizacion = self._cotizacion(id_cotizacion)
+        self._con_etag(json.dumps(cotizacion, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def pdf(self, id_cotizacion):
+        cotizacion = self._cotizacion(id_cotizacion)
+        # Misma clave que la caché de PDFs: cambia si cambia la cotización o la plantilla
+        etag = f'"{clave_cotizacion(cotizacion)}"'
+        cabeceras = {"Content-Disposition": f'inline; filename="cotizacion_{id_cotizacion}.pdf"'}
+        if self._vigente(etag):
+            self._con_etag(b"", etag=etag, cabeceras=cabeceras)
+            return
+        try:
+            pdf_data = self.server.cola.generar(cotizacion, timeout=ESPERA_PDF_SEGUNDOS)
+        except TimeoutError as e:
+            raise ErrorAPI(504, str(e))
+        except RuntimeError as e:
+            raise ErrorAPI(500, f"error al generar el PDF: {e}")
+        if pdf_data is None:
+            raise ErrorAPI(503, "hay muchos PDFs en proceso, intente nuevamente en unos segundos",
+                           {"Retry-After": "1"})
+        self._con_etag(pdf_data, "application/pdf", etag, cabeceras)
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión que comparte almacén, catálogo y cola de PDFs."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, direccion, almacen=None, catalogo=None, cola=None):
+        self.almacen = almacen or obtener_almacen()
+        self.catalogo = catalogo or obtener_catalogo()
+        self.cola = cola or obtener_cola()
+        super().__init__(direccion, ManejadorAPI)
+
+
+def crear_servidor(host=HOST, puerto=PUERTO, almacen=None, catalogo=None, cola=None):
+    """Crea el servidor (con ``puerto=0`` se elige uno libre, ver ``server_address``)."""
+    return ServidorAPI((host, puerto), almacen, catalogo, cola)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP de cotizaciones ACESMA INOX")
+    parser.add_argument("--host", default=HOST, help="Dirección en la que escuchar (0.0.0.0 para toda la red)")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.host, args.puerto)
+    servidor.cola.precalentar()
+    print(f"API de cotizaciones en http://{args.host}:{servidor.server_address[1]}/cotizaciones")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.cola.cerrar()
@@ -0,0 +1,246 @@
+import os
+import json
+import mmap
+import zlib
+import bisect
+import struct
+import sys
+import threading
+from array import array
+
+# Un segmento es un solo archivo de solo-lectura por año:
+#   MAGIA | largo del diccionario (u32) | diccionario zlib | registros comprimidos | relleno a 8 bytes |
+#   ids (u64 ordenados) | posiciones (u64, una más que ids: el registro i va de pos[i] a pos[i + 1]) |
+#   resúmenes (JSON comprimido) | pie
+# Los enteros van en little-endian.
+MAGIA = b"ACSEG01\n"
+_PIE = struct.Struct("<QQQQ8s")  # inicio del índice, cantidad, inicio y largo de los resúmenes, MAGIA
+# Bytes de registros que se usan como diccionario de compresión (zlib admite hasta 32 KiB)
+TAMANO_DICCIONARIO = 32 * 1024
+EXTENSION = ".seg"
+
+
+def _serializar(registro):
+    return json.dumps(registro, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Segmento:
+    """Cotizaciones de un año comprimidas una por una, con el índice id -> posición mapeado en memoria.
+
+    Leer una cotización busca su id en el índice con bisect (sobre el mmap,
+    sin copiarlo a memoria) y descomprime solo ese registro. Los resúmenes para los
+    listados se descomprimen recién cuando se piden.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.anio = int(os.path.basename(ruta)[:-len(EXTENSION)])
+        with open(ruta, "rb") as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapa[:len(MAGIA)] != MAGIA or self._mapa[-len(MAGIA):] != MAGIA:
+            self._mapa.close()
+            raise ValueError(f"{ruta} no es un segmento del archivo")
+        indice, self._cantidad, inicio_resumenes, largo_resumenes, _ = _PIE.unpack_from(
+            self._mapa, len(self._mapa) - _PIE.size)
+        # Vistas sobre el mmap: bisect busca directo en el archivo mapeado sin copiar el índice
+        fin_ids = indice + 8 * self._cantidad
+        if sys.byteorder == "little":
+            vista = memoryview(self._mapa)
+            self._ids = vista[indice:fin_ids].cast("Q")
+            self._posiciones = vista[fin_ids:fin_ids + 8 * (self._cantidad + 1)].cast("Q")
+        else:
+            self._ids = array("Q", self._mapa[indice:fin_ids])
+            self._posiciones = array("Q", self._mapa[fin_ids:fin_ids + 8 * (self._cantidad + 1)])
+            self._ids.byteswap()
+            self._posiciones.byteswap()
+        self.min_id = self._ids[0] if self._cantidad else None
+        self.max_id = self._ids[-1] if self._cantidad else None
+        (largo_diccionario,) = struct.unpack_from("<I", self._mapa, len(MAGIA))
+        inicio = len(MAGIA) + 4
+        self._diccionario = self._mapa[inicio:inicio + largo_diccionario]
+        self._resumenes_rango = (inicio_resumenes, largo_resumenes)
+        self._resumenes = None
+
+    def __len__(self):
+        return self._cantidad
+
+    def _descomprimir(self, posicion):
+        datos = self._mapa[self._posiciones[posicion]:self._posiciones[posicion + 1]]
+        descompresor = zlib.decompressobj(zdict=self._diccionario)
+        return json.loads(descompresor.decompress(datos) + descompresor.flush())
+
+    def leer(self, id_cotizacion):
+        """Registro (tal como estaba en el log) de la cotización, o None si no está en el segmento."""
+        posicion = bisect.bisect_left(self._ids, id_cotizacion)
+        if posicion < self._cantidad and self._ids[posicion] == id_cotizacion:
+            return self._descomprimir(posicion)
+        return None
+
+    def recorrer(self):
+        """Genera los registros en orden de id."""
+        for posicion in range(self._cantidad):
+            yield self._descomprimir(posicion)
+
+    def resumenes(self):
+        """Lista de resúmenes {"id", "fecha", "nombre", "ruc"} en orden de id (se cargan una vez)."""
+        if self._resumenes is None:
+            inicio, largo = self._resumenes_rango
+            filas = json.loads(zlib.decompress(self._mapa[inicio:inicio + largo]))
+            self._resumenes = [dict(zip(("id", "fecha", "nombre", "ruc"), fila)) for fila in filas]
+        return self._resumenes
+
+
+def escribir_segmento(ruta, registros, resumenes):
+    """Escribe un segmento nuevo de forma atómica (archivo temporal + rename).
+
+    ``registros`` son los registros del log y ``resumenes`` un diccionario
+    id -> resumen; ambos deben tener los mismos ids.
+    """
+    from almacen import _fsync_directorio
+
+    registros = sorted(registros, key=lambda registro: registro["id"])
+    datos = [_serializar(registro) for registro in registros]
+    # Los registros de un año se parecen mucho entre sí: con un diccionario
+    # sacado de ellos mismos cada uno se comprime bien aunque vaya por separado
+    diccionario = b"".join(datos)[-TAMANO_DICCIONARIO:]
+
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(MAGIA)
+        archivo.write(struct.pack("<I", len(diccionario)))
+        archivo.write(diccionario)
+        offset = len(MAGIA) + 4 + len(diccionario)
+        posiciones = [offset]
+        for dato in datos:
+            compresor = zlib.compressobj(9, zdict=diccionario)
+            comprimido = compresor.compress(dato) + compresor.flush()
+            archivo.write(comprimido)
+            offset += len(comprimido)
+            posiciones.append(offset)
+        relleno = -offset % 8
+        archivo.write(b"\0" * relleno)
+        inicio_indice = offset + relleno
+        cantidad = len(registros)
+        archivo.write(struct.pack(f"<{cantidad}Q", *(registro["id"] for registro in registros)))
+        archivo.write(struct.pack(f"<{cantidad + 1}Q", *posiciones))
+        filas = [[r["id"], r["fecha"], r["nombre"], r["ruc"]] for r in (resumenes[reg["id"]] for reg in registros)]
+        bloque = zlib.compress(_serializar(filas), 9)
+        archivo.write(bloque)
+        archivo.write(_PIE.pack(inicio_indice, cantidad, inicio_indice + 8 * (2 * cantidad + 1), len(bloque), MAGIA))
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+    _fsync_directorio(ruta)
+
+
+class ArchivoCotizaciones:
+    """Cotizaciones de años anteriores en segmentos comprimidos de solo-lectura (uno por año).
+
+    En cada operación se revisa el mtime del directorio: los segmentos
+    nuevos o reemplazados por otro proceso se vuelven a abrir, y los que se
+    siguen usando no se leen de nuevo. Abrir un segmento solo lee
+    su pie; nada se descomprime hasta que se pide.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._lock = threading.RLock()
+        self._segmentos = {}  # año -> Segmento
+        self._estado = {}     # año -> (inodo, mtime) del archivo abierto
+        self._directorio = None  # (inodo, mtime) del directorio en la última revisión
+
+    def _refrescar(self):
+        with self._lock:
+            # Agregar o reemplazar un segmento (rename) cambia el mtime del directorio
+            try:
+                estado = os.stat(self.directorio)
+                directorio = (estado.st_ino, estado.st_mtime_ns)
+            except FileNotFoundError:
+                directorio = None
+            if directorio == self._directorio:
+                return
+            self._directorio = directorio
+
+            vistos = {}
+            try:
+                entradas = list(os.scandir(self.directorio))
+            except FileNotFoundError:
+                entradas = []
+            for entrada in entradas:
+                nombre = entrada.name
+                if not nombre.endswith(EXTENSION) or not nombre[:-len(EXTENSION)].isdigit():
+                    continue
+                estado = entrada.stat()
+                vistos[int(nombre[:-len(EXTENSION)])] = (entrada.path, (estado.st_ino, estado.st_mtime_ns))
+
+            # Los segmentos reemplazados no se cierran a mano: un recorrido en
+            # curso los sigue usando y el mmap se libera cuando nadie los referencia
+            for anio in [a for a in self._segmentos if a not in vistos]:
+                del self._segmentos[anio], self._estado[anio]
+            for anio, (ruta, estado) in vistos.items():
+                if self._estado.get(anio) != estado:
+                    self._segmentos[anio] = Segmento(ruta)
+                    self._estado[anio] = estado
+
+    def identidad(self):
+        """Cambia cada vez que se agrega o reemplaza un segmento."""
+        with self._lock:
+            self._refrescar()
+            return tuple(sorted(self._estado.items()))
+
+    def anios(self):
+        with self._lock:
+            self._refrescar()
+            return sorted(self._segmentos)
+
+    def segmento(self, anio):
+        with self._lock:
+            self._refrescar()
+            return self._segmentos.get(anio)
+
+    def obtener(self, id_cotizacion):
+        """Registro archivado con ese id, o None. Solo se descomprime ese registro."""
+        with self._lock:
+            self._refrescar()
+            for anio in sorted(self._segmentos, reverse=True):
+                segmento = self._segmentos[anio]
+                if segmento.min_id is not None and segmento.min_id <= id_cotizacion <= segmento.max_id:
+                    registro = segmento.leer(id_cotizacion)
+                    if registro is not None:
+                        return registro
+            return None
+
+    def recorrer(self):
+        """Genera todos los registros archivados, del año más antiguo al más reciente."""
+        for anio in self.anios():
+            segmento = self.segmento(anio)
+            if segmento is not None:
+                yield from segmento.recorrer()
+
+    def max_id(self):
+        with self._lock:
+            self._refrescar()
+            ids = [s.max_id for s in self._segmentos.values() if s.max_id is not None]
+            return max(ids) if ids else None
+
+    def __len__(self):
+        with self._lock:
+            self._refrescar()
+            return sum(len(segmento) for segmento in self._segmentos.values())
+
+    def escribir(self, anio, registros, resumenes):
+        """Agrega registros al segmento del año (se reescribe junto con lo que ya tenía).
+
+        Si un id ya estaba archivado, prevalece la versión nueva.
+        """
+        with self._lock:
+            os.makedirs(self.directorio, exist_ok=True)
+            self._refrescar()
+            actual = self._segmentos.get(anio)
+            if actual is not None:
+                nuevos = {registro["id"] for registro in registros}
+                anteriores = {r["id"]: r for r in actual.resumenes()}
+                registros = [r for r in actual.recorrer() if r["id"] not in nuevos] + list(registros)
+                resumenes = {**anteriores, **resumenes}
+            escribir_segmento(os.path.join(self.directorio, f"{anio}{EXTENSION}"), registros, resumenes)
+            self._refrescar()
@@ -0,0 +1,99 @@
+"""Arranque del almacén y lectura por id con el historial en el log vs. archivado en segmentos por año.
+
+Ejecutar desde la raíz del repositorio:
+
+    python benchmarks/bench_archivo.py [--cotizaciones 20000 100000] [--anios 5] [--productos 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import generar_cotizaciones  # noqa: E402
+from almacen import AlmacenCotizaciones  # noqa: E402
+
+
+def _historial(cantidad, productos, anios):
+    """Cotizaciones repartidas en partes iguales entre los últimos ``anios`` años (incluido el actual)."""
+    primero = datetime.now().year - anios + 1
+    for i, cotizacion in enumerate(generar_cotizaciones(cantidad, productos)):
+        dia, mes, _ = cotizacion["fecha"].split("/")
+        cotizacion["fecha"] = f"{dia}/{mes}/{primero + i * anios // cantidad}"
+        yield cotizacion
+
+
+def _arranque_ms(ruta):
+    """Tiempo de abrir el almacén en un proceso nuevo hasta tener la primera página del listado."""
+    inicio = time.perf_counter()
+    AlmacenCotizaciones(ruta).buscar(pagina=1)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def _lectura_us(almacen, ids):
+    """Lectura por id de cotizaciones antiguas con el almacén ya abierto."""
+    almacen.obtener(ids[0])
+    inicio = time.perf_counter()
+    for id_cotizacion in ids:
+        almacen.obtener(id_cotizacion)
+    return (time.perf_counter() - inicio) / len(ids) * 1e6
+
+
+def medir(cantidad, productos, anios, directorio):
+    ruta = os.path.join(directorio, f"cotizaciones_{cantidad}.jsonl")
+    almacen = AlmacenCotizaciones(ruta)
+    almacen.reescribir(_historial(cantidad, productos, anios))
+    bytes_log = os.path.getsize(ruta)
+    antiguas = random.Random(3).sample(range(1500, 1500 + cantidad * (anios - 1) // anios), 1000)
+
+    arranque_antes = _arranque_ms(ruta)
+    lectura_antes = _lectura_us(AlmacenCotizaciones(ruta), antiguas)
+
+    inicio = time.perf_counter()
+    archivadas = almacen.archivar()
+    segundos_archivar = time.perf_counter() - inicio
+    bytes_segmentos = sum(os.path.getsize(almacen.archivo.segmento(anio).ruta) for anio in archivadas)
+
+    arranque_despues = _arranque_ms(ruta)
+    lectura_despues = _lectura_us(AlmacenCotizaciones(ruta), antiguas)
+    return {
+        "cotizaciones": cantidad,
+        "archivadas": sum(archivadas.values()),
+        "bytes_log_antes": bytes_log,
+        "bytes_log_despues": os.path.getsize(ruta),
+        "bytes_segmentos": bytes_segmentos,
+        "compresion": 1 - bytes_segmentos / (bytes_log - os.path.getsize(ruta)),
+        "segundos_archivar": segundos_archivar,
+        "arranque_antes_ms": arranque_antes,
+        "arranque_despues_ms": arranque_despues,
+        "lectura_antes_us": lectura_antes,
+        "lectura_despues_us": lectura_despues,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cotizaciones", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--anios", type=int, default=5)
+    parser.add_argument("--productos", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'cotizaciones':>12} {'archivadas':>10} {'log MiB':>15} {'segmentos MiB':>14} {'compresión':>10} "
+          f"{'arranque ms':>17} {'lectura antigua µs':>19}")
+    with tempfile.TemporaryDirectory(prefix="bench_archivo_") as directorio:
+        for cantidad in args.cotizaciones:
+            r = medir(cantidad, args.productos, args.anios, directorio)
+            print(f"{r['cotizaciones']:>12} {r['archivadas']:>10} "
+                  f"{r['bytes_log_antes'] / 1048576:>6.1f} -> {r['bytes_log_despues'] / 1048576:>5.1f} "
+                  f"{r['bytes_segmentos'] / 1048576:>14.1f} {r['compresion']:>10.1%} "
+                  f"{r['arranque_antes_ms']:>7.0f} -> {r['arranque_despues_ms']:>5.0f} "
+                  f"{r['lectura_antes_us']:>8.1f} -> {r['lectura_despues_us']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Costo de guardar en el catálogo y de ver la escritura desde otra instancia (otro proceso).
+
+Ejecutar desde la raíz del repositorio:
+
+    python benchmarks/bench_catalogo.py [--productos 30000] [--repeticiones 50]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from catalogo import CatalogoProductos  # noqa: E402
+
+
+def _mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--productos", type=int, default=30000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory(prefix="bench_catalogo_") as directorio:
+        ruta = os.path.join(directorio, "catalogo.jsonl")
+        catalogo = CatalogoProductos(ruta)
+        catalogo.registrar([{"descripcion": f"Producto {i} de acero inoxidable", "precio": rng.randint(10, 5000)}
+                            for i in range(args.productos)])
+        catalogo.compactar()
+
+        inicio = time.perf_counter()
+        otro = CatalogoProductos(ruta)
+        len(otro)
+        carga_ms = (time.perf_counter() - inicio) * 1000
+
+        def cotizacion():
+            return [{"descripcion": f"Producto {rng.randrange(args.productos)} de acero inoxidable",
+                     "precio": rng.randint(10, 5000)} for _ in range(5)]
+
+        registrar_ms = _mediana_ms(lambda: catalogo.registrar(cotizacion()), args.repeticiones)
+
+        def registrar_y_leer():
+            otro.obtener(catalogo.registrar(cotizacion())[0]["codigo"])
+
+        ver_ms = _mediana_ms(registrar_y_leer, args.repeticiones) - registrar_ms
+
+        print(f"{args.productos} productos, {os.path.getsize(ruta) / 1048576:.2f} MiB de log")
+        print(f"carga inicial:                     {carga_ms:>8.1f} ms")
+        print(f"registrar una cotización (5 líneas): {registrar_ms:>6.2f} ms (mediana)")
+        print(f"otra instancia ve la escritura:     {ver_ms:>6.2f} ms (mediana, lectura de la cola)")
+
+
+if __name__ == "__main__":
+    main()
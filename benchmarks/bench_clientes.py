@@ -0,0 +1,81 @@
+"""Tamaño del almacén con los datos del cliente copiados en cada cotización vs. el directorio de clientes.
+
+Ejecutar desde la raíz del repositorio:
+
+    python benchmarks/bench_clientes.py [--cotizaciones 10000 100000] [--productos 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import generar_cotizaciones  # noqa: E402
+from almacen import AlmacenCotizaciones  # noqa: E402
+
+
+def _historial(cantidad, productos):
+    """Cotizaciones sintéticas donde algunos clientes cambian de teléfono o dirección con el tiempo."""
+    rng = random.Random(11)
+    for cotizacion in generar_cotizaciones(cantidad, productos):
+        cliente = cotizacion["datos del cliente"]
+        if rng.random() < 0.02:
+            cliente["Telefono"] = f"9{rng.randint(10000000, 99999999)}"
+        yield cotizacion
+
+
+def medir(cantidad, productos, directorio):
+    ruta_copiado = os.path.join(directorio, f"copiado_{cantidad}.jsonl")
+    with open(ruta_copiado, "w", encoding="utf-8") as archivo:
+        for cotizacion in _historial(cantidad, productos):
+            archivo.write(json.dumps(cotizacion, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    almacen = AlmacenCotizaciones(os.path.join(directorio, f"referenciado_{cantidad}.jsonl"))
+    inicio = time.perf_counter()
+    almacen.reescribir(_historial(cantidad, productos))
+    segundos_escritura = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ruc = almacen.buscar()[1][0]["ruc"]
+    for _ in range(10000):
+        almacen.clientes.buscar(ruc)
+    busqueda_us = (time.perf_counter() - inicio) / 10000 * 1e6
+
+    copiado = os.path.getsize(ruta_copiado)
+    log = os.path.getsize(almacen.ruta)
+    clientes = os.path.getsize(almacen.clientes.ruta)
+    return {
+        "cotizaciones": cantidad,
+        "clientes": len(almacen.clientes),
+        "bytes_copiado": copiado,
+        "bytes_log": log,
+        "bytes_clientes": clientes,
+        "reduccion": 1 - (log + clientes) / copiado,
+        "segundos_escritura": segundos_escritura,
+        "buscar_ruc_us": busqueda_us,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cotizaciones", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--productos", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'cotizaciones':>12} {'clientes':>9} {'copiado MiB':>12} {'log + clientes MiB':>19} "
+          f"{'reducción':>10} {'buscar RUC':>11}")
+    with tempfile.TemporaryDirectory(prefix="bench_clientes_") as directorio:
+        for cantidad in args.cotizaciones:
+            r = medir(cantidad, args.productos, directorio)
+            print(f"{r['cotizaciones']:>12} {r['clientes']:>9} {r['bytes_copiado'] / 1048576:>12.2f} "
+                  f"{(r['bytes_log'] + r['bytes_clientes']) / 1048576:>19.2f} {r['reduccion']:>10.1%} "
+                  f"{r['buscar_ruc_us']:>9.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Tiempo y memoria pico (RSS) al generar PDFs de cotizaciones muy grandes.
+
+Cada medición corre en un proceso aparte para que la memoria pico de una no
+afecte a la siguiente. Ejecutar desde la raíz del repositorio:
+
+    python benchmarks/bench_pdf_grande.py [--lineas 1000 10000 50000]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+from datos_sinteticos import generar_productos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(lineas, modo):
+    """Genera un PDF de ``lineas`` productos y devuelve tiempo, tamaño y RSS pico del proceso."""
+    sys.path.insert(0, RAIZ)
+    os.chdir(RAIZ)
+    from pdf_generator import obtener_renderer
+
+    renderizador = obtener_renderer()
+    cotizacion = {
+        "id": 1500,
+        "fecha": "01/01/2025",
+        "datos del cliente": {
+            "Nombre del cliente": "Industrias Metálicas del Perú S.A.C.",
+            "RUC": "20100070970",
+            "Telefono": "952439843",
+            "E-mail": "compras@ejemplo.pe",
+            "Dirección": "Av. Argentina 1234, Lima",
+        },
+        "productos": generar_productos(lineas),
+    }
+
+    inicio = time.perf_counter()
+    if modo == "archivo":
+        ruta = os.path.join("pdfs", f"bench_{lineas}.pdf")
+        os.makedirs("pdfs", exist_ok=True)
+        renderizador.render(cotizacion, ruta)
+        tamano = os.path.getsize(ruta)
+        os.remove(ruta)
+    else:
+        tamano = len(renderizador.render(cotizacion))
+    segundos = time.perf_counter() - inicio
+
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mib = rss / 1024 if sys.platform != "darwin" else rss / (1024 * 1024)
+    return {"lineas": lineas, "modo": modo, "segundos": round(segundos, 3),
+            "bytes": tamano, "rss_pico_mib": round(rss_mib, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lineas", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--modos", nargs="+", default=["bytes", "archivo"], choices=["bytes", "archivo"])
+    parser.add_argument("--_hijo", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._hijo:
+        print(json.dumps(medir(int(args._hijo[0]), args._hijo[1])))
+        return
+
+    print(f"{'líneas':>8} {'modo':>8} {'segundos':>9} {'MiB PDF':>8} {'RSS pico MiB':>13}")
+    for lineas in args.lineas:
+        for modo in args.modos:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--_hijo", str(lineas), modo],
+                check=True, capture_output=True, text=True
+            ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            print(f"{r['lineas']:>8} {r['modo']:>8} {r['segundos']:>9.2f} "
+                  f"{r['bytes'] / 1048576:>8.2f} {r['rss_pico_mib']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
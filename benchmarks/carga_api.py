@@ -0,0 +1,189 @@
+"""Prueba de carga local de la API HTTP (api.py): pedidos por segundo y latencia p50/p99 por endpoint.
+
+Sin ``--url`` levanta la API en un proceso aparte sobre un almacén temporal
+con cotizaciones sintéticas (no toca los datos reales). Cada cliente usa una
+sola conexión keep-alive y repite una mezcla de pedidos: listados con
+filtros, lectura de cotizaciones, PDFs (la mitad con If-None-Match, que
+debería responder 304) y cotizaciones nuevas. Ejecutar desde la raíz del
+repositorio:
+
+    python benchmarks/carga_api.py [--clientes 16] [--segundos 10] [--cotizaciones 2000] [--procesos 4]
+    python benchmarks/carga_api.py --url http://127.0.0.1:8765   # contra una API ya levantada
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import http.client
+import multiprocessing
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import generar_cliente, generar_cotizaciones, generar_producto  # noqa: E402
+
+# Proporción de cada tipo de pedido en la mezcla
+MEZCLA = [("listar", 30), ("obtener", 40), ("pdf", 20), ("crear", 10)]
+
+
+def _servir(directorio, procesos, puertos, parar):
+    """Proceso de la API: almacén, catálogo y caché de PDFs en ``directorio``; termina con ``parar``."""
+    os.chdir(RAIZ)  # el logo se busca relativo a la raíz
+    from api import crear_servidor
+    from almacen import AlmacenCotizaciones
+    from catalogo import CatalogoProductos
+    from pdf_cache import CachePDF
+    from trabajos_pdf import ColaTrabajosPDF
+
+    almacen = AlmacenCotizaciones(os.path.join(directorio, "cotizaciones.jsonl"))
+    cola = ColaTrabajosPDF(procesos, cache=CachePDF(os.path.join(directorio, "cache")))
+    servidor = crear_servidor("127.0.0.1", 0, almacen, CatalogoProductos(os.path.join(directorio, "catalogo.jsonl")), cola)
+    # Un PDF antes de empezar, para no medir el arranque del pool
+    cola.generar(almacen.obtener(almacen.ids()[0]))
+    puertos.put(servidor.server_address[1])
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    parar.wait()
+    servidor.shutdown()
+    servidor.server_close()
+    cola.cerrar()  # sin esto los procesos del pool quedan huérfanos
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+
+class Cliente(threading.Thread):
+    """Un cliente con una conexión keep-alive que hace pedidos hasta ``fin``."""
+
+    def __init__(self, host, puerto, ids, fin, semilla):
+        super().__init__(daemon=True)
+        self.host, self.puerto, self.ids, self.fin = host, puerto, ids, fin
+        self.rng = random.Random(semilla)
+        self.resultados = []  # (endpoint, estado, ms)
+        self.conexiones = 0
+        self.etags = {}       # id -> ETag del PDF
+        self._conexion = None
+
+    def _pedir(self, metodo, ruta, cuerpo=None, cabeceras=None):
+        for intento in range(2):
+            if self._conexion is None:
+                self._conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=120)
+                self.conexiones += 1
+            try:
+                self._conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras or {})
+                respuesta = self._conexion.getresponse()
+                datos = respuesta.read()
+                if respuesta.will_close:
+                    self._conexion.close()
+                    self._conexion = None
+                return respuesta, datos
+            except (http.client.HTTPException, OSError):
+                # El servidor cerró la conexión inactiva: se reintenta una vez con una nueva
+                self._conexion.close()
+                self._conexion = None
+                if intento:
+                    raise
+
+    def _pedido(self, tipo):
+        if tipo == "listar":
+            filtros = self.rng.choice(["", "&nombre=a", "&desde=01/01/2022&hasta=31/12/2022"])
+            return self._pedir("GET", f"/cotizaciones?pagina={self.rng.randint(1, 5)}{filtros}")
+        id_cotizacion = self.rng.choice(self.ids)
+        if tipo == "obtener":
+            return self._pedir("GET", f"/cotizaciones/{id_cotizacion}")
+        if tipo == "pdf":
+            cabeceras = {}
+            if id_cotizacion in self.etags and self.rng.random() < 0.5:
+                cabeceras["If-None-Match"] = self.etags[id_cotizacion]
+            respuesta, datos = self._pedir("GET", f"/cotizaciones/{id_cotizacion}/pdf", cabeceras=cabeceras)
+            if respuesta.getheader("ETag"):
+                self.etags[id_cotizacion] = respuesta.getheader("ETag")
+            return respuesta, datos
+        cuerpo = json.dumps({
+            "datos del cliente": generar_cliente(self.rng),
+            "productos": [generar_producto(self.rng) for _ in range(self.rng.randint(1, 8))],
+        }).encode("utf-8")
+        return self._pedir("POST", "/cotizaciones", cuerpo, {"Content-Type": "application/json"})
+
+    def run(self):
+        tipos = [tipo for tipo, peso in MEZCLA for _ in range(peso)]
+        while time.perf_counter() < self.fin:
+            tipo = self.rng.choice(tipos)
+            inicio = time.perf_counter()
+            try:
+                respuesta, _ = self._pedido(tipo)
+                estado = respuesta.status
+            except (http.client.HTTPException, OSError):
+                estado = "error"
+            self.resultados.append((tipo, estado, (time.perf_counter() - inicio) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="API ya levantada (por defecto se levanta una sobre datos temporales)")
+    parser.add_argument("--clientes", type=int, default=16, help="Conexiones keep-alive concurrentes")
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--cotizaciones", type=int, default=2000, help="Cotizaciones sintéticas del almacén temporal")
+    parser.add_argument("--procesos", type=int, default=min(4, os.cpu_count() or 1), help="Procesos del pool de PDFs")
+    args = parser.parse_args()
+
+    proceso = None
+    with tempfile.TemporaryDirectory(prefix="carga_api_") as directorio:
+        if args.url:
+            url = urlsplit(args.url)
+            host, puerto = url.hostname, url.port or 80
+        else:
+            from almacen import AlmacenCotizaciones
+            AlmacenCotizaciones(os.path.join(directorio, "cotizaciones.jsonl")).reescribir(
+                generar_cotizaciones(args.cotizaciones, 5))
+            contexto = multiprocessing.get_context("spawn")
+            puertos, parar = contexto.Queue(), contexto.Event()
+            proceso = contexto.Process(target=_servir, args=(directorio, args.procesos, puertos, parar))
+            proceso.start()
+            host, puerto = "127.0.0.1", puertos.get(timeout=120)
+
+        try:
+            conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+            conexion.request("GET", "/cotizaciones?por_pagina=200")
+            ids = [c["id"] for c in json.loads(conexion.getresponse().read())["cotizaciones"]]
+            conexion.close()
+
+            fin = time.perf_counter() + args.segundos
+            clientes = [Cliente(host, puerto, ids, fin, semilla) for semilla in range(args.clientes)]
+            inicio = time.perf_counter()
+            for cliente in clientes:
+                cliente.start()
+            for cliente in clientes:
+                cliente.join()
+            segundos = time.perf_counter() - inicio
+        finally:
+            if proceso is not None:
+                parar.set()
+                proceso.join(30)
+                if proceso.is_alive():
+                    proceso.terminate()
+
+    resultados = [r for cliente in clientes for r in cliente.resultados]
+    print(f"{args.clientes} clientes keep-alive, {segundos:.1f} s, "
+          f"{sum(c.conexiones for c in clientes)} conexiones abiertas para {len(resultados)} pedidos")
+    print(f"{'endpoint':<10} {'pedidos':>8} {'ped/s':>8} {'p50 ms':>8} {'p99 ms':>8}  códigos")
+    for tipo in [t for t, _ in MEZCLA] + ["total"]:
+        propios = [r for r in resultados if tipo in ("total", r[0])]
+        if not propios:
+            continue
+        latencias = sorted(ms for _, _, ms in propios)
+        codigos = {}
+        for _, estado, _ in propios:
+            codigos[estado] = codigos.get(estado, 0) + 1
+        print(f"{tipo:<10} {len(propios):>8} {len(propios) / segundos:>8.1f} "
+              f"{_percentil(latencias, 0.5):>8.1f} {_percentil(latencias, 0.99):>8.1f}  "
+              + ", ".join(f"{estado}: {cantidad}" for estado, cantidad in sorted(codigos.items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Generador de cotizaciones sintéticas con texto realista en español (con tildes y eñes)."""
+import random
+from datetime import date, timedelta
+
+_EMPRESAS = [
+    "Industrias Metálicas", "Cocinas Industriales", "Panadería y Pastelería", "Clínica San José",
+    "Restaurante El Puerto", "Lácteos Andinos", "Hotel Miraflores", "Pesquera del Pacífico",
+    "Farmacéutica Peruana", "Corporación Agroindustrial", "Minera Señor de Huanca", "Frigorífico Logístico",
+]
+_SUFIJOS = ["S.A.C.", "E.I.R.L.", "S.A.", "S.R.L."]
+_NOMBRES = ["José", "María", "Ángel", "Lucía", "Núñez", "Peña", "Ibáñez", "Muñoz", "Ramírez", "Gutiérrez"]
+_CALLES = ["Av. Argentina", "Jr. Huánuco", "Av. Petit Thouars", "Calle Constantino Carvallo", "Av. Túpac Amaru"]
+_DISTRITOS = ["La Victoria", "Cercado de Lima", "San Martín de Porres", "Ate", "Chorrillos", "Breña"]
+
+_PRODUCTOS = [
+    "Mesa de trabajo de acero inoxidable AISI 304", "Lavadero industrial de dos pozas",
+    "Campana extractora con filtros de malla", "Estantería de cuatro niveles",
+    "Cocina industrial de tres hornillas", "Tablero con respaldo sanitario",
+    "Carro de transporte con ruedas giratorias", "Baranda de acero inoxidable pulido espejo",
+    "Tanque de almacenamiento con tapa hermética", "Plancha de acero inoxidable calibre 1/16",
+]
+_DETALLES = [
+    "acabado satinado", "con repisa inferior", "soldadura TIG", "espesor 1.2 mm", "patas regulables",
+    "diseño a medida según plano", "incluye instalación", "esquinas redondeadas", "garantía de un año",
+]
+
+
+def _ruc(rng):
+    """RUC de 11 dígitos con dígito verificador válido."""
+    base = [int(d) for d in rng.choice(["10", "20"])] + [rng.randint(0, 9) for _ in range(8)]
+    pesos = [5, 4, 3, 2, 7, 6, 5, 4, 3, 2]
+    resto = 11 - sum(d * p for d, p in zip(base, pesos)) % 11
+    verificador = {10: 0, 11: 1}.get(resto, resto)
+    return "".join(map(str, base)) + str(verificador)
+
+
+def generar_cliente(rng):
+    nombre = f"{rng.choice(_EMPRESAS)} {rng.choice(_NOMBRES)} {rng.choice(_SUFIJOS)}"
+    return {
+        "Nombre del cliente": nombre,
+        "RUC": _ruc(rng),
+        "Telefono": f"9{rng.randint(10000000, 99999999)}",
+        "E-mail": f"compras{rng.randint(1, 999)}@{rng.choice(['gmail.com', 'empresa.pe', 'hotmail.com'])}",
+        "Dirección": f"{rng.choice(_CALLES)} {rng.randint(100, 3000)}, {rng.choice(_DISTRITOS)}",
+    }
+
+
+def generar_producto(rng):
+    detalles = ", ".join(rng.sample(_DETALLES, rng.randint(1, 3)))
+    return {
+        "descripcion": f"{rng.choice(_PRODUCTOS)} — {detalles}",
+        "precio": round(rng.uniform(35, 9500), 2),
+        "cantidad": rng.randint(1, 12),
+    }
+
+
+def generar_cotizaciones(cantidad, productos_por_cotizacion=5, semilla=1500, clientes=None, id_inicial=1500):
+    """Genera ``cantidad`` cotizaciones con ``productos_por_cotizacion`` líneas cada una.
+
+    Los clientes se repiten (por defecto hay uno por cada diez cotizaciones)
+    y las fechas avanzan desde el 2022, como en un historial real.
+    """
+    rng = random.Random(semilla)
+    clientes = clientes or max(1, cantidad // 10)
+    cartera = [generar_cliente(rng) for _ in range(clientes)]
+    fecha = date(2022, 1, 3)
+    for i in range(cantidad):
+        if rng.random() < 0.3:
+            fecha += timedelta(days=1)
+        yield {
+            "id": id_inicial + i,
+            "fecha": fecha.strftime("%d/%m/%Y"),
+            "datos del cliente": dict(rng.choice(cartera)),
+            "productos": [generar_producto(rng) for _ in range(productos_por_cotizacion)],
+        }
+
+
+def generar_productos(cantidad, semilla=1500):
+    """Genera ``cantidad`` líneas de producto de a una, sin armar la lista completa."""
+    rng = random.Random(semilla)
+    for _ in range(cantidad):
+        yield generar_producto(rng)
@@ -0,0 +1,88 @@
+"""Comprueba que el PDF de una cotización típica no pase del presupuesto de bytes sin perder calidad.
+
+Genera la misma cotización con la salida compacta y con el logo a resolución
+completa, y compara las páginas rasterizadas (PyMuPDF): la diferencia tiene que
+quedar por debajo de lo que se nota a simple vista. Termina con código 1 si
+algo no se cumple, para poder usarlo antes de publicar un cambio de la plantilla.
+Ejecutar desde la raíz del repositorio:
+
+    python benchmarks/presupuesto_pdf.py [--productos 5] [--presupuesto-kib 48] [--dpi 150]
+"""
+import os
+import sys
+import argparse
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import generar_cotizaciones  # noqa: E402
+
+PRESUPUESTO_KIB = 48
+# Diferencia máxima aceptada entre las páginas rasterizadas, en niveles de 0 a 255
+DIFERENCIA_MEDIA_MAXIMA = 0.5
+DIFERENCIA_P999_MAXIMA = 48
+
+
+def _paginas(pdf, dpi):
+    """Páginas del PDF como arreglos (alto, ancho, 3) de uint8."""
+    import pymupdf
+    import numpy as np
+
+    with pymupdf.open(stream=pdf, filetype="pdf") as documento:
+        paginas = []
+        for pagina in documento:
+            imagen = pagina.get_pixmap(dpi=dpi, alpha=False)
+            paginas.append(np.frombuffer(imagen.samples, dtype=np.uint8).reshape(imagen.height, imagen.width, 3))
+        return paginas
+
+
+def comparar(pdf, referencia, dpi):
+    """Diferencia media y percentil 99.9 por píxel entre dos PDFs con las mismas páginas."""
+    import numpy as np
+
+    paginas, paginas_referencia = _paginas(pdf, dpi), _paginas(referencia, dpi)
+    if len(paginas) != len(paginas_referencia):
+        raise ValueError(f"{len(paginas)} páginas en lugar de {len(paginas_referencia)}")
+    diferencias = np.concatenate([
+        np.abs(a.astype(np.int16) - b.astype(np.int16)).max(axis=2).ravel()
+        for a, b in zip(paginas, paginas_referencia)
+    ])
+    return float(diferencias.mean()), float(np.percentile(diferencias, 99.9))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--productos", type=int, default=5, help="Líneas de la cotización típica")
+    parser.add_argument("--presupuesto-kib", type=float, default=PRESUPUESTO_KIB)
+    parser.add_argument("--dpi", type=int, default=150, help="Resolución a la que se comparan las páginas")
+    args = parser.parse_args()
+
+    os.chdir(RAIZ)  # el logo se busca relativo a la raíz
+    from pdf_generator import COMPACTO, QuotePdfRenderer
+
+    if not COMPACTO:
+        print("ACESMA_PDF_COMPACTO=0: se mide la salida sin compactar")
+    cotizacion = next(generar_cotizaciones(1, args.productos))
+    pdf = QuotePdfRenderer().render(cotizacion)
+    referencia = QuotePdfRenderer(compacto=False).render(cotizacion)
+    media, p999 = comparar(pdf, referencia, args.dpi)
+
+    presupuesto = args.presupuesto_kib * 1024
+    fallas = []
+    if len(pdf) > presupuesto:
+        fallas.append(f"el PDF pesa {len(pdf) / 1024:.1f} KiB (presupuesto {args.presupuesto_kib:g} KiB)")
+    if media > DIFERENCIA_MEDIA_MAXIMA or p999 > DIFERENCIA_P999_MAXIMA:
+        fallas.append(f"diferencia visible con el logo completo (media {media:.2f}, p99.9 {p999:.0f})")
+
+    print(f"generado:   {len(pdf) / 1024:>8.1f} KiB")
+    print(f"referencia: {len(referencia) / 1024:>8.1f} KiB (logo a resolución completa)")
+    print(f"diferencia a {args.dpi} dpi: media {media:.3f}, p99.9 {p999:.0f} (de 255)")
+    for falla in fallas:
+        print(f"FALLA: {falla}")
+    if fallas:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
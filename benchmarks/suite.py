@@ -0,0 +1,221 @@
+"""Suite de benchmarks del almacén, la generación de PDFs y la vista "Ver Cotizaciones".
+
+Escribe los resultados en un JSON para poder comparar corridas. Ejecutar
+desde la raíz del repositorio:
+
+    python benchmarks/suite.py                      # tamaños rápidos
+    python benchmarks/suite.py --completo           # hasta 100k cotizaciones y 5000 líneas
+    python benchmarks/suite.py --comparar benchmarks/resultados/anterior.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import date, datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import generar_cotizaciones, generar_productos, generar_cliente  # noqa: E402
+from almacen import AlmacenCotizaciones  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+
+def _cronometrar(funcion, repeticiones):
+    """Ejecuta ``funcion`` varias veces y devuelve la mediana y el p95 en milisegundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 3),
+        "repeticiones": repeticiones,
+    }
+
+
+def _almacen_poblado(directorio, cantidad, productos):
+    ruta = os.path.join(directorio, f"cotizaciones_{cantidad}.jsonl")
+    almacen = AlmacenCotizaciones(ruta)
+    almacen.reescribir(generar_cotizaciones(cantidad, productos))
+    return ruta
+
+
+def bench_almacen(tamanos, productos, directorio):
+    """Carga completa, guardado de una cotización y lectura por id para cada tamaño."""
+    resultados = []
+    rng_cliente = random.Random(7)
+    for cantidad in tamanos:
+        ruta = _almacen_poblado(directorio, cantidad, productos)
+        ids = AlmacenCotizaciones(ruta).ids()
+        repeticiones = 3 if cantidad >= 50000 else 10
+
+        carga_fria = _cronometrar(lambda: AlmacenCotizaciones(ruta).todas(), repeticiones)
+        almacen = AlmacenCotizaciones(ruta)
+        almacen.todas()
+        carga_caliente = _cronometrar(almacen.todas, repeticiones)
+        guardado = _cronometrar(
+            lambda: almacen.agregar(generar_cliente(rng_cliente), list(generar_productos(productos))), 20
+        )
+        lectura = _cronometrar(lambda: almacen.obtener(ids[len(ids) // 2]), 50)
+
+        resultados.append({
+            "cotizaciones": cantidad,
+            "productos_por_cotizacion": productos,
+            "bytes_archivo": os.path.getsize(ruta),
+            "load_cotizaciones_frio": carga_fria,
+            "load_cotizaciones": carga_caliente,
+            "save_cotizacion": guardado,
+            "obtener_por_id": lectura,
+        })
+        print(f"  almacén {cantidad:>7}: carga {carga_fria['mediana_ms']:.1f} ms | "
+              f"guardar {guardado['mediana_ms']:.2f} ms | obtener {lectura['mediana_ms']:.3f} ms")
+    return resultados
+
+
+def bench_ver_cotizaciones(tamanos, productos, directorio):
+    """Camino de datos de "Ver Cotizaciones": primera página, filtros y detalle de una cotización."""
+    resultados = []
+    for cantidad in tamanos:
+        ruta = _almacen_poblado(directorio, cantidad, productos)
+
+        indexado = _cronometrar(lambda: AlmacenCotizaciones(ruta).buscar(), 3)
+        almacen = AlmacenCotizaciones(ruta)
+        _, pagina = almacen.buscar()
+        muestra = pagina[0]
+        dia = datetime.strptime(muestra["fecha"], "%d/%m/%Y").date()
+
+        resultados.append({
+            "cotizaciones": cantidad,
+            "indexar_en_frio": indexado,
+            "pagina_sin_filtros": _cronometrar(lambda: almacen.buscar(pagina=2), 50),
+            "filtro_ruc": _cronometrar(lambda: almacen.buscar(ruc=muestra["ruc"]), 50),
+            "filtro_nombre": _cronometrar(lambda: almacen.buscar(nombre=muestra["nombre"][:4]), 50),
+            "filtro_fechas": _cronometrar(lambda: almacen.buscar(desde=dia, hasta=date(dia.year, 12, 31)), 50),
+            "detalle": _cronometrar(lambda: almacen.obtener(muestra["id"]), 50),
+        })
+        r = resultados[-1]
+        print(f"  ver cotizaciones {cantidad:>7}: página {r['pagina_sin_filtros']['mediana_ms']:.3f} ms | "
+              f"RUC {r['filtro_ruc']['mediana_ms']:.3f} ms | nombre {r['filtro_nombre']['mediana_ms']:.3f} ms | "
+              f"fechas {r['filtro_fechas']['mediana_ms']:.3f} ms")
+    return resultados
+
+
+def bench_pdf(lineas):
+    """Tiempo y tamaño de generar_cotizacion_pdf según la cantidad de líneas."""
+    from pdf_generator import generar_cotizacion_pdf, obtener_renderer
+
+    inicio = time.perf_counter()
+    obtener_renderer()
+    preparacion_ms = (time.perf_counter() - inicio) * 1000
+
+    resultados = []
+    for cantidad in lineas:
+        cotizacion = next(generar_cotizaciones(1, cantidad))
+        tamano = len(generar_cotizacion_pdf(cotizacion))
+        repeticiones = 3 if cantidad >= 1000 else 10
+        tiempo = _cronometrar(lambda: generar_cotizacion_pdf(cotizacion), repeticiones)
+        resultados.append({"lineas": cantidad, "bytes": tamano, **tiempo})
+        print(f"  pdf {cantidad:>5} líneas: {tiempo['mediana_ms']:.1f} ms | {tamano / 1024:.0f} KiB")
+    return {"preparacion_renderer_ms": round(preparacion_ms, 1), "por_lineas": resultados}
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, anterior):
+    """Imprime la razón actual/anterior de cada mediana que exista en ambas corridas."""
+    def medianas(nodo, ruta=""):
+        if isinstance(nodo, dict):
+            if "mediana_ms" in nodo:
+                yield ruta, nodo["mediana_ms"]
+            for clave, valor in nodo.items():
+                clave_ruta = f"{ruta}.{clave}" if ruta else clave
+                if isinstance(valor, list):
+                    for elemento in valor:
+                        etiqueta = elemento.get("cotizaciones", elemento.get("lineas", ""))
+                        yield from medianas(elemento, f"{clave_ruta}[{etiqueta}]")
+                else:
+                    yield from medianas(valor, clave_ruta)
+
+    previas = dict(medianas(anterior["resultados"]))
+    print(f"\nComparación con {anterior.get('commit')} ({anterior.get('fecha')}):")
+    for ruta, valor in medianas(actual["resultados"]):
+        if ruta in previas and previas[ruta]:
+            razon = valor / previas[ruta]
+            marca = "  <-- más lento" if razon > 1.2 else ""
+            print(f"  {ruta:<70} {previas[ruta]:>10.3f} -> {valor:>10.3f} ms  x{razon:.2f}{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de cotizaciones ACESMA INOX")
+    parser.add_argument("--completo", action="store_true", help="Usar los tamaños grandes (más lento)")
+    parser.add_argument("--solo", nargs="+", choices=["almacen", "ver", "pdf"], help="Correr solo estas partes")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto en benchmarks/resultados/)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    if args.completo:
+        tamanos = [100, 1000, 10000, 100000]
+        lineas = [1, 10, 100, 1000, 5000]
+    else:
+        tamanos = [100, 1000, 10000]
+        lineas = [1, 10, 100, 500]
+    partes = set(args.solo or ["almacen", "ver", "pdf"])
+
+    os.chdir(RAIZ)  # el generador de PDFs busca logo.png en el directorio actual
+    directorio = tempfile.mkdtemp(prefix="bench_cotizaciones_")
+    resultados = {}
+    try:
+        if "almacen" in partes:
+            print("Almacén (load_cotizaciones / save_cotizacion):")
+            resultados["almacen"] = bench_almacen(tamanos, 5, directorio)
+        if "ver" in partes:
+            print("Ver Cotizaciones:")
+            resultados["ver_cotizaciones"] = bench_ver_cotizaciones(tamanos, 5, directorio)
+        if "pdf" in partes:
+            print("PDF:")
+            resultados["pdf"] = bench_pdf(lineas)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    corrida = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "completo": args.completo,
+        "resultados": resultados,
+    }
+
+    salida = args.salida
+    if not salida:
+        os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+        salida = os.path.join(DIRECTORIO_RESULTADOS, f"{datetime.now():%Y%m%d_%H%M%S}_{corrida['commit']}.json")
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(corrida, archivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            comparar(corrida, json.load(archivo))
+
+
+if __name__ == "__main__":
+    main()
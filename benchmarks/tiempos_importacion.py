@@ -0,0 +1,69 @@
+"""Tiempo de importación de los módulos de entrada y qué dependencias pesadas cargan.
+
+Cada módulo se importa en un intérprete nuevo con ``python -X importtime``
+(se toma la mediana de varias corridas). Para comparar con otra versión del
+código, apuntar ``--raiz`` a una copia de esa versión (p. ej. un ``git worktree``).
+
+    python benchmarks/tiempos_importacion.py [--raiz .] [--repeticiones 5] [--modulos main pdf_preview]
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS = ["main", "pdf_preview", "cotizaciones", "trabajos_pdf", "pdf_cache", "almacen"]
+PESADAS = ["reportlab", "numpy", "pymupdf", "fitz", "PIL", "streamlit"]
+
+
+def importar(modulo, raiz):
+    """Importa ``modulo`` en un proceso nuevo; devuelve (ms totales, {dependencia pesada: ms}).
+
+    El tiempo de una dependencia es la suma del tiempo propio de todos sus
+    submódulos (sin lo que ellos importan de fuera del paquete).
+    """
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=raiz, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr.strip().splitlines()[-1])
+    total, pesadas = None, {}
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        if not acumulado.strip().isdigit():
+            continue  # encabezado
+        nombre = nombre.strip()
+        if nombre == modulo:
+            total = int(acumulado) / 1000
+        paquete = nombre.split(".")[0]
+        if paquete in PESADAS:
+            pesadas[paquete] = pesadas.get(paquete, 0) + int(propio) / 1000
+    return total, pesadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raiz", default=RAIZ, help="Directorio del código a medir")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    args = parser.parse_args()
+
+    print(f"{'módulo':<14} {'mediana ms':>10}  dependencias pesadas que carga")
+    for modulo in args.modulos:
+        try:
+            corridas = [importar(modulo, args.raiz) for _ in range(args.repeticiones)]
+        except RuntimeError as e:
+            print(f"{modulo:<14} {'-':>10}  no se pudo importar: {e}")
+            continue
+        mediana = statistics.median(total for total, _ in corridas)
+        _, tiempos = corridas[-1]
+        pesadas = ", ".join(f"{p} {tiempos[p]:.0f} ms" for p in PESADAS if p in tiempos) or "ninguna"
+        print(f"{modulo:<14} {mediana:>10.1f}  {pesadas}")
+
+
+if __name__ == "__main__":
+    main()
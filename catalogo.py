@@ -0,0 +1,469 @@
+import os
+import json
+import heapq
+import bisect
+import threading
+from contextlib import contextmanager
+from itertools import chain
+from almacen import _fsync_directorio, normalizar_texto, obtener_almacen
+from precios import a_centimos, formatear
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se bloquea dentro del proceso
+    fcntl = None
+
+# Archivos del catálogo
+CATALOGO_LOG = "catalogo.jsonl"
+CATALOGO_JSON_ANTIGUO = "catalogo.json"
+# El log se compacta (una línea por producto) cuando tiene más de
+# FACTOR_COMPACTACION líneas por producto y al menos LINEAS_MINIMAS_COMPACTACION
+FACTOR_COMPACTACION = 4
+LINEAS_MINIMAS_COMPACTACION = 10000
+# Sugerencias que se devuelven por búsqueda
+LIMITE_SUGERENCIAS = 10
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class CatalogoProductos:
+    """Catálogo de productos (código, descripción y último precio cotizado).
+
+    Se arma con las líneas de las cotizaciones guardadas y el personal puede
+    editarlo. Para autocompletar mantiene en memoria una lista ordenada de
+    descripciones normalizadas (búsqueda por prefijo con bisect) y un índice
+    de trigramas (búsqueda por cualquier parte de la descripción).
+
+    Se guarda en un log JSONL de solo-anexado, como el directorio de
+    clientes: cada línea es el estado completo de un producto
+    (``{"codigo", "descripcion", "precio", "veces"}``) o su baja
+    (``{"codigo", "eliminado": true}``), y la última línea de cada código
+    prevalece. Las escrituras se anexan con fsync bajo un bloqueo de archivo
+    (``<log>.lock``), así que la API y la aplicación pueden registrar a la
+    vez sin pisarse ni repetir códigos; cada proceso lee solo la cola nueva
+    del log. Cuando el log crece mucho se reescribe con una línea por producto.
+    """
+
+    def __init__(self, ruta=CATALOGO_LOG):
+        self.ruta = ruta
+        self.ruta_bloqueo = ruta + ".lock"
+        self._lock = threading.RLock()
+        self._profundidad_bloqueo = 0
+        self._inodo = None
+        self._reiniciar()
+
+    # ------------------------------------------------------------------
+    # Bloqueo
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _bloqueo(self):
+        """Bloqueo exclusivo entre hilos y entre procesos (reentrante dentro del hilo)."""
+        with self._lock:
+            if self._profundidad_bloqueo:
+                self._profundidad_bloqueo += 1
+                try:
+                    yield
+                finally:
+                    self._profundidad_bloqueo -= 1
+                return
+
+            with open(self.ruta_bloqueo, "a+b") as archivo_bloqueo:
+                if fcntl:
+                    fcntl.flock(archivo_bloqueo.fileno(), fcntl.LOCK_EX)
+                self._profundidad_bloqueo = 1
+                try:
+                    yield
+                finally:
+                    self._profundidad_bloqueo = 0
+                    if fcntl:
+                        fcntl.flock(archivo_bloqueo.fileno(), fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Índices
+    # ------------------------------------------------------------------
+    def _reiniciar(self):
+        self._productos = {}       # código -> {"codigo", "descripcion", "precio", "veces"}
+        self._por_descripcion = {}  # descripción normalizada -> código
+        self._normalizadas = {}    # código -> descripción normalizada
+        self._descripciones = []   # [(descripción normalizada, código)], ordenado bajo demanda
+        self._trigramas = {}       # trigrama -> {códigos}
+        self._ordenado = True
+        self._siguiente = 1
+        self._fin = 0              # bytes del log ya leídos (siempre termina en línea completa)
+        self._lineas = 0           # líneas leídas del log, para decidir cuándo compactar
+
+    def _actualizar_siguiente(self, codigo):
+        if codigo.startswith("P") and codigo[1:].isdigit():
+            self._siguiente = max(self._siguiente, int(codigo[1:]) + 1)
+
+    def _indexar(self, producto):
+        codigo = producto["codigo"]
+        normalizada = normalizar_texto(producto["descripcion"])
+        self._productos[codigo] = producto
+        self._por_descripcion[normalizada] = codigo
+        self._normalizadas[codigo] = normalizada
+        self._descripciones.append((normalizada, codigo))
+        self._ordenado = False
+        for trigrama in _trigramas(normalizada):
+            self._trigramas.setdefault(trigrama, set()).add(codigo)
+        self._actualizar_siguiente(codigo)
+
+    def _desindexar(self, codigo):
+        producto = self._productos.pop(codigo)
+        normalizada = self._normalizadas.pop(codigo)
+        if self._por_descripcion.get(normalizada) == codigo:
+            del self._por_descripcion[normalizada]
+        self._ordenar()
+        del self._descripciones[bisect.bisect_left(self._descripciones, (normalizada, codigo))]
+        for trigrama in _trigramas(normalizada):
+            codigos = self._trigramas.get(trigrama)
+            if codigos:
+                codigos.discard(codigo)
+        return producto
+
+    def _ordenar(self):
+        if not self._ordenado:
+            self._descripciones.sort()  # casi ordenada: solo falta ubicar lo agregado al final
+            self._ordenado = True
+
+    def _nuevo_codigo(self):
+        codigo = f"P{self._siguiente:05d}"
+        self._siguiente += 1
+        return codigo
+
+    def _aplicar(self, entrada):
+        """Aplica una línea del log (alta, edición o baja de un producto) a los índices."""
+        if "siguiente" in entrada:
+            # Primera línea de un log compactado: los códigos dados de baja no se reutilizan
+            self._siguiente = max(self._siguiente, entrada["siguiente"])
+            return
+        codigo = entrada["codigo"]
+        existente = self._productos.get(codigo)
+        if entrada.get("eliminado"):
+            if existente is not None:
+                self._desindexar(codigo)
+            self._actualizar_siguiente(codigo)
+        elif existente is not None and self._normalizadas[codigo] == normalizar_texto(entrada["descripcion"]):
+            self._productos[codigo] = entrada  # misma descripción: los índices no cambian
+        else:
+            if existente is not None:
+                self._desindexar(codigo)
+            self._indexar(entrada)
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def _refrescar(self):
+        """Aplica las líneas nuevas del log (escritas por este u otro proceso)."""
+        with self._lock:
+            try:
+                estado = os.stat(self.ruta)
+            except FileNotFoundError:
+                if self._inodo is not None:
+                    self._reiniciar()
+                    self._inodo = None
+                return
+
+            # El log fue reemplazado (compactación) o truncado: se vuelve a leer desde cero
+            if estado.st_ino != self._inodo or estado.st_size < self._fin:
+                self._reiniciar()
+                self._inodo = estado.st_ino
+            if estado.st_size == self._fin:
+                return
+
+            with open(self.ruta, "rb") as archivo:
+                archivo.seek(self._fin)
+                for linea in archivo:
+                    if not linea.endswith(b"\n"):
+                        break  # escritura incompleta (en curso o interrumpida)
+                    self._fin += len(linea)
+                    self._lineas += 1
+                    try:
+                        entrada = json.loads(linea)
+                        if isinstance(entrada, dict):
+                            self._aplicar(entrada)
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # línea corrupta: se omite
+
+    def _anexar(self, entradas):
+        """Anexa líneas al log con una sola escritura y un fsync (requiere el bloqueo y el log al día).
+
+        Las entradas ya están aplicadas en memoria; si la escritura falla se
+        descarta el índice para volver a leerlo del disco.
+        """
+        if not entradas:
+            return
+        datos = b"".join(_serializar(entrada) for entrada in entradas)
+        try:
+            nuevo = not os.path.exists(self.ruta)
+            if not nuevo and os.path.getsize(self.ruta) > self._fin:
+                # Quita una última línea incompleta que haya dejado un corte
+                with open(self.ruta, "r+b") as archivo:
+                    archivo.truncate(self._fin)
+            with open(self.ruta, "ab") as archivo:
+                archivo.write(datos)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            if nuevo:
+                _fsync_directorio(self.ruta)
+                self._inodo = os.stat(self.ruta).st_ino
+        except BaseException:
+            self._reiniciar()
+            self._inodo = None
+            raise
+        self._fin += len(datos)
+        self._lineas += len(entradas)
+        if self._lineas > max(LINEAS_MINIMAS_COMPACTACION, FACTOR_COMPACTACION * len(self._productos)):
+            self._reemplazar()
+
+    def _reemplazar(self):
+        """Reescribe el log con una línea por producto de forma atómica (requiere el bloqueo)."""
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(_serializar({"siguiente": self._siguiente}))
+            for producto in self._productos.values():
+                archivo.write(_serializar(producto))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta)
+        _fsync_directorio(self.ruta)
+        estado = os.stat(self.ruta)
+        self._inodo, self._fin, self._lineas = estado.st_ino, estado.st_size, len(self._productos) + 1
+
+    def compactar(self):
+        """Reescribe el log dejando solo el estado actual de cada producto."""
+        with self._bloqueo():
+            self._refrescar()
+            self._reemplazar()
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def obtener(self, codigo):
+        with self._lock:
+            self._refrescar()
+            producto = self._productos.get(codigo)
+            return dict(producto) if producto else None
+
+    def buscar(self, texto, limite=LIMITE_SUGERENCIAS):
+        """Productos cuya descripción empieza con ``texto`` y luego los que lo contienen.
+
+        No distingue mayúsculas ni tildes; un código exacto va primero. Dentro
+        de cada grupo se ordenan por cantidad de veces cotizados.
+        """
+        consulta = normalizar_texto(texto).strip()
+        if not consulta:
+            return []
+        with self._lock:
+            self._refrescar()
+            self._ordenar()
+
+            encontrados = []
+            codigo = texto.strip().upper()
+            if codigo in self._productos:
+                encontrados.append(codigo)
+
+            def veces(c):
+                return self._productos[c]["veces"]
+
+            prefijo = []
+            posicion = bisect.bisect_left(self._descripciones, (consulta,))
+            while posicion < len(self._descripciones) and self._descripciones[posicion][0].startswith(consulta):
+                prefijo.append(self._descripciones[posicion][1])
+                posicion += 1
+            encontrados += heapq.nlargest(limite, prefijo, key=veces)
+
+            if len(encontrados) < limite and len(consulta) >= 3:
+                # Intersección de los trigramas, empezando por el más selectivo
+                conjuntos = sorted((self._trigramas.get(t, set()) for t in _trigramas(consulta)), key=len)
+                candidatos = set(conjuntos[0])
+                for conjunto in conjuntos[1:]:
+                    if not candidatos:
+                        break
+                    candidatos &= conjunto
+                vistos = set(encontrados)
+                contienen = (
+                    c for c in candidatos
+                    if c not in vistos and consulta in self._normalizadas[c]
+                )
+                encontrados += heapq.nlargest(limite, contienen, key=veces)
+
+            resultado = []
+            for codigo in dict.fromkeys(encontrados):
+                resultado.append(dict(self._productos[codigo]))
+                if len(resultado) >= limite:
+                    break
+            return resultado
+
+    def __len__(self):
+        with self._lock:
+            self._refrescar()
+            return len(self._productos)
+
+    def __bool__(self):
+        # Como AlmacenCotizaciones.__bool__: vacío también cuenta como catálogo
+        return True
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def _registrar_linea(self, producto, cambios):
+        """Suma una línea cotizada al catálogo y devuelve su código (requiere el lock).
+
+        El estado nuevo del producto queda en ``cambios`` (código -> entrada).
+        """
+        descripcion = producto["descripcion"].strip()
+        codigo = producto.get("codigo") or self._por_descripcion.get(normalizar_texto(descripcion))
+        precio = formatear(a_centimos(producto["precio"]))
+        existente = self._productos.get(codigo) if codigo else None
+        if existente is None:
+            codigo = codigo or self._nuevo_codigo()
+            entrada = {"codigo": codigo, "descripcion": descripcion, "precio": precio, "veces": 1}
+        else:
+            entrada = dict(existente, precio=precio, veces=existente["veces"] + 1)
+        self._aplicar(entrada)
+        cambios[codigo] = entrada
+        return codigo
+
+    def registrar(self, productos):
+        """Actualiza el catálogo con las líneas de una cotización nueva.
+
+        Guarda el último precio de cada producto, agrega los que no existían
+        y completa el ``codigo`` de cada línea para que quede en la cotización.
+        """
+        with self._bloqueo():
+            self._refrescar()
+            cambios = {}
+            for producto in productos:
+                producto["codigo"] = self._registrar_linea(producto, cambios)
+            self._anexar(list(cambios.values()))
+        return productos
+
+    def guardar_producto(self, codigo, descripcion, precio):
+        """Crea o edita un producto a mano; sin ``codigo`` se asigna uno nuevo."""
+        with self._bloqueo():
+            self._refrescar()
+            existente = self._productos.get(codigo) if codigo else None
+            entrada = {
+                "codigo": codigo or self._nuevo_codigo(),
+                "descripcion": descripcion.strip(),
+                "precio": formatear(a_centimos(precio)),
+                "veces": existente["veces"] if existente else 0,
+            }
+            self._aplicar(entrada)
+            self._anexar([entrada])
+            return entrada["codigo"]
+
+    def eliminar(self, codigo):
+        with self._bloqueo():
+            self._refrescar()
+            if codigo in self._productos:
+                entrada = {"codigo": codigo, "eliminado": True}
+                self._aplicar(entrada)
+                self._anexar([entrada])
+
+    def reconstruir(self, almacen=None):
+        """Rearma el catálogo desde el historial de cotizaciones (incluidas las archivadas).
+
+        Las descripciones que ya tenían código lo conservan, el precio queda
+        en el último cotizado y los productos cargados a mano que nunca se
+        cotizaron se mantienen. Los productos eliminados no vuelven, aunque
+        sigan en cotizaciones antiguas.
+        """
+        almacen = almacen or obtener_almacen()
+        with self._bloqueo():
+            self._refrescar()
+            anteriores = dict(self._por_descripcion)
+            previos = self._productos
+            siguiente = self._siguiente
+            self._reiniciar()
+            self._siguiente = siguiente
+
+            def eliminado(codigo):
+                # Un código ya emitido que no está en el catálogo se dio de baja
+                return (codigo not in previos and codigo.startswith("P") and codigo[1:].isdigit()
+                        and int(codigo[1:]) < siguiente)
+
+            cambios = {}
+            eliminadas = set()  # descripciones normalizadas de productos dados de baja
+            cotizaciones = chain(almacen.recorrer_archivo(), (c for _, c in almacen.recorrer()))
+            for cotizacion in cotizaciones:
+                for producto in cotizacion.get("productos", []):
+                    if not producto.get("descripcion"):
+                        continue
+                    normalizada = normalizar_texto(producto["descripcion"].strip())
+                    linea = dict(producto)
+                    linea["codigo"] = linea.get("codigo") or anteriores.get(normalizada)
+                    if linea["codigo"] and eliminado(linea["codigo"]):
+                        eliminadas.add(normalizada)
+                        continue
+                    self._registrar_linea(linea, cambios)
+            # Las líneas sin código anteriores a la baja crearon un producto nuevo con la misma descripción
+            for codigo in [c for c in self._productos if c not in previos and self._normalizadas[c] in eliminadas]:
+                self._desindexar(codigo)
+            for codigo, producto in previos.items():
+                if codigo not in self._productos:
+                    self._indexar(producto)
+            self._reemplazar()
+            return len(self._productos)
+
+    def migrar_desde_json(self, ruta_json=CATALOGO_JSON_ANTIGUO):
+        """Pasa al log el catálogo guardado como un solo JSON (versión anterior); se hace una sola vez.
+
+        Devuelve la cantidad de productos migrados.
+        """
+        with self._bloqueo():
+            if not os.path.exists(ruta_json):
+                return 0
+            self._refrescar()
+            if self._inodo is not None:
+                return 0  # el log ya existe: no se mezcla con el archivo antiguo
+            try:
+                with open(ruta_json, "r", encoding="utf-8") as archivo:
+                    productos = json.load(archivo)
+            except ValueError:
+                productos = []
+            for producto in productos if isinstance(productos, list) else []:
+                if isinstance(producto, dict) and producto.get("codigo") and producto.get("descripcion"):
+                    self._aplicar(dict(producto, veces=producto.get("veces", 0)))
+            self._reemplazar()
+            os.replace(ruta_json, ruta_json + ".migrado")
+            _fsync_directorio(ruta_json)
+            return len(self._productos)
+
+
+def _serializar(entrada):
+    return (json.dumps(entrada, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+
+def obtener_catalogo():
+    """Devuelve el catálogo compartido por todas las sesiones del proceso, migrando el JSON antiguo la primera vez."""
+    global _catalogo
+    with _catalogo_lock:
+        if _catalogo is None:
+            _catalogo = CatalogoProductos()
+            _catalogo.migrar_desde_json()
+        return _catalogo
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Uso: python catalogo.py reconstruir | compactar | migrar [catalogo.json]
+    if len(sys.argv) >= 2 and sys.argv[1] == "reconstruir":
+        print(f"Catálogo reconstruido: {obtener_catalogo().reconstruir()} productos")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "compactar":
+        catalogo = obtener_catalogo()
+        catalogo.compactar()
+        print(f"Catálogo compactado: {len(catalogo)} productos, {os.path.getsize(catalogo.ruta)} bytes")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "migrar":
+        ruta_json = sys.argv[2] if len(sys.argv) > 2 else CATALOGO_JSON_ANTIGUO
+        print(f"Productos migrados: {CatalogoProductos().migrar_desde_json(ruta_json)}")
+    else:
+        print("Uso: python catalogo.py reconstruir | compactar | migrar [catalogo.json]")
@@ -0,0 +1,145 @@
+import os
+import json
+import threading
+
+
+# Pesos del dígito verificador del RUC (módulo 11, SUNAT)
+_PESOS_RUC = [5, 4, 3, 2, 7, 6, 5, 4, 3, 2]
+
+
+def normalizar_ruc(ruc):
+    return str(ruc or "").strip()
+
+
+def ruc_valido(ruc):
+    """True si el RUC tiene 11 dígitos, un prefijo válido y el dígito verificador correcto."""
+    ruc = normalizar_ruc(ruc)
+    if len(ruc) != 11 or not ruc.isdigit() or ruc[:2] not in ("10", "15", "16", "17", "20"):
+        return False
+    resto = 11 - sum(int(d) * p for d, p in zip(ruc, _PESOS_RUC)) % 11
+    return int(ruc[-1]) == {10: 0, 11: 1}.get(resto, resto)
+
+
+class DirectorioClientes:
+    """Directorio de clientes indexado por RUC, con historial de versiones.
+
+    Se guarda en un log JSONL de solo-anexado: cada línea es una versión de un
+    cliente con solo los campos que cambiaron respecto a la versión anterior
+    (``{"RUC", "version", "cambios"}``). En memoria se mantiene un diccionario
+    RUC -> versiones completas, así que buscar un cliente o reconstruir la
+    versión que usó una cotización es una consulta directa.
+
+    No tiene bloqueo de archivo propio: las escrituras se hacen desde el
+    almacén de cotizaciones, dentro de su bloqueo.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.RLock()
+        self._versiones = {}  # RUC -> [datos completos de la versión 1, 2, ...]
+        self._inodo = None
+        self._fin = 0
+        self._pendiente = False  # hay versiones escritas sin fsync
+        self._nuevo = False      # el archivo se creó y falta sincronizar el directorio
+
+    def _refrescar(self):
+        """Lee las versiones nuevas del log (escritas por este u otro proceso)."""
+        with self._lock:
+            try:
+                estado = os.stat(self.ruta)
+            except FileNotFoundError:
+                self._versiones, self._inodo, self._fin = {}, None, 0
+                return
+            if estado.st_ino != self._inodo or estado.st_size < self._fin:
+                self._versiones, self._inodo, self._fin = {}, estado.st_ino, 0
+            if estado.st_size == self._fin:
+                return
+            with open(self.ruta, "rb") as archivo:
+                archivo.seek(self._fin)
+                for linea in archivo:
+                    if not linea.endswith(b"\n"):
+                        break
+                    self._fin += len(linea)
+                    try:
+                        entrada = json.loads(linea)
+                    except ValueError:
+                        continue
+                    versiones = self._versiones.setdefault(entrada["RUC"], [])
+                    # Cada versión parte de la anterior y aplica sus cambios
+                    datos = dict(versiones[-1]) if versiones else {}
+                    for campo, valor in entrada["cambios"].items():
+                        if valor is None:
+                            datos.pop(campo, None)
+                        else:
+                            datos[campo] = valor
+                    versiones.append(datos)
+
+    def buscar(self, ruc):
+        """Datos actuales del cliente con ese RUC, o None si no está registrado."""
+        with self._lock:
+            self._refrescar()
+            versiones = self._versiones.get(normalizar_ruc(ruc))
+            return dict(versiones[-1]) if versiones else None
+
+    def version(self, ruc, numero):
+        """Datos del cliente tal como estaban en la versión ``numero`` (empezando en 1)."""
+        with self._lock:
+            versiones = self._versiones.get(ruc)
+            if not versiones or numero > len(versiones):
+                self._refrescar()
+                versiones = self._versiones.get(ruc)
+            if not versiones or not 1 <= numero <= len(versiones):
+                return {"RUC": ruc}
+            return dict(versiones[numero - 1])
+
+    def registrar(self, datos_cliente, sincronizar=True):
+        """Registra los datos del cliente y devuelve la referencia ``{"RUC", "version"}``.
+
+        Si no cambió nada respecto a la última versión se reutiliza; si no, se
+        anexa una versión nueva solo con los campos distintos. Con
+        ``sincronizar=False`` no se hace fsync (para registrar muchos clientes
+        seguidos y llamar a ``sincronizar()`` una sola vez al final).
+        """
+        ruc = normalizar_ruc(datos_cliente.get("RUC"))
+        datos = dict(datos_cliente, RUC=ruc)
+        with self._lock:
+            self._refrescar()
+            versiones = self._versiones.get(ruc, [])
+            anterior = versiones[-1] if versiones else {}
+            if versiones and anterior == datos:
+                return {"RUC": ruc, "version": len(versiones)}
+
+            cambios = {campo: valor for campo, valor in datos.items() if anterior.get(campo) != valor}
+            cambios.update({campo: None for campo in anterior if campo not in datos})
+            entrada = {"RUC": ruc, "version": len(versiones) + 1, "cambios": cambios}
+            nuevo = not os.path.exists(self.ruta)
+            if not nuevo and os.path.getsize(self.ruta) > self._fin:
+                # Quita una última línea incompleta que haya dejado un corte
+                with open(self.ruta, "r+b") as archivo:
+                    archivo.truncate(self._fin)
+            with open(self.ruta, "ab") as archivo:
+                archivo.write((json.dumps(entrada, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+            self._pendiente = True
+            if nuevo:
+                self._nuevo = True
+            if sincronizar:
+                self.sincronizar()
+            self._refrescar()
+            return {"RUC": ruc, "version": entrada["version"]}
+
+    def sincronizar(self):
+        """Hace durables (fsync) las versiones anexadas sin sincronizar."""
+        with self._lock:
+            if not self._pendiente:
+                return
+            with open(self.ruta, "rb") as archivo:
+                os.fsync(archivo.fileno())
+            if self._nuevo:
+                from almacen import _fsync_directorio
+                _fsync_directorio(self.ruta)
+            self._pendiente = self._nuevo = False
+
+    def __len__(self):
+        with self._lock:
+            self._refrescar()
+            return len(self._versiones)
@@ -1,19 +1,19 @@
 import os 
-import json
-from pdf_generator import generar_cotizacion_pdf
-
-cotizaciones_file = "cotizaciones.json"
+import argparse
+from datetime import datetime
+from almacen import obtener_almacen
+from exportar import exportar_zip, seleccionar_cotizaciones
+from importacion import importar
+from precios import a_centimos, linea_de, porcentaje, soles, tasa_de, totales_de
 
 
 def load_cotizaciones():
-    if os.path.exists(cotizaciones_file):
-        with open(cotizaciones_file, "r") as file:
-            return json.load(file)
-    return []
+    return obtener_almacen().todas()
 
 def save_cotizaciones(cotizaciones):
-    with open(cotizaciones_file, "w") as file:
-        json.dump(cotizaciones, file, indent=4)
+    # Reemplaza el contenido completo del almacén (para guardar una sola
+    # cotización usar obtener_almacen().agregar, que solo anexa)
+    obtener_almacen().reescribir(cotizaciones)
 
 
 def generarPDF(cotizacion):
@@ -22,6 +22,9 @@ def generarPDF(cotizacion):
         if not os.path.exists("pdfs"):
             os.makedirs("pdfs")
             
+        # ReportLab se carga solo cuando de verdad se genera un PDF
+        from pdf_generator import generar_cotizacion_pdf
+
         # Generar el PDF y obtener la ruta
         pdf_path = os.path.join("pdfs", f"cotizacion_{cotizacion['id']}.pdf")
         if generar_cotizacion_pdf(cotizacion, pdf_path):
@@ -33,8 +36,41 @@ def generarPDF(cotizacion):
 
 
 
+def exportarPDFs(destino, ruc=None, nombre=None, desde=None, hasta=None, procesos=None):
+    # Genera en paralelo los PDFs de las cotizaciones filtradas y los guarda en un ZIP
+    cotizaciones = seleccionar_cotizaciones(ruc=ruc, nombre=nombre, desde=desde, hasta=hasta)
+
+    def mostrar_progreso(hechos):
+        if hechos % 50 == 0:
+            print(f"  {hechos} PDFs generados...")
+
+    resultado = exportar_zip(cotizaciones, destino, procesos=procesos, progreso=mostrar_progreso)
+    print(f"ZIP generado: {destino}")
+    print(f"PDFs: {resultado['pdfs']} | Procesos: {resultado['procesos']} | "
+          f"Tiempo: {resultado['segundos']:.2f} s | {resultado['pdfs_por_segundo']:.2f} PDFs/s")
+    return resultado
+
+
+def importarCotizaciones(ruta, formato=None, lote=None, rechazos=None, pdfs=None, procesos=None):
+    # Importa cotizaciones desde un CSV/JSONL en lotes, sin preguntas interactivas
+    def mostrar_progreso(parcial):
+        print(f"  {parcial['cotizaciones']} cotizaciones importadas ({parcial['filas']} filas leídas)...")
+
+    resultado = importar(ruta, formato=formato, tamano_lote=lote or 500, ruta_rechazos=rechazos,
+                         salida_pdfs=pdfs, procesos=procesos, progreso=mostrar_progreso)
+    print(f"Filas: {resultado['filas']} | Cotizaciones: {resultado['cotizaciones']} | "
+          f"Lotes: {resultado['lotes']} | Tiempo: {resultado['segundos']:.2f} s | "
+          f"{resultado['filas_por_segundo']:.0f} filas/s")
+    if resultado['cotizaciones']:
+        print(f"Ids asignados: {resultado['primer_id']} a {resultado['ultimo_id']}")
+    if resultado['rechazos']:
+        print(f"Filas rechazadas: {resultado['filas_rechazadas']} (ver {resultado['rechazos']})")
+    if 'pdfs' in resultado:
+        print(f"ZIP de PDFs: {pdfs} | {resultado['pdfs']['pdfs_por_segundo']:.2f} PDFs/s")
+    return resultado
+
+
 def addCotizaciones():
-    cotizaciones = load_cotizaciones()
     print("Ingrese los datos del cliente")
     nombreCliente = input("Ingrese el nombre: ")
     ruc = input("Ingrese el N° RUC")
@@ -61,13 +97,7 @@ def addCotizaciones():
         }
         productos.append(producto)
     
-    cotizacion = {
-        "datos del cliente": datosCliente,
-        "id": len(cotizaciones) + 1,
-        "productos": productos
-    }
-    cotizaciones.append(cotizacion)
-    save_cotizaciones(cotizaciones)
+    cotizacion = obtener_almacen().agregar(datosCliente, productos)
     print("Cotización agregada con éxito\n")
     pdf_path = generarPDF(cotizacion)
     if pdf_path:
@@ -85,9 +115,56 @@ def mostrarCotizaciones():
     for cotizacion in cotizaciones:  # Cambiar el bucle para iterar directamente
         print(f"\nID: {cotizacion['id']}")
         print("Productos:")
+        tasa = tasa_de(cotizacion)
         for producto in cotizacion['productos']:
+            linea = linea_de(producto, tasa)
             print(f"- Descripción: {producto['descripcion']}")
-            print(f"  Precio: ${producto['precio']}")
+            print(f"  Precio: {soles(a_centimos(producto['precio']))}")
             print(f"  Cantidad: {producto['cantidad']}")
-            print(f"  Total: ${producto['precio'] * producto['cantidad']}")
-        print("-" * 40)    
\ No newline at end of file
+            print(f"  Subtotal: {soles(linea['subtotal'])}")
+            print(f"  IGV ({porcentaje(tasa)}%): {soles(linea['impuesto'])}")
+            print(f"  Total: {soles(linea['total'])}")
+        print(f"Total de la cotización: {soles(totales_de(cotizacion)['total'])}")
+        print("-" * 40)
+
+
+def _fecha(texto):
+    return datetime.strptime(texto, "%d/%m/%Y").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cotizaciones ACESMA INOX desde la línea de comandos")
+    subcomandos = parser.add_subparsers(dest="comando")
+
+    subcomandos.add_parser("agregar", help="Crear una cotización con preguntas interactivas")
+    subcomandos.add_parser("mostrar", help="Listar las cotizaciones registradas")
+
+    exportar = subcomandos.add_parser("exportar", help="Exportar PDFs de varias cotizaciones a un ZIP")
+    exportar.add_argument("--salida", default="cotizaciones.zip", help="Ruta del ZIP a generar")
+    exportar.add_argument("--ruc", help="Solo las cotizaciones de este RUC")
+    exportar.add_argument("--nombre", help="Prefijo del nombre del cliente")
+    exportar.add_argument("--desde", type=_fecha, help="Fecha inicial dd/mm/aaaa (inclusive)")
+    exportar.add_argument("--hasta", type=_fecha, help="Fecha final dd/mm/aaaa (inclusive)")
+    exportar.add_argument("--procesos", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+
+    importacion = subcomandos.add_parser("importar", help="Importar cotizaciones desde un CSV o JSONL")
+    importacion.add_argument("archivo", help="CSV con una fila por producto o JSONL (filas o cotizaciones completas)")
+    importacion.add_argument("--formato", choices=["csv", "jsonl"], help="Por defecto según la extensión")
+    importacion.add_argument("--lote", type=int, default=500, help="Cotizaciones por escritura al almacén")
+    importacion.add_argument("--rechazos", help="CSV de filas rechazadas (por defecto <archivo>.rechazos.csv)")
+    importacion.add_argument("--pdfs", help="Generar en paralelo los PDFs importados en este ZIP")
+    importacion.add_argument("--procesos", type=int, help="Procesos para los PDFs (por defecto, uno por núcleo)")
+
+    args = parser.parse_args()
+    if args.comando == "agregar":
+        addCotizaciones()
+    elif args.comando == "mostrar":
+        mostrarCotizaciones()
+    elif args.comando == "exportar":
+        exportarPDFs(args.salida, ruc=args.ruc, nombre=args.nombre,
+                     desde=args.desde, hasta=args.hasta, procesos=args.procesos)
+    elif args.comando == "importar":
+        importarCotizaciones(args.archivo, formato=args.formato, lote=args.lote, rechazos=args.rechazos,
+                             pdfs=args.pdfs, procesos=args.procesos)
+    else:
+        parser.print_help()
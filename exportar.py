@@ -0,0 +1,89 @@
+import os
+import time
+import zipfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from almacen import obtener_almacen
+from pdf_cache import obtener_cache
+
+# Cotizaciones que se leen del almacén de una vez al exportar
+TAMANO_BLOQUE = 100
+
+
+def _iniciar_worker():
+    """Prepara el renderizador una sola vez en cada proceso del pool."""
+    from pdf_generator import obtener_renderer
+    obtener_renderer()
+
+
+def _renderizar(cotizacion):
+    from pdf_generator import generar_cotizacion_pdf
+    return generar_cotizacion_pdf(cotizacion)
+
+
+def seleccionar_cotizaciones(almacen=None, ruc=None, nombre=None, desde=None, hasta=None):
+    """Genera las cotizaciones que cumplen los filtros, leyéndolas del almacén por bloques."""
+    almacen = almacen or obtener_almacen()
+    ids = almacen.buscar_ids(ruc=ruc, nombre=nombre, desde=desde, hasta=hasta)
+    for inicio in range(0, len(ids), TAMANO_BLOQUE):
+        yield from almacen.obtener_varias(ids[inicio:inicio + TAMANO_BLOQUE])
+
+
+def exportar_zip(cotizaciones, destino, procesos=None, progreso=None, usar_cache=True):
+    """Renderiza las cotizaciones en un pool de procesos y las escribe en un ZIP.
+
+    ``cotizaciones`` puede ser cualquier iterable (se consume de a poco) y
+    ``destino`` una ruta o un archivo abierto en modo binario. Como mucho hay
+    ``2 * procesos`` PDFs en vuelo a la vez: cada PDF se escribe en el ZIP en
+    cuanto termina, en el mismo orden de entrada, y luego se libera.
+    ``progreso(hechos)`` se llama después de cada PDF. Devuelve un diccionario
+    con la cantidad de PDFs, los bytes, los segundos y los PDFs por segundo.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    cache = obtener_cache() if usar_cache else None
+    en_vuelo = deque()  # (cotizacion, future o bytes ya disponibles)
+    hechos = 0
+    total_bytes = 0
+    inicio = time.perf_counter()
+
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                             initializer=_iniciar_worker) as pool, \
+            zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archivo_zip:
+
+        def escribir_siguiente():
+            nonlocal hechos, total_bytes
+            cotizacion, pendiente = en_vuelo.popleft()
+            if isinstance(pendiente, bytes):
+                pdf_data = pendiente
+            else:
+                pdf_data = pendiente.result()
+                if cache:
+                    cache.guardar(cotizacion, pdf_data)
+            archivo_zip.writestr(f"cotizacion_{cotizacion['id']}.pdf", pdf_data)
+            hechos += 1
+            total_bytes += len(pdf_data)
+            if progreso:
+                progreso(hechos)
+
+        for cotizacion in cotizaciones:
+            pdf_data = cache.buscar(cotizacion) if cache else None
+            if pdf_data is not None:
+                en_vuelo.append((cotizacion, pdf_data))
+            else:
+                en_vuelo.append((cotizacion, pool.submit(_renderizar, cotizacion)))
+            while len(en_vuelo) >= 2 * procesos:
+                escribir_siguiente()
+
+        while en_vuelo:
+            escribir_siguiente()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "pdfs": hechos,
+        "bytes": total_bytes,
+        "procesos": procesos,
+        "segundos": round(segundos, 3),
+        "pdfs_por_segundo": round(hechos / segundos, 2) if segundos else 0.0,
+    }
@@ -0,0 +1,343 @@
+import os
+import csv
+import json
+import math
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+from almacen import normalizar_texto, obtener_almacen
+from clientes import normalizar_ruc, ruc_valido
+from precios import a_decimal, calcular_totales
+
+# Columnas de una fila (una línea de producto); las filas seguidas con el mismo
+# valor en "cotizacion" forman una sola cotización
+COLUMNAS = ["cotizacion", "fecha", "nombre", "ruc", "telefono", "email", "direccion",
+            "codigo", "descripcion", "precio", "cantidad"]
+# Cotizaciones que se guardan con cada escritura al almacén
+TAMANO_LOTE = 500
+# Columnas de producto que se aceptan al pegar desde una hoja de cálculo, según cuántas vengan
+COLUMNAS_PEGADO = {
+    1: ["descripcion"],
+    2: ["descripcion", "precio"],
+    3: ["descripcion", "precio", "cantidad"],
+    4: ["codigo", "descripcion", "precio", "cantidad"],
+}
+# Topes de precio (soles) y cantidad por línea: más allá es un error de tipeo, y
+# precio x cantidad tiene que caber en la precisión de Decimal al calcular los montos
+PRECIO_MAXIMO = Decimal("100000000")
+CANTIDAD_MAXIMA = Decimal("1000000")
+
+
+def _leer_csv(ruta):
+    with open(ruta, "r", encoding="utf-8-sig", newline="") as archivo:
+        for numero, fila in enumerate(csv.DictReader(archivo), start=2):
+            yield numero, {clave.strip().lower(): (valor or "").strip() for clave, valor in fila.items() if clave}
+
+
+def _leer_jsonl(ruta):
+    """Filas de un JSONL: cada línea es una fila plana o una cotización completa (se expande por producto)."""
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                yield numero, {"_error": "JSON inválido", "descripcion": linea.strip()[:200]}
+                continue
+            if not isinstance(registro, dict):
+                yield numero, {"_error": "la línea no es un objeto JSON", "descripcion": linea.strip()[:200]}
+                continue
+            if "productos" not in registro:
+                yield numero, registro
+                continue
+            cliente = registro.get("datos del cliente") or {}
+            base = {
+                # Cada línea es una cotización aparte aunque dos seguidas traigan el mismo id
+                "_linea": numero,
+                "cotizacion": registro.get("id", f"linea-{numero}"),
+                "fecha": registro.get("fecha", ""),
+                "nombre": cliente.get("Nombre del cliente", ""),
+                "ruc": cliente.get("RUC", ""),
+                "telefono": cliente.get("Telefono", ""),
+                "email": cliente.get("E-mail", ""),
+                "direccion": cliente.get("Dirección", ""),
+            }
+            for producto in registro["productos"] or [{}]:
+                yield numero, dict(base, codigo=producto.get("codigo", ""), descripcion=producto.get("descripcion", ""),
+                                   precio=producto.get("precio", ""), cantidad=producto.get("cantidad", ""))
+
+
+def leer_filas(ruta, formato=None):
+    """Genera (número de línea, fila) de un CSV o JSONL sin cargar el archivo completo."""
+    formato = formato or ("jsonl" if ruta.lower().endswith((".jsonl", ".json")) else "csv")
+    return _leer_jsonl(ruta) if formato == "jsonl" else _leer_csv(ruta)
+
+
+def _numero(valor):
+    texto = str(valor).strip().replace(" ", "")
+    if "," in texto and "." not in texto:
+        texto = texto.replace(",", ".")  # coma decimal
+    return a_decimal(texto.replace(",", ""))
+
+
+def _vacio(valor):
+    # Las celdas numéricas vacías de una tabla editable llegan como NaN
+    return valor is None or (isinstance(valor, float) and math.isnan(valor)) or not str(valor).strip()
+
+
+def validar_producto(fila, precio_cero=False):
+    """Valida las columnas de producto (codigo, descripcion, precio, cantidad) de una fila.
+
+    Devuelve (producto, None) o (None, motivo). Con ``precio_cero`` se aceptan
+    líneas sin costo (p. ej. "incluye instalación").
+    """
+    if _vacio(fila.get("descripcion")):
+        return None, "falta la descripción"
+    if _vacio(fila.get("precio")):
+        return None, "falta el precio"
+    if _vacio(fila.get("cantidad")):
+        return None, "falta la cantidad"
+    try:
+        precio = _numero(fila["precio"])
+        cantidad = _numero(fila["cantidad"])
+    except (InvalidOperation, ValueError):
+        return None, "precio o cantidad no numéricos"
+    # NaN e infinito antes de comparar: "precio < 0" con un NaN lanza InvalidOperation
+    if not precio.is_finite() or not cantidad.is_finite():
+        return None, "precio o cantidad no numéricos"
+    if precio < 0:
+        return None, "el precio no puede ser negativo"
+    if precio == 0 and not precio_cero:
+        return None, "el precio debe ser mayor que cero"
+    if cantidad <= 0:
+        return None, "la cantidad debe ser mayor que cero"
+    if precio > PRECIO_MAXIMO:
+        return None, f"el precio no puede pasar de {PRECIO_MAXIMO:,}"
+    if cantidad > CANTIDAD_MAXIMA:
+        return None, f"la cantidad no puede pasar de {CANTIDAD_MAXIMA:,}"
+
+    producto = {
+        "descripcion": str(fila["descripcion"]).strip(),
+        "precio": float(precio),
+        "cantidad": int(cantidad) if cantidad == cantidad.to_integral_value() else float(cantidad),
+    }
+    if not _vacio(fila.get("codigo")):
+        producto["codigo"] = str(fila["codigo"]).strip().upper()
+    return producto, None
+
+
+def validar_fila(fila):
+    """Devuelve (producto, None) si la fila es válida o (None, motivo) si no lo es."""
+    if "_error" in fila:
+        return None, fila["_error"]
+    if not ruc_valido(fila.get("ruc")):
+        return None, "RUC inválido"
+    if not str(fila.get("nombre", "")).strip():
+        return None, "falta el nombre del cliente"
+    producto, motivo = validar_producto(fila)
+    if motivo:
+        return None, motivo
+    fecha = str(fila.get("fecha", "")).strip()
+    if fecha and _fecha(fecha) is None:
+        return None, "fecha inválida (dd/mm/aaaa)"
+    return producto, None
+
+
+def _sin_precio(valor):
+    try:
+        return _vacio(valor) or _numero(valor) == 0
+    except (InvalidOperation, ValueError):
+        return False
+
+
+def validar_lineas(filas):
+    """Valida las líneas de producto cargadas a mano o pegadas (se permite precio cero).
+
+    Las filas vacías (sin código, sin descripción y sin precio) se ignoran.
+    Devuelve (productos, errores), donde cada error dice el número de línea
+    (empezando en 1) y el motivo.
+    """
+    productos, errores = [], []
+    for numero, fila in enumerate(filas, start=1):
+        if _vacio(fila.get("codigo")) and _vacio(fila.get("descripcion")) and _sin_precio(fila.get("precio")):
+            continue
+        producto, motivo = validar_producto(fila, precio_cero=True)
+        if motivo:
+            errores.append(f"Línea {numero}: {motivo}")
+        else:
+            productos.append(producto)
+    return productos, errores
+
+
+def normalizar_linea(fila):
+    """Fila de producto con tipos fijos (texto, y número o None) para volver a mostrarla en una tabla."""
+    def numero(valor):
+        try:
+            return None if _vacio(valor) else float(_numero(valor))
+        except (InvalidOperation, ValueError):
+            return None
+
+    return {
+        "codigo": str(fila.get("codigo") or "").strip().upper(),
+        "descripcion": str(fila.get("descripcion") or "").strip(),
+        "precio": numero(fila.get("precio")),
+        "cantidad": numero(fila.get("cantidad")),
+    }
+
+
+def leer_pegado(texto):
+    """Filas de producto de un texto pegado desde Excel o Google Sheets (una línea por producto).
+
+    Las columnas van separadas por tabulador (o por ";"). Si la primera línea
+    es un encabezado se usan sus nombres; si no, el orden depende de cuántas
+    columnas haya (ver COLUMNAS_PEGADO). Sin cantidad se asume 1.
+    """
+    filas = [
+        [celda.strip() for celda in linea.split("\t" if "\t" in linea else ";")]
+        for linea in str(texto or "").splitlines() if linea.strip()
+    ]
+    if not filas:
+        return []
+
+    encabezado = [normalizar_texto(celda) for celda in filas[0]]
+    if "descripcion" in encabezado:
+        columnas, filas = encabezado, filas[1:]
+    else:
+        columnas = None
+
+    resultado = []
+    for celdas in filas:
+        nombres = columnas or COLUMNAS_PEGADO.get(len(celdas), COLUMNAS_PEGADO[4])
+        fila = {nombre: valor for nombre, valor in zip(nombres, celdas) if nombre in COLUMNAS}
+        if _vacio(fila.get("cantidad")):
+            fila["cantidad"] = "1"
+        resultado.append(fila)
+    return resultado
+
+
+def _fecha(texto):
+    """'dd/mm/aaaa' o 'aaaa-mm-dd' -> 'dd/mm/aaaa', o None si no es una fecha."""
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).strftime("%d/%m/%Y")
+        except ValueError:
+            continue
+    return None
+
+
+def _grupo(item):
+    """Clave de agrupación de una fila: la línea de una cotización completa de un JSONL, o su columna "cotizacion"."""
+    numero, fila = item
+    if "_linea" in fila:
+        return "_linea", fila["_linea"]
+    # Sin columna "cotizacion" cada fila es una cotización de un solo producto
+    return "cotizacion", str(fila.get("cotizacion") or f"linea-{numero}")
+
+
+def _cotizacion(filas):
+    """Arma una cotización con las filas de un grupo; devuelve (cotización o None, rechazos)."""
+    productos, rechazos, invalidas = [], [], set()
+    for posicion, (numero, fila) in enumerate(filas):
+        producto, motivo = validar_fila(fila)
+        if motivo:
+            rechazos.append((numero, fila, motivo))
+            invalidas.add(posicion)
+        else:
+            productos.append(producto)
+    if rechazos:
+        # Una cotización con líneas inválidas no se importa a medias
+        rechazos += [(numero, fila, "la cotización tiene filas inválidas")
+                     for posicion, (numero, fila) in enumerate(filas) if posicion not in invalidas]
+        return None, sorted(rechazos, key=lambda rechazo: rechazo[0])
+
+    try:
+        calcular_totales(productos)
+    except (ArithmeticError, ValueError) as error:
+        # Se descarta aquí y no al guardar, donde haría fallar el lote entero
+        return None, [(numero, fila, f"no se pudieron calcular los montos ({error.__class__.__name__})")
+                      for numero, fila in filas]
+
+    primera = filas[0][1]
+    fecha = str(primera.get("fecha", "")).strip()
+    return {
+        "fecha": _fecha(fecha) if fecha else None,
+        "datos del cliente": {
+            "Nombre del cliente": str(primera["nombre"]).strip(),
+            "RUC": normalizar_ruc(primera["ruc"]),
+            "Telefono": str(primera.get("telefono", "")).strip(),
+            "E-mail": str(primera.get("email", "")).strip(),
+            "Dirección": str(primera.get("direccion", "")).strip(),
+        },
+        "productos": productos,
+    }, []
+
+
+def importar(ruta, almacen=None, formato=None, tamano_lote=TAMANO_LOTE, ruta_rechazos=None,
+             salida_pdfs=None, procesos=None, progreso=None):
+    """Importa cotizaciones desde un CSV o JSONL leyendo el archivo de a poco.
+
+    Las filas se validan, se agrupan en cotizaciones por la columna
+    "cotizacion" (filas consecutivas; en un JSONL cada cotización completa
+    es una aparte) y se guardan en lotes de
+    ``tamano_lote`` con una sola escritura por lote. Las filas inválidas van a
+    ``ruta_rechazos`` (CSV con el número de línea y el motivo). Con
+    ``salida_pdfs`` se generan en paralelo los PDFs de lo importado en un ZIP.
+    ``progreso(resultado)`` se llama después de cada lote.
+    """
+    almacen = almacen or obtener_almacen()
+    ruta_rechazos = ruta_rechazos or os.path.splitext(ruta)[0] + ".rechazos.csv"
+    resultado = {"filas": 0, "filas_rechazadas": 0, "cotizaciones": 0, "lotes": 0}
+    ids = []
+    lote = []
+    inicio = time.perf_counter()
+
+    def guardar_lote():
+        guardadas = almacen.agregar_lote(lote)
+        ids.extend(cotizacion["id"] for cotizacion in guardadas)
+        resultado["cotizaciones"] += len(guardadas)
+        resultado["lotes"] += 1
+        lote.clear()
+        if progreso:
+            progreso(resultado)
+
+    with open(ruta_rechazos, "w", encoding="utf-8", newline="") as archivo_rechazos:
+        rechazos = csv.DictWriter(archivo_rechazos, fieldnames=["linea", "motivo"] + COLUMNAS, extrasaction="ignore")
+        rechazos.writeheader()
+
+        for _, grupo in groupby(leer_filas(ruta, formato), key=_grupo):
+            grupo = list(grupo)
+            resultado["filas"] += len(grupo)
+            cotizacion, rechazadas = _cotizacion(grupo)
+            for numero, fila, motivo in rechazadas:
+                rechazos.writerow(dict(fila, linea=numero, motivo=motivo))
+            resultado["filas_rechazadas"] += len(rechazadas)
+            if cotizacion:
+                lote.append(cotizacion)
+                if len(lote) >= tamano_lote:
+                    guardar_lote()
+        if lote:
+            guardar_lote()
+
+    if not resultado["filas_rechazadas"]:
+        os.remove(ruta_rechazos)
+
+    segundos = time.perf_counter() - inicio
+    resultado.update({
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": round(resultado["filas"] / segundos, 1) if segundos else 0.0,
+        "rechazos": ruta_rechazos if resultado["filas_rechazadas"] else None,
+        "primer_id": ids[0] if ids else None,
+        "ultimo_id": ids[-1] if ids else None,
+    })
+
+    if salida_pdfs and ids:
+        from exportar import TAMANO_BLOQUE, exportar_zip
+
+        def importadas():
+            for posicion in range(0, len(ids), TAMANO_BLOQUE):
+                yield from almacen.obtener_varias(ids[posicion:posicion + TAMANO_BLOQUE])
+
+        resultado["pdfs"] = exportar_zip(importadas(), salida_pdfs, procesos=procesos)
+    return resultado
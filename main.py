@@ -1,36 +1,237 @@
 import streamlit as st
-import json
 import os
+import time
 from datetime import datetime
-from pdf_generator import generar_cotizacion_pdf
+import metricas
+from metricas import cronometrado
+from trabajos_pdf import obtener_cola
+from almacen import obtener_almacen
+from analitica import obtener_analitica
+from catalogo import obtener_catalogo
+from exportar import exportar_zip, seleccionar_cotizaciones
+from importacion import leer_pegado, normalizar_linea, validar_lineas
+from precios import a_centimos, calcular_totales, linea_de, porcentaje, soles, tasa_de, totales_de
 
-# Definir el archivo donde se guardarán las cotizaciones
-COTIZACIONES_FILE = "cotizaciones.json"
+# Cantidad de cotizaciones por página en "Ver Cotizaciones"
+COTIZACIONES_POR_PAGINA = 20
+# Fila con la que empieza la tabla de carga masiva de productos
+FILA_VACIA = {"codigo": "", "descripcion": "", "precio": None, "cantidad": 1.0}
+# Archivo donde la página de métricas exporta los resúmenes
+METRICAS_JSONL = os.path.join("metricas", "metricas.jsonl")
 
+@cronometrado("load_cotizaciones")
 def load_cotizaciones():
-    """Carga las cotizaciones desde un archivo JSON."""
-    if os.path.exists(COTIZACIONES_FILE):
-        try:
-            with open(COTIZACIONES_FILE, "r") as file:
-                return json.load(file)
-        except json.JSONDecodeError:
-            return []  # Retorna lista vacía si hay un error en el JSON
-    return []
+    """Carga las cotizaciones desde el almacén."""
+    return obtener_almacen().todas()
 
+@cronometrado("save_cotizacion")
 def save_cotizacion(datos_cliente, productos):
-    """Guarda una nueva cotización en el JSON."""
-    cotizaciones = load_cotizaciones()
-    cotizacion = {
-        "id": 1500 + len(cotizaciones),
-        "fecha": datetime.now().strftime("%d/%m/%Y"),
-        "datos del cliente": datos_cliente,
-        "productos": productos
-    }
-    cotizaciones.append(cotizacion)
-
-    with open(COTIZACIONES_FILE, "w") as file:
-        json.dump(cotizaciones, file, indent=4)
-    return cotizacion
+    """Guarda una nueva cotización anexándola al almacén (las estadísticas se actualizan solas).
+
+    Antes de guardar, cada producto se registra en el catálogo con su último
+    precio y recibe su código.
+    """
+    obtener_analitica()
+    obtener_catalogo().registrar(productos)
+    return obtener_almacen().agregar(datos_cliente, productos)
+
+def autocompletar_cliente():
+    """Llena los datos del cliente si el RUC ingresado ya está en el directorio."""
+    cliente = obtener_almacen().clientes.buscar(st.session_state.get("cliente_ruc"))
+    if cliente:
+        st.session_state["cliente_nombre"] = cliente.get("Nombre del cliente", "")
+        st.session_state["cliente_telefono"] = cliente.get("Telefono", "")
+        st.session_state["cliente_email"] = cliente.get("E-mail", "")
+        st.session_state["cliente_direccion"] = cliente.get("Dirección", "")
+
+def aplicar_sugerencia(i):
+    """Copia el producto elegido del catálogo a los campos del producto ``i``."""
+    producto = obtener_catalogo().obtener(st.session_state.get(f"sugerencia_{i}"))
+    if producto:
+        st.session_state[f"codigo_{i}"] = producto["codigo"]
+        st.session_state[f"desc_{i}"] = producto["descripcion"]
+        st.session_state[f"precio_{i}"] = float(producto["precio"])
+
+def problemas_cotizacion(datos_cliente, productos, errores):
+    """Motivos por los que todavía no se puede guardar la cotización (lista vacía si está lista)."""
+    problemas = []
+    if not all(datos_cliente.values()):
+        problemas.append("Complete todos los datos del cliente")
+    problemas += errores
+    if not productos and not errores:
+        problemas.append("Agregue al menos un producto")
+    return problemas
+
+def crear_cotizacion(datos_cliente, productos):
+    """Guarda la cotización nueva y encola su PDF."""
+    cotizacion = save_cotizacion(datos_cliente, productos)
+    st.session_state["cotizacion_creada"] = cotizacion['id']
+    encolar_pdf("pdf_nueva_cotizacion", cotizacion)
+
+def completar_desde_catalogo(filas):
+    """Llena descripción y precio de las filas que solo traen el código de un producto del catálogo."""
+    catalogo = obtener_catalogo()
+    for fila in filas:
+        if fila["codigo"] and (not fila["descripcion"] or fila["precio"] is None):
+            producto = catalogo.obtener(fila["codigo"])
+            if producto:
+                fila["descripcion"] = fila["descripcion"] or producto["descripcion"]
+                if fila["precio"] is None:
+                    fila["precio"] = float(producto["precio"])
+    return filas
+
+def productos_en_tabla(datos_cliente):
+    """Carga masiva de productos en una tabla editable.
+
+    La tabla está dentro de un formulario: editarla o pegar cientos de
+    líneas no vuelve a ejecutar la página; todo se valida y se suma una sola
+    vez al presionar un botón.
+    """
+    version = st.session_state.setdefault("tabla_version", 0)
+    with st.form("productos_tabla"):
+        editadas = st.data_editor(
+            st.session_state.get("tabla_filas") or [dict(FILA_VACIA)],
+            key=f"tabla_productos_{version}", num_rows="dynamic", use_container_width=True,
+            column_order=["codigo", "descripcion", "precio", "cantidad"],
+            column_config={
+                "codigo": st.column_config.TextColumn("Código", width="small"),
+                "descripcion": st.column_config.TextColumn("Descripción", width="large"),
+                "precio": st.column_config.NumberColumn("Precio", min_value=0.0, format="%.2f"),
+                "cantidad": st.column_config.NumberColumn("Cantidad", min_value=0.0, default=1.0),
+            },
+        )
+        pegado = st.text_area(
+            "Pegar líneas desde Excel o Google Sheets (código, descripción, precio, cantidad)",
+            key=f"tabla_pegado_{version}", height=100,
+            help="Se aceptan columnas separadas por tabulador o por punto y coma; "
+                 "con 3 columnas se asume descripción, precio y cantidad."
+        )
+        col1, col2 = st.columns(2)
+        revisar = col1.form_submit_button("Revisar y calcular totales")
+        generar = col2.form_submit_button("Generar Cotización", type="primary")
+
+    if revisar or generar:
+        filas = completar_desde_catalogo([normalizar_linea(f) for f in list(editadas) + leer_pegado(pegado)])
+        productos, errores = validar_lineas(filas)
+        problemas = problemas_cotizacion(datos_cliente, productos, errores) if generar else errores
+        if generar and not problemas:
+            crear_cotizacion(datos_cliente, productos)
+            filas, revision = [], None
+        else:
+            totales = calcular_totales(productos)
+            revision = {"problemas": problemas, "lineas": len(productos), "subtotal": totales["subtotal"],
+                        "igv": totales["igv"], "total": totales["total"]}
+        # La tabla se vuelve a dibujar con lo pegado y lo completado desde el catálogo
+        st.session_state["tabla_filas"] = [f for f in filas if f["codigo"] or f["descripcion"] or f["precio"]]
+        st.session_state["tabla_revision"] = revision
+        st.session_state["tabla_version"] = version + 1
+        st.rerun()
+
+    revision = st.session_state.get("tabla_revision")
+    if revision:
+        if revision["problemas"]:
+            st.warning("\n".join(f"- {problema}" for problema in revision["problemas"]))
+        st.info(
+            f"{revision['lineas']} líneas válidas · Subtotal: {soles(revision['subtotal'])} · "
+            f"IGV: {soles(revision['igv'])} · Total: {soles(revision['total'])}"
+        )
+
+def mostrar_trabajo_pdf(clave, nombre_archivo):
+    """Muestra el avance del PDF encolado en ``st.session_state[clave]`` y el botón de descarga al terminar.
+
+    Mientras el trabajo está pendiente vuelve a ejecutar el script cada medio
+    segundo para consultar su estado; el PDF se genera en el pool compartido,
+    no en la sesión.
+    """
+    id_trabajo = st.session_state.get(clave)
+    if not id_trabajo:
+        return
+    cola = obtener_cola()
+    trabajo = cola.trabajo(id_trabajo)
+    if trabajo is None:
+        st.warning("El PDF expiró, vuelva a generarlo.")
+        del st.session_state[clave]
+        return
+
+    if trabajo.estado == "listo":
+        st.download_button(
+            label="⬇️ Descargar PDF",
+            data=trabajo.pdf,
+            file_name=nombre_archivo,
+            mime='application/pdf',
+            key=f"descargar_{clave}"
+        )
+    elif trabajo.estado == "error":
+        st.error(f"Error al generar el PDF: {trabajo.error}")
+        del st.session_state[clave]
+    else:
+        if trabajo.estado == "en cola":
+            texto = f"PDF en cola ({cola.posicion(id_trabajo)} antes)..."
+        else:
+            texto = f"Generando PDF... {trabajo.segundos:.1f} s"
+        # Avance estimado con la latencia típica de los últimos PDFs
+        tipica = cola.estadisticas()["latencia_p50_s"] or 1.0
+        st.progress(min(trabajo.segundos / (tipica * 1.5), 0.95), text=texto)
+        time.sleep(0.5)
+        st.rerun()
+
+def encolar_pdf(clave, cotizacion):
+    """Envía el PDF de la cotización al pool y guarda el id del trabajo en la sesión."""
+    id_trabajo = obtener_cola().enviar(cotizacion)
+    if id_trabajo is None:
+        st.warning("Hay muchos PDFs en proceso, intente nuevamente en unos segundos.")
+    else:
+        st.session_state[clave] = id_trabajo
+
+def pagina_metricas():
+    """Página de operación (oculta, se abre con ?admin=1): tiempos de las rutas calientes."""
+    st.header("Métricas")
+    activas = st.toggle("Medir tiempos", value=metricas.ACTIVAS,
+                        help="Apagarlo deja las funciones sin instrumentar (sin costo)")
+    metricas.activar(activas)
+
+    resumen = metricas.resumen()
+    if resumen:
+        st.dataframe([
+            {"Medición": nombre, "Unidad": datos["unidad"], "Cantidad": datos["cantidad"],
+             "p50": datos["p50"], "p95": datos["p95"], "p99": datos["p99"],
+             "Máximo": datos["max"], "Promedio": datos["promedio"]}
+            for nombre, datos in resumen.items()
+        ], hide_index=True, use_container_width=True)
+        st.caption(f"Percentiles sobre las últimas {metricas.MUESTRAS_POR_NOMBRE} mediciones de cada una; "
+                   "los PDFs generados en segundo plano se suman al terminar.")
+    else:
+        st.info("Todavía no hay mediciones.")
+
+    col1, col2 = st.columns(2)
+    if col1.button("Exportar a JSONL"):
+        ruta = metricas.exportar(METRICAS_JSONL)
+        st.success(f"Resumen anexado a {ruta}")
+    if os.path.exists(METRICAS_JSONL):
+        with open(METRICAS_JSONL, "rb") as archivo:
+            col1.download_button("Descargar exportaciones", archivo.read(),
+                                 file_name="metricas.jsonl", mime="application/x-ndjson")
+    if col2.button("Reiniciar mediciones"):
+        metricas.reiniciar()
+        st.rerun()
+
+    st.subheader("Perfil de una sola ejecución (cProfile)")
+    objetivo = st.radio("Qué perfilar", ["PDF de la última cotización", "Cargar todas las cotizaciones"],
+                        horizontal=True)
+    if st.button("Perfilar"):
+        if objetivo == "Cargar todas las cotizaciones":
+            _, texto, datos_prof = metricas.perfilar(load_cotizaciones)
+        else:
+            almacen = obtener_almacen()
+            _, ultimas = almacen.buscar(por_pagina=1)
+            if not ultimas:
+                st.warning("No hay cotizaciones para perfilar")
+                return
+            from pdf_generator import generar_cotizacion_pdf
+            _, texto, datos_prof = metricas.perfilar(generar_cotizacion_pdf, almacen.obtener(ultimas[0]["id"]))
+        st.code(texto)
+        st.download_button("Descargar .prof", datos_prof, file_name="perfil.prof",
+                           mime="application/octet-stream")
 
 def main():
     """Función principal de la aplicación."""
@@ -46,10 +247,29 @@ def main():
     
     st.title("Sistema de Cotizaciones ACESMA INOX")
     
-    menu = st.sidebar.selectbox(
-        "Menú",
-        ["Crear Cotización", "Ver Cotizaciones"]
-    )
+    opciones_menu = ["Crear Cotización", "Ver Cotizaciones", "Dashboard", "Catálogo"]
+    if st.query_params.get("admin") == "1":
+        opciones_menu.append("Métricas")
+    menu = st.sidebar.selectbox("Menú", opciones_menu)
+
+    with st.sidebar.expander("Generación de PDFs"):
+        estado_cola = obtener_cola().estadisticas()
+        st.markdown(
+            f"- **En cola:** {estado_cola['en_cola']}\n"
+            f"- **Generando:** {estado_cola['generando']} de {estado_cola['procesos']} procesos\n"
+            f"- **Latencia p50 / p95:** {estado_cola['latencia_p50_s'] or '-'} s / "
+            f"{estado_cola['latencia_p95_s'] or '-'} s\n"
+            f"- **Completados / errores / rechazados:** {estado_cola['completados']} / "
+            f"{estado_cola['errores']} / {estado_cola['rechazados']}"
+        )
+    with st.sidebar.expander("Caché de cotizaciones"):
+        estado_cache = obtener_almacen().estadisticas_todas
+        st.markdown(
+            f"- **Lecturas servidas desde memoria:** {estado_cache['aciertos']}\n"
+            f"- **Lecturas solo de la cola nueva:** {estado_cache['incrementales']}\n"
+            f"- **Lecturas completas del log:** {estado_cache['completas']}\n"
+            f"- **Parseos evitados:** {estado_cache['parseos_evitados']}"
+        )
     
     if menu == "Crear Cotización":
         st.header("Nueva Cotización")
@@ -59,107 +279,272 @@ def main():
         col1, col2 = st.columns(2)
 
         with col1:
-            nombre = st.text_input("Nombre del Cliente")
-            ruc = st.text_input("RUC")
-            telefono = st.text_input("Teléfono")
+            ruc = st.text_input("RUC", key="cliente_ruc", on_change=autocompletar_cliente)
+            nombre = st.text_input("Nombre del Cliente", key="cliente_nombre")
+            telefono = st.text_input("Teléfono", key="cliente_telefono")
 
         with col2:
-            email = st.text_input("Email")
-            direccion = st.text_input("Dirección")
+            email = st.text_input("Email", key="cliente_email")
+            direccion = st.text_input("Dirección", key="cliente_direccion")
+
+        datos_cliente = {
+            "Nombre del cliente": nombre,
+            "RUC": ruc,
+            "Telefono": telefono,
+            "E-mail": email,
+            "Dirección": direccion
+        }
 
         # Productos
         st.subheader("Productos")
+        modo = st.radio("Carga de productos", ["Línea por línea", "Tabla (carga masiva)"], horizontal=True,
+                        help="La tabla es más rápida para muchas líneas y permite pegar desde una hoja de cálculo")
+
+        if modo == "Tabla (carga masiva)":
+            productos_en_tabla(datos_cliente)
+
+        else:
+            catalogo = obtener_catalogo()
+
+            lineas = []
+            num_productos = st.number_input("Número de productos", min_value=1, value=1)
 
-        productos = []
-        num_productos = st.number_input("Número de productos", min_value=1, value=1)
+            for i in range(int(num_productos)):
+                st.markdown(f"### Producto {i+1}")
 
-        for i in range(int(num_productos)):
-            st.markdown(f"### Producto {i+1}")
-            col1, col2, col3 = st.columns(3)
+                # Autocompletado desde el catálogo: llena código, descripción y último precio
+                texto_catalogo = st.text_input("Buscar en catálogo (código o descripción)", key=f"buscar_{i}")
+                if texto_catalogo:
+                    sugerencias = {p["codigo"]: p for p in catalogo.buscar(texto_catalogo)}
+                    st.selectbox(
+                        "Sugerencias", list(sugerencias), index=None, key=f"sugerencia_{i}",
+                        placeholder=f"{len(sugerencias)} productos encontrados" if sugerencias else "Sin coincidencias",
+                        format_func=lambda c, s=sugerencias: f"{c} · {s[c]['descripcion']} · S/ {s[c]['precio']}",
+                        on_change=aplicar_sugerencia, args=(i,)
+                    )
 
+                col0, col1, col2, col3 = st.columns([1, 3, 1, 1])
+
+                with col0:
+                    codigo = st.text_input(f"Código", key=f"codigo_{i}")
+                with col1:
+                    descripcion = st.text_input(f"Descripción", key=f"desc_{i}")
+                with col2:
+                    precio = st.number_input(f"Precio", min_value=0.0, key=f"precio_{i}")
+                with col3:
+                    cantidad = st.number_input(f"Cantidad", min_value=1, key=f"cant_{i}")
+
+                lineas.append({"codigo": codigo, "descripcion": descripcion, "precio": precio, "cantidad": cantidad})
+
+            if st.button("Generar Cotización"):
+                # Las líneas con precio cero se guardan; las incompletas se informan en vez de descartarse
+                productos, errores = validar_lineas(lineas)
+                problemas = problemas_cotizacion(datos_cliente, productos, errores)
+                if problemas:
+                    st.warning("\n".join(f"- {problema}" for problema in problemas))
+                else:
+                    crear_cotizacion(datos_cliente, productos)
+
+        if "cotizacion_creada" in st.session_state:
+            st.success(f"Cotización #{st.session_state['cotizacion_creada']} generada exitosamente!")
+            mostrar_trabajo_pdf(
+                "pdf_nueva_cotizacion", f"cotizacion_{st.session_state['cotizacion_creada']}.pdf"
+            )
+
+    elif menu == "Dashboard":
+        st.header("Dashboard de Ventas")
+        analitica = obtener_analitica()
+
+        if st.button("Reconstruir estadísticas"):
+            with st.spinner("Recalculando desde todas las cotizaciones..."):
+                analitica.reconstruir()
+        else:
+            # Solo se leen las cotizaciones agregadas desde la última actualización
+            analitica.actualizar()
+        resumen = analitica.resumen()
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Cotizaciones", resumen["cotizaciones"])
+        col2.metric("Volumen cotizado", soles(resumen["total"]))
+        promedio = resumen["total"] // resumen["cotizaciones"] if resumen["cotizaciones"] else 0
+        col3.metric("Promedio por cotización", soles(promedio))
+
+        if not resumen["cotizaciones"]:
+            st.info("No hay cotizaciones registradas")
+        else:
+            st.subheader("Volumen cotizado por mes (S/)")
+            st.bar_chart({
+                "Volumen": {mes: valores["total"] / 100 for mes, valores in resumen["por_mes"].items()}
+            })
+
+            col1, col2 = st.columns(2)
             with col1:
-                descripcion = st.text_input(f"Descripción", key=f"desc_{i}")
+                st.subheader("Principales clientes")
+                st.dataframe([
+                    {
+                        "RUC": cliente["ruc"],
+                        "Cliente": cliente["nombre"],
+                        "Cotizaciones": cliente["cotizaciones"],
+                        "Total": soles(cliente["total"]),
+                    }
+                    for cliente in resumen["top_clientes"]
+                ], hide_index=True, use_container_width=True)
             with col2:
-                precio = st.number_input(f"Precio", min_value=0.0, key=f"precio_{i}")
-            with col3:
-                cantidad = st.number_input(f"Cantidad", min_value=1, key=f"cant_{i}")
-
-            if descripcion and precio and cantidad:
-                productos.append({
-                    "descripcion": descripcion,
-                    "precio": precio,
-                    "cantidad": cantidad
-                })
-
-        if st.button("Generar Cotización"):
-            if nombre and ruc and telefono and email and direccion and productos:
-                datos_cliente = {
-                    "Nombre del cliente": nombre,
-                    "RUC": ruc,
-                    "Telefono": telefono,
-                    "E-mail": email,
-                    "Dirección": direccion
-                }
-
-                cotizacion = save_cotizacion(datos_cliente, productos)
-                if cotizacion:
-                    try:
-                        pdf_data = generar_cotizacion_pdf(cotizacion)
-                        if pdf_data:
-                            st.success("Cotización generada exitosamente!")
-                            st.download_button(
-                                label="⬇️ Descargar Cotización PDF",
-                                data=pdf_data,
-                                file_name=f"cotizacion_{cotizacion['id']}.pdf",
-                                mime='application/pdf'
-                            )
-                        else:
-                            st.error("Error al generar el PDF, el archivo está vacío.")
-                    except Exception as e:
-                        st.error(f"Error al generar el PDF: {str(e)}")
+                st.subheader("Productos más cotizados")
+                st.dataframe([
+                    {
+                        "Descripción": producto["descripcion"],
+                        "Veces": producto["veces"],
+                        "Cantidad": producto["cantidad"],
+                        "Total": soles(producto["total"]),
+                    }
+                    for producto in resumen["top_productos"]
+                ], hide_index=True, use_container_width=True)
+
+    elif menu == "Métricas":
+        pagina_metricas()
+
+    elif menu == "Catálogo":
+        st.header("Catálogo de Productos")
+        catalogo = obtener_catalogo()
+        st.caption(f"{len(catalogo)} productos")
+
+        texto = st.text_input("Buscar por código o descripción", key="catalogo_buscar")
+        encontrados = catalogo.buscar(texto, limite=50) if texto else []
+        opciones = {p["codigo"]: p for p in encontrados}
+        seleccionado = st.selectbox(
+            "Producto", [None] + list(opciones),
+            format_func=lambda c: "➕ Nuevo producto" if c is None else f"{c} · {opciones[c]['descripcion']}",
+            key="catalogo_producto"
+        )
+        actual = opciones.get(seleccionado, {})
+
+        with st.form("catalogo_formulario"):
+            descripcion = st.text_input("Descripción", value=actual.get("descripcion", ""))
+            precio = st.number_input("Último precio", min_value=0.0, value=float(actual.get("precio", 0)))
+            col1, col2 = st.columns(2)
+            guardar = col1.form_submit_button("Guardar")
+            eliminar = col2.form_submit_button("Eliminar", disabled=not seleccionado)
+        if guardar:
+            if descripcion.strip():
+                codigo = catalogo.guardar_producto(seleccionado, descripcion, precio)
+                st.success(f"Producto {codigo} guardado")
             else:
-                st.warning("Por favor complete todos los campos")
+                st.warning("La descripción no puede estar vacía")
+        elif eliminar:
+            catalogo.eliminar(seleccionado)
+            st.success(f"Producto {seleccionado} eliminado")
+
+        if st.button("Reconstruir desde el historial de cotizaciones"):
+            with st.spinner("Leyendo todas las cotizaciones..."):
+                st.success(f"Catálogo reconstruido: {catalogo.reconstruir()} productos")
 
     else:  # Ver Cotizaciones
         st.header("Cotizaciones Existentes")
-        cotizaciones = load_cotizaciones()
+        almacen = obtener_almacen()
+
+        # Filtros de búsqueda (se resuelven con los índices del almacén)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            filtro_ruc = st.text_input("Buscar por RUC")
+        with col2:
+            filtro_nombre = st.text_input("Buscar por nombre del cliente")
+        with col3:
+            filtro_fechas = st.date_input("Rango de fechas", value=(), format="DD/MM/YYYY")
+
+        desde = hasta = None
+        if len(filtro_fechas) == 2:
+            desde, hasta = filtro_fechas
+        elif len(filtro_fechas) == 1:
+            desde = filtro_fechas[0]
 
-        if not cotizaciones:
+        pagina = st.session_state.get("pagina_cotizaciones", 1)
+        total, resumenes = almacen.buscar(
+            ruc=filtro_ruc, nombre=filtro_nombre, desde=desde, hasta=hasta,
+            pagina=pagina, por_pagina=COTIZACIONES_POR_PAGINA
+        )
+        total_paginas = max(1, -(-total // COTIZACIONES_POR_PAGINA))
+        if pagina > total_paginas:
+            pagina = total_paginas
+            st.session_state["pagina_cotizaciones"] = pagina
+            total, resumenes = almacen.buscar(
+                ruc=filtro_ruc, nombre=filtro_nombre, desde=desde, hasta=hasta,
+                pagina=pagina, por_pagina=COTIZACIONES_POR_PAGINA
+            )
+
+        if not total:
             st.info("No hay cotizaciones registradas")
         else:
-            for cotizacion in cotizaciones:
-                with st.expander(f"Cotización #{cotizacion['id']} - {cotizacion['datos del cliente']['Nombre del cliente']}"):
+            with st.expander(f"📦 Exportar las {total} cotizaciones filtradas a ZIP"):
+                if st.button("Generar ZIP de PDFs", key="exportar_zip"):
+                    os.makedirs(os.path.join("pdfs", "exportaciones"), exist_ok=True)
+                    ruta_zip = os.path.join(
+                        "pdfs", "exportaciones", f"cotizaciones_{datetime.now():%Y%m%d_%H%M%S}.zip"
+                    )
+                    barra = st.progress(0.0, text="Generando PDFs...")
+                    cotizaciones = seleccionar_cotizaciones(
+                        almacen, ruc=filtro_ruc, nombre=filtro_nombre, desde=desde, hasta=hasta
+                    )
+                    resultado = exportar_zip(
+                        cotizaciones, ruta_zip,
+                        progreso=lambda hechos: barra.progress(hechos / total, text=f"{hechos}/{total} PDFs")
+                    )
+                    st.success(
+                        f"{resultado['pdfs']} PDFs en {resultado['segundos']:.1f} s "
+                        f"({resultado['pdfs_por_segundo']:.1f} PDFs/s, {resultado['procesos']} procesos)"
+                    )
+                    with open(ruta_zip, "rb") as archivo_zip:
+                        st.download_button(
+                            label="⬇️ Descargar ZIP",
+                            data=archivo_zip,
+                            file_name=os.path.basename(ruta_zip),
+                            mime="application/zip",
+                            key="descargar_zip"
+                        )
+
+            st.number_input(
+                f"Página (de {total_paginas})", min_value=1, max_value=total_paginas,
+                key="pagina_cotizaciones"
+            )
+            primero = (pagina - 1) * COTIZACIONES_POR_PAGINA + 1
+            st.caption(f"Mostrando {primero}-{primero + len(resumenes) - 1} de {total} cotizaciones")
+
+            for resumen in resumenes:
+                with st.expander(f"Cotización #{resumen['id']} - {resumen['nombre']}"):
+                    st.write(f"**Fecha:** {resumen['fecha']} | **RUC:** {resumen['ruc']}")
+
+                    # El detalle completo solo se lee del almacén al pedirlo
+                    if not st.toggle("Ver detalle", key=f"detalle_{resumen['id']}"):
+                        continue
+                    cotizacion = almacen.obtener(resumen['id'])
+
                     st.write("### Datos del Cliente")
-                    for key, value in cotizacion['datos del cliente'].items():
-                        st.write(f"**{key}:** {value}")
+                    st.markdown("\n".join(
+                        f"- **{key}:** {value}" for key, value in cotizacion['datos del cliente'].items()
+                    ))
 
                     st.write("### Productos")
+                    tasa = tasa_de(cotizacion)
                     for producto in cotizacion['productos']:
-                        subtotal = producto['precio'] * producto['cantidad']
-                        impuesto = subtotal * 0.18
-                        total = subtotal + impuesto
-                        st.write(f"- **{producto['descripcion']}**")
-                        st.write(f"  Precio: S/ {producto['precio']:.2f}")
-                        st.write(f"  Cantidad: {producto['cantidad']}")
-                        st.write(f"  Subtotal: S/ {subtotal:.2f}")
-                        st.write(f"  IGV (18%): S/ {impuesto:.2f}")
-                        st.write(f"  Total: S/ {total:.2f}")
-
-                    if st.button("Descargar PDF", key=f"pdf_{cotizacion['id']}"):
-                        try:
-                            pdf_data = generar_cotizacion_pdf(cotizacion)
-                            if pdf_data:
-                                st.download_button(
-                                    label="⬇️ Descargar PDF",
-                                    data=pdf_data,
-                                    file_name=f"cotizacion_{cotizacion['id']}.pdf",
-                                    mime='application/pdf',
-                                    key=f'download-pdf-{cotizacion["id"]}'
-                                )
-                            else:
-                                st.error("Error al generar el PDF, el archivo está vacío.")
-                        except Exception as e:
-                            st.error(f"Error al generar el PDF: {str(e)}")
+                        linea = linea_de(producto, tasa)
+                        st.markdown(
+                            f"- **{producto['descripcion']}**  \n"
+                            f"  Precio: {soles(a_centimos(producto['precio']))}  \n"
+                            f"  Cantidad: {producto['cantidad']}  \n"
+                            f"  Subtotal: {soles(linea['subtotal'])}  \n"
+                            f"  IGV ({porcentaje(tasa)}%): {soles(linea['impuesto'])}  \n"
+                            f"  Total: {soles(linea['total'])}"
+                        )
+                    totales = totales_de(cotizacion)
+                    st.write(f"**Total de la cotización:** {soles(totales['total'])}")
+
+                    clave_pdf = f"pdf_{cotizacion['id']}"
+                    if st.button("Descargar PDF", key=f"boton_{clave_pdf}"):
+                        encolar_pdf(clave_pdf, cotizacion)
+                    mostrar_trabajo_pdf(clave_pdf, f"cotizacion_{cotizacion['id']}.pdf")
+
+    # Con la página ya dibujada, los procesos que generan PDFs arrancan en segundo plano
+    obtener_cola().precalentar()
 
 if __name__ == "__main__":
     main()  # Llamar a la función principal sin usar subprocess
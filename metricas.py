@@ -0,0 +1,163 @@
+import io
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+# Las mediciones se apagan con ACESMA_METRICAS=0 o desde la página de administración
+ACTIVAS = os.getenv("ACESMA_METRICAS", "1") != "0"
+# Si se define, cada medición se anexa como una línea JSON a este archivo
+RUTA_LOG = os.getenv("ACESMA_METRICAS_LOG")
+# Mediciones recientes que se guardan por nombre para calcular percentiles
+MUESTRAS_POR_NOMBRE = 1000
+
+_lock = threading.Lock()
+_muestras = {}   # nombre -> deque de valores recientes
+_conteos = {}    # nombre -> [cantidad total, suma total]
+_unidades = {}   # nombre -> "ms" o "bytes"
+_local = threading.local()
+_SIN_MEDICION = nullcontext()
+
+
+def activar(activas=True):
+    """Enciende o apaga las mediciones de todo el proceso."""
+    global ACTIVAS
+    ACTIVAS = activas
+
+
+def registrar(nombre, valor, unidad="ms"):
+    """Guarda una medición (milisegundos por defecto, o bytes u otra unidad)."""
+    if not ACTIVAS:
+        return
+    captura = getattr(_local, "captura", None)
+    if captura is not None:
+        captura.append((nombre, valor, unidad))
+    with _lock:
+        muestras = _muestras.get(nombre)
+        if muestras is None:
+            muestras = _muestras[nombre] = deque(maxlen=MUESTRAS_POR_NOMBRE)
+            _conteos[nombre] = [0, 0]
+            _unidades[nombre] = unidad
+        muestras.append(valor)
+        conteo = _conteos[nombre]
+        conteo[0] += 1
+        conteo[1] += valor
+        if RUTA_LOG:
+            with open(RUTA_LOG, "a", encoding="utf-8") as archivo:
+                archivo.write(json.dumps({"t": round(time.time(), 3), "nombre": nombre,
+                                          "valor": valor, "unidad": unidad}) + "\n")
+
+
+@contextmanager
+def _cronometro(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nombre, (time.perf_counter() - inicio) * 1000)
+
+
+def medir(nombre):
+    """Context manager que mide en milisegundos el bloque (no hace nada si están apagadas)."""
+    return _cronometro(nombre) if ACTIVAS else _SIN_MEDICION
+
+
+def cronometrado(nombre):
+    """Decorador que mide cada llamada a la función con ``medir(nombre)``."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ACTIVAS:
+                return funcion(*args, **kwargs)
+            with _cronometro(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+@contextmanager
+def capturar():
+    """Junta en una lista las mediciones hechas por este hilo dentro del bloque.
+
+    Sirve para devolver al proceso principal lo que se midió en un proceso
+    del pool (ver ``incorporar``).
+    """
+    anterior = getattr(_local, "captura", None)
+    _local.captura = []
+    try:
+        yield _local.captura
+    finally:
+        _local.captura = anterior
+
+
+def incorporar(muestras):
+    """Agrega mediciones capturadas en otro proceso."""
+    for nombre, valor, unidad in muestras:
+        registrar(nombre, valor, unidad)
+
+
+def resumen():
+    """Percentiles por nombre: cantidad, p50, p95, p99, máximo y promedio histórico."""
+    with _lock:
+        copia = {nombre: (sorted(muestras), list(_conteos[nombre]), _unidades[nombre])
+                 for nombre, muestras in _muestras.items()}
+
+    resultado = {}
+    for nombre, (valores, (cantidad, suma), unidad) in sorted(copia.items()):
+        def percentil(p, valores=valores):
+            return round(valores[min(len(valores) - 1, int(len(valores) * p))], 3)
+
+        resultado[nombre] = {
+            "unidad": unidad,
+            "cantidad": cantidad,
+            "p50": percentil(0.5),
+            "p95": percentil(0.95),
+            "p99": percentil(0.99),
+            "max": round(valores[-1], 3),
+            "promedio": round(suma / cantidad, 3),
+        }
+    return resultado
+
+
+def reiniciar():
+    with _lock:
+        _muestras.clear()
+        _conteos.clear()
+        _unidades.clear()
+
+
+def exportar(ruta):
+    """Anexa a ``ruta`` (JSONL) una línea con la fecha y el resumen actual de las métricas."""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "a", encoding="utf-8") as archivo:
+        archivo.write(json.dumps({"fecha": datetime.now().isoformat(timespec="seconds"),
+                                  "metricas": resumen()}, ensure_ascii=False) + "\n")
+    return ruta
+
+
+def perfilar(funcion, *args, lineas=40, **kwargs):
+    """Ejecuta una sola llamada bajo cProfile.
+
+    Devuelve ``(resultado, texto, datos_prof)``: el texto con las funciones
+    de mayor tiempo acumulado y los datos en formato .prof (para snakeviz o
+    ``python -m pstats``).
+    """
+    import cProfile
+    import marshal
+    import pstats
+
+    perfil = cProfile.Profile()
+    resultado = perfil.runcall(funcion, *args, **kwargs)
+
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(lineas)
+
+    # Mismo formato que Profile.dump_stats, sin pasar por un archivo
+    perfil.create_stats()
+    return resultado, salida.getvalue(), marshal.dumps(perfil.stats)
@@ -0,0 +1,223 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Subir este número cada vez que cambie el diseño del PDF en pdf_generator.py
+# (invalida la caché de PDFs). Está aquí y no allá para calcular claves y
+# buscar en la caché sin cargar ReportLab.
+VERSION_PLANTILLA = 4
+# Salida compacta de pdf_generator.py (por defecto): el logo se reduce una vez a
+# su tamaño impreso en lugar de incrustarlo a resolución completa.
+# Se apaga con ACESMA_PDF_COMPACTO=0.
+COMPACTO = os.getenv("ACESMA_PDF_COMPACTO", "1") != "0"
+# Resolución del logo reducido: a 300 dpi no se nota la diferencia al imprimir
+DPI_LOGO = 300
+# Directorio y límites por defecto de la caché de PDFs
+DIRECTORIO_CACHE = os.path.join("pdfs", "cache")
+MAX_MEMORIA_BYTES = 32 * 1024 * 1024
+MAX_DISCO_BYTES = 512 * 1024 * 1024
+
+
+def clave_cotizacion(cotizacion, compacto=COMPACTO):
+    """Hash del contenido canónico de la cotización más la versión y la variante de la plantilla.
+
+    La variante (compacta con el logo a ``DPI_LOGO`` o completa) entra en la
+    clave porque los dos modos generan PDFs distintos para la misma cotización.
+    """
+    canonico = json.dumps(cotizacion, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    variante = f"compacto-{DPI_LOGO}" if compacto else "completo"
+    contenido = f"{VERSION_PLANTILLA}\n{variante}\n{canonico}".encode("utf-8")
+    return hashlib.sha256(contenido).hexdigest()
+
+
+class CachePDF:
+    """Caché de PDFs direccionada por contenido, con dos niveles.
+
+    Primero busca en un LRU en memoria limitado por bytes y luego en archivos
+    ``<hash>.pdf`` dentro de ``directorio``; si no está en ninguno, genera el PDF
+    y lo guarda en ambos. El nivel de disco se limpia borrando los archivos
+    usados hace más tiempo cuando supera ``max_disco_bytes``.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, max_memoria_bytes=MAX_MEMORIA_BYTES,
+                 max_disco_bytes=MAX_DISCO_BYTES, generador=None):
+        self.directorio = directorio
+        self.max_memoria_bytes = max_memoria_bytes
+        self.max_disco_bytes = max_disco_bytes
+        self.generador = generador
+
+        self._lock = threading.Lock()
+        self._memoria = OrderedDict()  # hash -> bytes, del menos al más reciente
+        self._bytes_memoria = 0
+        self._bytes_disco = None       # se calcula al primer uso del disco
+
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+
+    # ------------------------------------------------------------------
+    # Nivel en memoria
+    # ------------------------------------------------------------------
+    def _leer_memoria(self, clave):
+        with self._lock:
+            datos = self._memoria.get(clave)
+            if datos is not None:
+                self._memoria.move_to_end(clave)
+            return datos
+
+    def _guardar_memoria(self, clave, datos):
+        if len(datos) > self.max_memoria_bytes:
+            return
+        with self._lock:
+            anterior = self._memoria.pop(clave, None)
+            if anterior is not None:
+                self._bytes_memoria -= len(anterior)
+            self._memoria[clave] = datos
+            self._bytes_memoria += len(datos)
+            while self._bytes_memoria > self.max_memoria_bytes:
+                _, expulsado = self._memoria.popitem(last=False)
+                self._bytes_memoria -= len(expulsado)
+
+    # ------------------------------------------------------------------
+    # Nivel en disco
+    # ------------------------------------------------------------------
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pdf")
+
+    def _leer_disco(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "rb") as archivo:
+                datos = archivo.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(ruta)  # marca de uso para el desalojo
+        except OSError:
+            pass
+        return datos
+
+    def _guardar_disco(self, clave, datos):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(datos)
+        os.replace(temporal, ruta)  # otros procesos nunca ven un PDF a medias
+
+        with self._lock:
+            if self._bytes_disco is None:
+                self._bytes_disco = self._medir_disco()
+            else:
+                self._bytes_disco += len(datos)
+            if self._bytes_disco > self.max_disco_bytes:
+                self._desalojar_disco()
+
+    def _archivos_disco(self):
+        archivos = []
+        try:
+            entradas = os.scandir(self.directorio)
+        except FileNotFoundError:
+            return archivos
+        with entradas:
+            for entrada in entradas:
+                if entrada.name.endswith(".pdf"):
+                    try:
+                        estado = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+        return archivos
+
+    def _medir_disco(self):
+        return sum(tamano for _, tamano, _ in self._archivos_disco())
+
+    def _desalojar_disco(self):
+        """Borra los PDFs usados hace más tiempo hasta quedar al 90% del límite."""
+        archivos = sorted(self._archivos_disco())
+        total = sum(tamano for _, tamano, _ in archivos)
+        objetivo = self.max_disco_bytes * 0.9
+        for _, tamano, ruta in archivos:
+            if total <= objetivo:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+        self._bytes_disco = total
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def _contar(self, contador):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def buscar(self, cotizacion):
+        """Devuelve el PDF si ya está en caché (memoria o disco), sin generarlo."""
+        clave = clave_cotizacion(cotizacion)
+
+        datos = self._leer_memoria(clave)
+        if datos is not None:
+            self._contar("aciertos_memoria")
+            return datos
+
+        datos = self._leer_disco(clave)
+        if datos is not None:
+            self._contar("aciertos_disco")
+            self._guardar_memoria(clave, datos)
+            return datos
+
+        self._contar("fallos")
+        return None
+
+    def guardar(self, cotizacion, datos):
+        """Guarda en ambos niveles un PDF generado fuera de la caché (p. ej. en otro proceso)."""
+        if datos:
+            clave = clave_cotizacion(cotizacion)
+            self._guardar_memoria(clave, datos)
+            self._guardar_disco(clave, datos)
+
+    def obtener(self, cotizacion):
+        """Devuelve los bytes del PDF de la cotización, generándolo solo si no está en caché."""
+        datos = self.buscar(cotizacion)
+        if datos is None:
+            if self.generador is None:
+                from pdf_generator import generar_cotizacion_pdf
+                self.generador = generar_cotizacion_pdf
+            datos = self.generador(cotizacion)
+            self.guardar(cotizacion, datos)
+        return datos
+
+    def estadisticas(self):
+        """Contadores de aciertos y fallos y ocupación de cada nivel."""
+        with self._lock:
+            return {
+                "aciertos_memoria": self.aciertos_memoria,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "entradas_memoria": len(self._memoria),
+                "bytes_memoria": self._bytes_memoria,
+                "bytes_disco": self._bytes_disco,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache():
+    """Devuelve la caché de PDFs compartida por todas las sesiones del proceso."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CachePDF()
+        return _cache
+
+
+def generar_cotizacion_pdf_cacheado(cotizacion):
+    """Igual que generar_cotizacion_pdf, pero reutiliza el PDF si ya se generó antes."""
+    return obtener_cache().obtener(cotizacion)
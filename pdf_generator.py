@@ -1,215 +1,487 @@
 import io
+import os
+import threading
 from datetime import datetime
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from precios import a_centimos, linea_de, soles, tasa_de
+from metricas import cronometrado, medir, registrar
+# La versión de la plantilla (VERSION_PLANTILLA) está en pdf_cache.py: subirla
+# cada vez que cambie el diseño del PDF. COMPACTO y DPI_LOGO también están
+# allá porque forman parte de la clave de la caché.
+from pdf_cache import COMPACTO, DPI_LOGO
 
-def generar_cotizacion_pdf(cotizacion):
-    # Crear un buffer en memoria para el PDF
-    buffer = io.BytesIO()
-    
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=30,
-        leftMargin=30,
-        topMargin=30,
-        bottomMargin=30
-    )
-    
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Crear estilos personalizados
-    styles.add(ParagraphStyle(
-        name='Empresa',
-        fontSize=16,
-        alignment=1,  # Centro
-        spaceAfter=20
-    ))
-    
-    styles.add(ParagraphStyle(
-        name='DatosEmpresa',
-        fontSize=8,
-        leading=10
-    ))
-    
-    styles.add(ParagraphStyle(
-        name='TituloCotizacion',
-        fontSize=14,
-        alignment=2,  # Derecha
-        spaceBefore=10,
-        spaceAfter=20
-    ))
-    
-    # Estilo para la descripción de los productos (para ajustar el texto y que se expanda la celda)
-    style_descripcion = ParagraphStyle(
-        name='DescripcionProducto',
-        fontSize=8,
-        leading=10,
-        leftIndent=0,
-        rightIndent=0
-    )
-    
-    # Cargar el logo
-    logo_path = "logo.png"  # Asegúrate de que este archivo se encuentre en la ruta indicada
-    try:
-        # Ajusta el ancho y alto según tus necesidades
-        logo = Image(logo_path, width=1.5*inch, height=1*inch)
-    except Exception as e:
-        # En caso de error, se utiliza el texto "ACESMA INOX"
-        logo = Paragraph("ACESMA INOX", styles['Empresa'])
-    
-    # Información de la empresa y cotización (encabezado)
-    data_header = [
-        [logo, 'COTIZACIÓN'],
-        ['Calle Constantino Carvallo N°276 Urb. Santa Catina, La Victoria', f'FECHA: {datetime.now().strftime("%d/%m/%Y")}'],
-        ['Ciudad: Lima', f'COTIZACIÓN #: {cotizacion["id"]}'],
-        ['Sitio Web: acesmainox.com', f'CLIENTE ID: {cotizacion["datos del cliente"]["RUC"]}'],
-        ['Teléfono: 952439843 | 980165809 | 92049843', 'VÁLIDO HASTA:'],
-        ['E-mail: contacto@acesmainox.com', ''],
-        ['Asesor de venta: Arturo Ledesma', ''],
-        ['Cuenta Corriente Soles Interbank: 2003003503664', ''],
-        ['CCI: 00320000300350366436', '']
-    ]
-    
-    t_header = Table(data_header, colWidths=[4.5*inch, 2.5*inch])
-    t_header.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 1),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-    ]))
-    elements.append(t_header)
-    elements.append(Spacer(1, 20))
-    
-    # Datos del cliente
-    data_cliente = [
-        ['CLIENTE', ''],
-        ['Nombre:', cotizacion['datos del cliente']['Nombre del cliente']],
-        ['Email:', cotizacion['datos del cliente']['E-mail']],
-        ['Dirección:', cotizacion['datos del cliente']['Dirección']],
-        ['RUC:', cotizacion['datos del cliente']['RUC']],
-        ['Teléfono:', cotizacion['datos del cliente']['Telefono']]
-    ]
-    
-    t_cliente = Table(data_cliente, colWidths=[1.5*inch, 5.5*inch])
-    t_cliente.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1C4E4E')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 1),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-    ]))
-    elements.append(t_cliente)
-    elements.append(Spacer(1, 20))
-    
-    # Tabla de productos con anchos ajustados
-    col_widths = [0.7*inch, 2.8*inch, 0.5*inch, 0.75*inch, 0.75*inch, 0.75*inch, 0.75*inch]  # Total = 7 inches
-    data_productos = [['CÓDIGO', 'DESCRIPCIÓN', 'CANT.', 'VALOR', 'SUBTOTAL', 'IMPUESTO', 'TOTAL']]
-    
-    total_general = 0
-    for producto in cotizacion['productos']:
-        subtotal = producto['precio'] * producto['cantidad']
-        impuesto = subtotal * 0.18  # IGV 18%
-        total = subtotal + impuesto
-        total_general += total
-        
-        # Envolver la descripción en un Paragraph para que se ajuste y la celda se expanda verticalmente
-        descripcion_paragraph = Paragraph(producto['descripcion'], style_descripcion)
-        
-        data_productos.append([
-            '',  # Código (vacío o agrega el valor correspondiente si lo tienes)
-            descripcion_paragraph,
-            str(producto['cantidad']),
-            f"S/ {producto['precio']:.2f}",
-            f"S/ {subtotal:.2f}",
-            f"S/ {impuesto:.2f}",
-            f"S/ {total:.2f}"
+LOGO_PATH = "logo.png"
+
+
+def _logo_reducido(ruta, width, height, dpi):
+    """El logo reducido a ``dpi`` para su tamaño impreso (en puntos) y aplanado sobre blanco.
+
+    El PDF lleva la imagen con los píxeles que tenga, aunque se imprima
+    pequeña; aplanar la transparencia sobre el fondo blanco de la página
+    ahorra además la máscara, sin cambiar lo que se ve.
+    """
+    from PIL import Image as ImagenPIL
+
+    with ImagenPIL.open(ruta) as imagen:
+        imagen = imagen.convert("RGBA")
+    fondo = ImagenPIL.new("RGB", imagen.size, "white")
+    fondo.paste(imagen, mask=imagen.getchannel("A"))
+    tamano = (min(imagen.width, round(width / inch * dpi)), min(imagen.height, round(height / inch * dpi)))
+    if tamano != fondo.size:
+        # reducing_gap reduce primero por bloques (rápido) y deja el filtro fino para el final
+        fondo = fondo.resize(tamano, ImagenPIL.LANCZOS, reducing_gap=3.0)
+    return ImageReader(fondo)
+
+
+_logos = {}
+_logos_lock = threading.Lock()
+
+
+def _logo(ruta, width, height, dpi=None):
+    """``ImageReader`` del logo, decodificado una sola vez por proceso para cada ruta y resolución.
+
+    Con ``dpi`` la imagen se reduce antes a esa resolución (ver ``_logo_reducido``).
+    Los píxeles se leen al crearlo, así que después los hilos solo lo leen.
+    """
+    clave = (ruta, width, height, dpi)
+    with _logos_lock:
+        imagen = _logos.get(clave)
+        if imagen is None:
+            imagen = ImageReader(ruta) if dpi is None else _logo_reducido(ruta, width, height, dpi)
+            imagen.getRGBData()
+            _logos[clave] = imagen
+        return imagen
+
+
+class _DibujoLogo(Flowable):
+    """Logo de un documento, dibujado con ``canvas.drawImage`` desde el ``ImageReader`` compartido.
+
+    Se crea uno por documento: ReportLab guarda el canvas en el flowable
+    mientras lo dibuja, así que un flowable compartido no sirve entre hilos.
+    """
+
+    def __init__(self, imagen, width, height):
+        Flowable.__init__(self)
+        self.imagen = imagen
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.imagen, 0, 0, self.width, self.height, mask="auto")
+
+
+class _TablaProductos(Flowable):
+    """Tabla de productos que se arma por páginas a partir de un iterador de filas.
+
+    En lugar de una sola ``Table`` con todas las filas (que ReportLab vuelve a
+    medir completa cada vez que la parte entre páginas), en cada página se
+    toma un bloque de filas del iterador, se arma una tabla pequeña y se deja
+    en ella solo lo que cabe; lo que sobra queda pendiente para la página
+    siguiente, que vuelve a empezar con la fila de encabezado. Así nunca hay
+    en memoria más de un bloque de filas y el tiempo crece de forma lineal.
+    """
+
+    FILAS_POR_BLOQUE = 60
+
+    def __init__(self, renderizador, productos, tasa):
+        Flowable.__init__(self)
+        self._renderizador = renderizador
+        self._filas = renderizador._filas_productos(productos, tasa)
+        self._pendientes = []
+        self._agotado = False
+        self._con_cabecera = True  # la tabla de esta página lleva encabezado
+        self._vacia = True         # todavía no se colocó ninguna tabla
+        self.total_general = 0  # en céntimos
+
+    def _tomar(self, cantidad):
+        """Completa las filas pendientes hasta ``cantidad`` leyendo del iterador."""
+        while not self._agotado and len(self._pendientes) < cantidad:
+            try:
+                fila, total = next(self._filas)
+            except StopIteration:
+                self._agotado = True
+                break
+            self.total_general += total
+            self._pendientes.append(fila)
+
+    def wrap(self, availWidth, availHeight):
+        # Siempre se pide más de lo disponible para que el documento llame a split()
+        return sum(self._renderizador.col_widths), availHeight + 1
+
+    def split(self, availWidth, availHeight):
+        self._tomar(self.FILAS_POR_BLOQUE)
+        filas = self._pendientes[:self.FILAS_POR_BLOQUE]
+        if not filas and not self._vacia:
+            return []
+
+        renderizador = self._renderizador
+        if self._con_cabecera:
+            tabla = Table([renderizador._cabecera_productos] + filas, colWidths=renderizador.col_widths, repeatRows=1)
+            tabla.setStyle(renderizador._estilo_productos)
+        else:
+            tabla = Table(filas, colWidths=renderizador.col_widths)
+            tabla.setStyle(renderizador._estilo_productos_continuacion)
+
+        _, alto = tabla.wrap(availWidth, availHeight)
+        pagina_llena = alto > availHeight
+        if pagina_llena:
+            partes = tabla.split(availWidth, availHeight)
+            if not partes:
+                return []
+            tabla = partes[0]
+            colocadas = len(tabla._cellvalues) - (1 if self._con_cabecera else 0)
+            if colocadas <= 0:
+                return []  # solo entra el encabezado: se pasa a la página siguiente
+        else:
+            colocadas = len(filas)
+
+        del self._pendientes[:colocadas]
+        self._con_cabecera = pagina_llena
+        self._vacia = False
+        self.__dict__.pop('_postponed', None)
+
+        self._tomar(1)
+        if self._pendientes:
+            return [tabla, self]
+        return [tabla]
+
+
+class _TablaTotal(Flowable):
+    """Fila de TOTAL GENERAL; se arma al medirla, cuando la tabla de productos ya terminó."""
+
+    def __init__(self, renderizador, tabla_productos):
+        Flowable.__init__(self)
+        self._renderizador = renderizador
+        self._tabla_productos = tabla_productos
+        self._tabla = None
+
+    def _obtener_tabla(self):
+        if self._tabla is None:
+            total_general = self._tabla_productos.total_general
+            data_total = [["", "", "", "", "", "TOTAL GENERAL", soles(total_general)]]
+            self._tabla = Table(data_total, colWidths=self._renderizador.col_widths)
+            self._tabla.setStyle(self._renderizador._estilo_total)
+        return self._tabla
+
+    def wrap(self, availWidth, availHeight):
+        return self._obtener_tabla().wrap(availWidth, availHeight)
+
+    def draw(self):
+        self._obtener_tabla().drawOn(self.canv, 0, 0)
+
+
+class QuotePdfRenderer:
+    """Genera PDFs de cotizaciones reutilizando todo lo que no cambia entre cotizaciones.
+
+    Los estilos, el logo ya decodificado, las filas fijas del encabezado, los
+    términos, la firma y todos los ``TableStyle`` se preparan una sola vez al
+    crear el renderizador; ``render`` solo arma las filas del cliente y de los
+    productos. Una instancia puede compartirse entre hilos.
+
+    Con ``compacto`` (por defecto, ver ``COMPACTO``) el logo se incrusta
+    reducido a su tamaño impreso. Todos los estilos usan solo fuentes
+    estándar (Helvetica), que los visores ya tienen y no se incrustan.
+    """
+
+    @cronometrado("pdf.preparacion")
+    def __init__(self, logo_path=LOGO_PATH, compacto=COMPACTO):
+        self.styles = getSampleStyleSheet()
+
+        # Crear estilos personalizados
+        self.styles.add(ParagraphStyle(
+            name='Empresa',
+            fontSize=16,
+            alignment=1,  # Centro
+            spaceAfter=20
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='DatosEmpresa',
+            fontSize=8,
+            leading=10
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='TituloCotizacion',
+            fontSize=14,
+            alignment=2,  # Derecha
+            spaceBefore=10,
+            spaceAfter=20
+        ))
+
+        # Estilo para la descripción de los productos (para ajustar el texto y que se expanda la celda)
+        self.style_descripcion = ParagraphStyle(
+            name='DescripcionProducto',
+            fontSize=8,
+            leading=10,
+            leftIndent=0,
+            rightIndent=0
+        )
+
+        # Cargar el logo una sola vez
+        self._logo = None
+        self._logo_path = logo_path
+        with medir("pdf.logo"):
+            try:
+                self._logo = _logo(logo_path, 1.5*inch, 1*inch, DPI_LOGO if compacto else None)
+            except Exception:
+                try:
+                    # Si no se puede decodificar aquí se deja que ReportLab lo cargue en cada PDF
+                    Image(logo_path, width=1.5*inch, height=1*inch)
+                except Exception:
+                    # En caso de error, se utiliza el texto "ACESMA INOX"
+                    self._logo_path = None
+
+        # Columna izquierda fija del encabezado
+        self._header_empresa = [
+            'Calle Constantino Carvallo N°276 Urb. Santa Catina, La Victoria',
+            'Ciudad: Lima',
+            'Sitio Web: acesmainox.com',
+            'Teléfono: 952439843 | 980165809 | 92049843',
+            'E-mail: contacto@acesmainox.com',
+            'Asesor de venta: Arturo Ledesma',
+            'Cuenta Corriente Soles Interbank: 2003003503664',
+            'CCI: 00320000300350366436',
+        ]
+        self._estilo_header = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ])
+
+        self._estilo_cliente = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1C4E4E')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ])
+
+        # Tabla de productos con anchos ajustados
+        self.col_widths = [0.7*inch, 2.8*inch, 0.5*inch, 0.75*inch, 0.75*inch, 0.75*inch, 0.75*inch]  # Total = 7 inches
+        self._cabecera_productos = ['CÓDIGO', 'DESCRIPCIÓN', 'CANT.', 'VALOR', 'SUBTOTAL', 'IMPUESTO', 'TOTAL']
+        self._estilo_productos = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1C4E4E')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Alinear la descripción a la izquierda
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ])
+        # Mismo estilo para un tramo de la tabla que sigue en la misma página (sin encabezado)
+        self._estilo_productos_continuacion = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ])
+
+        self._estilo_total = TableStyle([
+            # Fusionamos las primeras 6 celdas para dejar espacio al texto "TOTAL GENERAL"
+            ('SPAN', (0, 0), (5, 0)),
+            ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
+            ('ALIGN', (6, 0), (6, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ])
+
+        # Términos y condiciones
+        self._terms_data = [
+            ['TÉRMINOS Y CONDICIONES', ''],
+            ['Fecha de entrega:', '5 días útiles'],
+            ['Forma de pago:', '50% al inicio del contrato y el otro 50% contraentrega'],
+            ['', 'incluye movilidad hasta el punto de entrega'],
+        ]
+        self._estilo_terms = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1C4E4E')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
         ])
-    
-    t_productos = Table(data_productos, colWidths=col_widths)
-    t_productos.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1C4E4E')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Alinear la descripción a la izquierda
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-    ]))
-    elements.append(t_productos)
-    
-    # Agregar fila final con el total general de todos los productos
-    data_total = [["", "", "", "", "", "TOTAL GENERAL", f"S/ {total_general:.2f}"]]
-    t_total = Table(data_total, colWidths=col_widths)
-    t_total.setStyle(TableStyle([
-        # Fusionamos las primeras 6 celdas para dejar espacio al texto "TOTAL GENERAL"
-        ('SPAN', (0, 0), (5, 0)),
-        ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
-        ('ALIGN', (6, 0), (6, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    elements.append(Spacer(1, 10))
-    elements.append(t_total)
-    
-    # Términos y condiciones
-    elements.append(Spacer(1, 20))
-    terms_data = [
-        ['TÉRMINOS Y CONDICIONES', ''],
-        ['Fecha de entrega:', '5 días útiles'],
-        ['Forma de pago:', '50% al inicio del contrato y el otro 50% contraentrega'],
-        ['', 'incluye movilidad hasta el punto de entrega'],
-    ]
-    
-    t_terms = Table(terms_data, colWidths=[2*inch, 5*inch])
-    t_terms.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1C4E4E')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-    ]))
-    elements.append(t_terms)
-    
-    # Firma
-    elements.append(Spacer(1, 30))
-    firma_data = [
-        ['_____________________'],
-        ['Nombre del cliente:'],
-    ]
-    t_firma = Table(firma_data)
-    t_firma.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-    ]))
-    elements.append(t_firma)
-    
-    # Pie de página
-    elements.append(Spacer(1, 20))
-    footer_text = (
-        "Si usted tiene alguna pregunta sobre esta cotización, por favor, póngase en contacto con nosotros\n"
-        "ACESMA INOX | Teléfono: 952439843 | 980165809 | 920439843 | E-mail: contacto@acesmainox.com\n"
-        "¡Gracias por hacer trato con nosotros!"
-    )
-    footer = Paragraph(footer_text, styles['DatosEmpresa'])
-    elements.append(footer)
-    
-    # Construir el PDF en memoria
-    doc.build(elements)
-    
-    # Obtener el contenido del PDF
-    pdf_data = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_data
+
+        # Firma
+        self._firma_data = [
+            ['_____________________'],
+            ['Nombre del cliente:'],
+        ]
+        self._estilo_firma = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ])
+
+        # Pie de página
+        self._footer_text = (
+            "Si usted tiene alguna pregunta sobre esta cotización, por favor, póngase en contacto con nosotros\n"
+            "ACESMA INOX | Teléfono: 952439843 | 980165809 | 920439843 | E-mail: contacto@acesmainox.com\n"
+            "¡Gracias por hacer trato con nosotros!"
+        )
+
+    def _crear_logo(self):
+        if self._logo is not None:
+            return _DibujoLogo(self._logo, 1.5*inch, 1*inch)
+        if self._logo_path:
+            return Image(self._logo_path, width=1.5*inch, height=1*inch)
+        return Paragraph("ACESMA INOX", self.styles['Empresa'])
+
+    def _filas_productos(self, productos, tasa):
+        """Genera, una por una, las filas de la tabla de productos junto con el total de cada línea (en céntimos)."""
+        for producto in productos:
+            # Montos guardados con la cotización (o calculados si es una cotización antigua)
+            linea = linea_de(producto, tasa)
+
+            # Envolver la descripción en un Paragraph para que se ajuste y la celda se expanda verticalmente
+            descripcion_paragraph = Paragraph(producto['descripcion'], self.style_descripcion)
+
+            yield [
+                producto.get('codigo', ''),  # Código del catálogo (vacío si se escribió a mano)
+                descripcion_paragraph,
+                str(producto['cantidad']),
+                soles(a_centimos(producto['precio'])),
+                soles(linea['subtotal']),
+                soles(linea['impuesto']),
+                soles(linea['total'])
+            ], linea['total']
+
+    def elementos(self, cotizacion):
+        """Lista de flowables de la cotización (solo cliente y productos se arman aquí)."""
+        elements = []
+        cliente = cotizacion['datos del cliente']
+
+        # La fecha del encabezado es la de la cotización, así el PDF siempre sale igual
+        fecha = cotizacion.get("fecha") or datetime.now().strftime("%d/%m/%Y")
+
+        # Información de la empresa y cotización (encabezado)
+        columna_derecha = [
+            f'FECHA: {fecha}',
+            f'COTIZACIÓN #: {cotizacion["id"]}',
+            f'CLIENTE ID: {cliente["RUC"]}',
+            'VÁLIDO HASTA:',
+        ]
+        data_header = [[self._crear_logo(), 'COTIZACIÓN']]
+        for i, linea in enumerate(self._header_empresa):
+            data_header.append([linea, columna_derecha[i] if i < len(columna_derecha) else ''])
+
+        t_header = Table(data_header, colWidths=[4.5*inch, 2.5*inch])
+        t_header.setStyle(self._estilo_header)
+        elements.append(t_header)
+        elements.append(Spacer(1, 20))
+
+        # Datos del cliente
+        data_cliente = [
+            ['CLIENTE', ''],
+            ['Nombre:', cliente['Nombre del cliente']],
+            ['Email:', cliente['E-mail']],
+            ['Dirección:', cliente['Dirección']],
+            ['RUC:', cliente['RUC']],
+            ['Teléfono:', cliente['Telefono']]
+        ]
+
+        t_cliente = Table(data_cliente, colWidths=[1.5*inch, 5.5*inch])
+        t_cliente.setStyle(self._estilo_cliente)
+        elements.append(t_cliente)
+        elements.append(Spacer(1, 20))
+
+        # Tabla de productos por páginas (los productos pueden venir de un iterador)
+        t_productos = _TablaProductos(self, cotizacion['productos'], tasa_de(cotizacion))
+        elements.append(t_productos)
+
+        # Agregar fila final con el total general de todos los productos
+        elements.append(Spacer(1, 10))
+        elements.append(_TablaTotal(self, t_productos))
+
+        # Términos y condiciones
+        elements.append(Spacer(1, 20))
+        t_terms = Table(self._terms_data, colWidths=[2*inch, 5*inch])
+        t_terms.setStyle(self._estilo_terms)
+        elements.append(t_terms)
+
+        # Firma
+        elements.append(Spacer(1, 30))
+        t_firma = Table(self._firma_data)
+        t_firma.setStyle(self._estilo_firma)
+        elements.append(t_firma)
+
+        # Pie de página
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(self._footer_text, self.styles['DatosEmpresa']))
+        return elements
+
+    @cronometrado("pdf.total")
+    def render(self, cotizacion, destino=None):
+        """Genera el PDF de la cotización.
+
+        Sin ``destino`` devuelve los bytes del PDF. Con ``destino`` (una ruta o
+        un archivo abierto en modo binario) escribe el PDF directamente ahí,
+        sin pasar por un buffer intermedio, y devuelve ``destino``.
+        """
+        # Crear un buffer en memoria para el PDF solo si no hay destino
+        buffer = io.BytesIO() if destino is None else None
+        # Posición inicial si el destino es un archivo abierto, para medir lo escrito
+        inicio = None
+        if destino is not None and not isinstance(destino, str) and getattr(destino, "seekable", bool)():
+            inicio = destino.tell()
+
+        doc = SimpleDocTemplate(
+            buffer if destino is None else destino,
+            pagesize=letter,
+            rightMargin=30,
+            leftMargin=30,
+            topMargin=30,
+            bottomMargin=30,
+            pageCompression=1,  # contenido de las páginas comprimido con Flate
+            invariant=1  # sin fecha de creación ni id aleatorio: mismo contenido, mismos bytes
+        )
+
+        with medir("pdf.elementos"):
+            elementos = self.elementos(cotizacion)
+        # Las filas de productos se arman durante el build, página por página
+        with medir("pdf.build"):
+            doc.build(elementos)
+        if destino is not None:
+            if isinstance(destino, str):
+                registrar("pdf.bytes", os.path.getsize(destino), "bytes")
+            elif inicio is not None:
+                registrar("pdf.bytes", destino.tell() - inicio, "bytes")
+            return destino
+
+        # Obtener el contenido del PDF
+        pdf_data = buffer.getvalue()
+        buffer.close()
+        registrar("pdf.bytes", len(pdf_data), "bytes")
+
+        return pdf_data
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def obtener_renderer():
+    """Devuelve el renderizador del proceso, creándolo la primera vez."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = QuotePdfRenderer()
+        return _renderer
+
+
+def generar_cotizacion_pdf(cotizacion, destino=None):
+    return obtener_renderer().render(cotizacion, destino)
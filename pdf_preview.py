@@ -1,71 +1,184 @@
-import os
+import threading
 import tkinter as tk
 from tkinter import ttk
-from pdf_generator import generar_cotizacion_pdf
-from cotizaciones import load_cotizaciones
-from PIL import Image, ImageTk
-import fitz  # PyMuPDF
+from collections import OrderedDict
+from almacen import obtener_almacen
+from pdf_cache import clave_cotizacion, generar_cotizacion_pdf_cacheado
+
+# PyMuPDF, PIL y ReportLab se importan recién al abrir el primer PDF (o en
+# segundo plano, ver _precalentar) para que la ventana aparezca enseguida
+
+# Tamaño del área de previsualización
+ANCHO_CANVAS = 600
+ALTO_CANVAS = 800
+# Memoria máxima de las páginas ya rasterizadas
+MAX_BYTES_PAGINAS = 64 * 1024 * 1024
+# Cotizaciones que se listan en el selector
+MAX_RESULTADOS = 200
+NIVELES_ZOOM = [1.0, 1.5, 2.0, 3.0]
+
+
+class CachePaginas:
+    """LRU de páginas rasterizadas por (hash de la cotización, página, zoom), limitado en bytes."""
+
+    def __init__(self, max_bytes=MAX_BYTES_PAGINAS):
+        self.max_bytes = max_bytes
+        self._paginas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            imagen = self._paginas.get(clave)
+            if imagen is not None:
+                self._paginas.move_to_end(clave)
+            return imagen
+
+    def guardar(self, clave, imagen):
+        tamano = imagen.width * imagen.height * 3
+        with self._lock:
+            anterior = self._paginas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior.width * anterior.height * 3
+            self._paginas[clave] = imagen
+            self._bytes += tamano
+            while self._bytes > self.max_bytes and len(self._paginas) > 1:
+                _, expulsada = self._paginas.popitem(last=False)
+                self._bytes -= expulsada.width * expulsada.height * 3
+
+
+def _precalentar():
+    """Importa las dependencias pesadas y prepara el renderizador de PDFs en segundo plano."""
+    import fitz  # noqa: F401
+    from PIL import Image  # noqa: F401
+    from pdf_generator import obtener_renderer
+    obtener_renderer()
+
 
 class PDFPreview:
     def __init__(self, root):
         self.root = root
         self.root.title("PDF Preview")
-        
+        self.almacen = obtener_almacen()
+        self.cache = CachePaginas()
+
+        # Documento abierto en memoria y su posición actual
+        self.documento = None
+        self.clave = None
+        self.pagina = 0
+        self.zoom = 0  # índice en NIVELES_ZOOM
+        self.resultados = []
+
         # Frame principal
         self.main_frame = ttk.Frame(root, padding="10")
         self.main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Botón para generar y previsualizar
-        self.preview_button = ttk.Button(self.main_frame, text="Generar y Previsualizar", command=self.update_preview)
-        self.preview_button.grid(row=0, column=0, pady=10)
-        
+
+        # Búsqueda y selección de la cotización
+        barra = ttk.Frame(self.main_frame)
+        barra.grid(row=0, column=0, pady=5, sticky=(tk.W, tk.E))
+        self.busqueda = tk.StringVar()
+        entrada = ttk.Entry(barra, textvariable=self.busqueda, width=20)
+        entrada.grid(row=0, column=0, padx=2)
+        entrada.bind("<Return>", lambda _: self.buscar())
+        ttk.Button(barra, text="Buscar", command=self.buscar).grid(row=0, column=1, padx=2)
+        self.selector = ttk.Combobox(barra, state="readonly", width=45)
+        self.selector.grid(row=0, column=2, padx=2)
+        self.selector.bind("<<ComboboxSelected>>", lambda _: self.abrir_seleccion())
+
+        # Navegación entre páginas y zoom
+        navegacion = ttk.Frame(self.main_frame)
+        navegacion.grid(row=1, column=0, pady=5)
+        ttk.Button(navegacion, text="◀", width=3, command=lambda: self.ir_a(self.pagina - 1)).grid(row=0, column=0)
+        self.etiqueta_pagina = ttk.Label(navegacion, text="-", width=14, anchor="center")
+        self.etiqueta_pagina.grid(row=0, column=1)
+        ttk.Button(navegacion, text="▶", width=3, command=lambda: self.ir_a(self.pagina + 1)).grid(row=0, column=2)
+        ttk.Button(navegacion, text="−", width=3, command=lambda: self.cambiar_zoom(-1)).grid(row=0, column=3, padx=(15, 0))
+        ttk.Button(navegacion, text="+", width=3, command=lambda: self.cambiar_zoom(1)).grid(row=0, column=4)
+
         # Canvas para mostrar el PDF
-        self.canvas = tk.Canvas(self.main_frame, width=600, height=800)
-        self.canvas.grid(row=1, column=0, pady=10)
-        
-    def update_preview(self):
-        # Generar el PDF
-        cotizaciones = load_cotizaciones()
-        if not cotizaciones:
-            print("No hay cotizaciones para previsualizar")
+        self.canvas = tk.Canvas(self.main_frame, width=ANCHO_CANVAS, height=ALTO_CANVAS,
+                                scrollregion=(0, 0, ANCHO_CANVAS, ALTO_CANVAS))
+        self.canvas.grid(row=2, column=0, pady=10)
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-e.delta // 120, "units"))
+
+        self.root.bind("<Prior>", lambda _: self.ir_a(self.pagina - 1))
+        self.root.bind("<Next>", lambda _: self.ir_a(self.pagina + 1))
+        # Primero se dibuja la ventana; el renderizador se prepara mientras tanto
+        threading.Thread(target=_precalentar, daemon=True).start()
+        self.root.after_idle(self.buscar)
+
+    def buscar(self):
+        """Llena el selector con las cotizaciones más recientes que coinciden con el RUC o nombre."""
+        texto = self.busqueda.get().strip()
+        if texto.isdigit():
+            _, self.resultados = self.almacen.buscar(ruc=texto, por_pagina=MAX_RESULTADOS)
+        else:
+            _, self.resultados = self.almacen.buscar(nombre=texto or None, por_pagina=MAX_RESULTADOS)
+        self.selector["values"] = [
+            f"#{r['id']} - {r['nombre']} ({r['fecha']})" for r in self.resultados
+        ]
+        if self.resultados and self.documento is None:
+            self.selector.current(0)
+            self.abrir_seleccion()
+
+    def abrir_seleccion(self):
+        indice = self.selector.current()
+        if indice < 0:
+            return
+        cotizacion = self.almacen.obtener(self.resultados[indice]["id"])
+        if cotizacion is None:
             return
-            
-        # Obtener la última cotización
-        ultima_cotizacion = cotizaciones[-1]  # Toma la última cotización de la lista
-        generar_cotizacion_pdf(ultima_cotizacion)
-        
         try:
-            # Obtener el último archivo PDF generado
-            pdf_files = [f for f in os.listdir("pdfs") if f.endswith('.pdf')]
-            if not pdf_files:
-                print("No se encontraron archivos PDF")
-                return
-                
-            latest_pdf = max(pdf_files, key=lambda x: os.path.getctime(os.path.join("pdfs", x)))
-            pdf_path = os.path.join("pdfs", latest_pdf)
-            
-            # Abrir el PDF generado
-            doc = fitz.open(pdf_path)
-            page = doc[0]  # Primera página
-            
-            # Convertir a imagen
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # Zoom 2x para mejor calidad
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            
-            # Redimensionar si es necesario
-            ratio = min(600/img.width, 800/img.height)
-            new_size = (int(img.width*ratio), int(img.height*ratio))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Mostrar en el canvas
-            self.photo = ImageTk.PhotoImage(img)
-            self.canvas.create_image(300, 400, image=self.photo)
-            
-            doc.close()
+            # Los bytes se abren en memoria, sin escribir ni buscar archivos en pdfs/
+            import fitz  # PyMuPDF
+            pdf_data = generar_cotizacion_pdf_cacheado(cotizacion)
+            documento = fitz.open(stream=pdf_data, filetype="pdf")
         except Exception as e:
             print(f"Error al previsualizar el PDF: {str(e)}")
+            return
+        if self.documento is not None:
+            self.documento.close()
+        self.documento = documento
+        self.clave = clave_cotizacion(cotizacion)
+        self.ir_a(0)
+
+    def cambiar_zoom(self, paso):
+        self.zoom = max(0, min(len(NIVELES_ZOOM) - 1, self.zoom + paso))
+        self.ir_a(self.pagina)
+
+    def ir_a(self, pagina):
+        if self.documento is None or not 0 <= pagina < self.documento.page_count:
+            return
+        self.pagina = pagina
+        self.etiqueta_pagina.config(text=f"Página {pagina + 1} de {self.documento.page_count}")
+        self.mostrar(self.rasterizar(pagina))
+
+    def rasterizar(self, pagina):
+        """Rasteriza solo la página pedida, directo al tamaño del canvas por el zoom elegido."""
+        zoom = NIVELES_ZOOM[self.zoom]
+        clave = (self.clave, pagina, zoom)
+        imagen = self.cache.obtener(clave)
+        if imagen is None:
+            import fitz
+            from PIL import Image
+            page = self.documento[pagina]
+            escala = min(ANCHO_CANVAS / page.rect.width, ALTO_CANVAS / page.rect.height) * zoom
+            pix = page.get_pixmap(matrix=fitz.Matrix(escala, escala), alpha=False)
+            imagen = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            self.cache.guardar(clave, imagen)
+        return imagen
+
+    def mostrar(self, imagen):
+        from PIL import ImageTk
+        self.photo = ImageTk.PhotoImage(imagen)
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+        self.canvas.config(scrollregion=(0, 0, max(ANCHO_CANVAS, imagen.width), max(ALTO_CANVAS, imagen.height)))
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = PDFPreview(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
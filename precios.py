@@ -0,0 +1,171 @@
+import os
+from decimal import Decimal, ROUND_HALF_UP
+
+# Tasa del IGV; se puede cambiar con la variable de entorno ACESMA_TASA_IGV (p. ej. "0.18")
+TASA_IGV = Decimal(os.getenv("ACESMA_TASA_IGV", "0.18"))
+
+
+def a_decimal(valor):
+    """Convierte un precio o cantidad (float, int o texto) a Decimal sin errores de coma flotante."""
+    if isinstance(valor, Decimal):
+        return valor
+    return Decimal(str(valor))
+
+
+def a_centimos(valor):
+    """Monto en soles -> céntimos enteros, redondeando al céntimo más cercano (mitad hacia arriba)."""
+    return int((a_decimal(valor) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def formatear(centimos):
+    """Céntimos enteros -> texto con dos decimales, p. ej. 250150 -> '2501.50'."""
+    signo = "-" if centimos < 0 else ""
+    centimos = abs(centimos)
+    return f"{signo}{centimos // 100}.{centimos % 100:02d}"
+
+
+def soles(centimos):
+    """Céntimos enteros -> 'S/ 2501.50'."""
+    return f"S/ {formatear(centimos)}"
+
+
+def porcentaje(tasa):
+    """Tasa como texto de porcentaje, p. ej. Decimal('0.18') -> '18'."""
+    return format((a_decimal(tasa) * 100).normalize(), "f")
+
+
+def _impuesto(subtotal_centimos, tasa):
+    return int((Decimal(subtotal_centimos) * tasa).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _subtotal(precio, cantidad):
+    """precio x cantidad en céntimos, redondeado al céntimo."""
+    return int((a_decimal(precio) * a_decimal(cantidad) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def calcular_linea(precio, cantidad, tasa=None):
+    """Subtotal, impuesto y total de una línea, en céntimos.
+
+    El subtotal es precio x cantidad redondeado al céntimo; el impuesto se
+    redondea por línea y el total de la línea es la suma de ambos.
+    """
+    tasa = TASA_IGV if tasa is None else a_decimal(tasa)
+    subtotal = _subtotal(precio, cantidad)
+    impuesto = _impuesto(subtotal, tasa)
+    return {"subtotal": subtotal, "impuesto": impuesto, "total": subtotal + impuesto}
+
+
+def calcular_totales(productos, tasa=None):
+    """Totales de la cotización en céntimos: sumas de las líneas y el detalle de cada una."""
+    tasa = TASA_IGV if tasa is None else a_decimal(tasa)
+    lineas = [calcular_linea(p["precio"], p["cantidad"], tasa) for p in productos]
+    return {
+        "subtotal": sum(linea["subtotal"] for linea in lineas),
+        "igv": sum(linea["impuesto"] for linea in lineas),
+        "total": sum(linea["total"] for linea in lineas),
+        "tasa_igv": tasa,
+        "lineas": lineas,
+    }
+
+
+def totales_lote(lista_productos, tasa=None):
+    """Totales en céntimos de muchas cotizaciones a la vez, con el detalle de cada línea.
+
+    ``lista_productos`` es una secuencia con la lista de productos de cada
+    cotización; el resultado es idéntico al de ``calcular_totales`` para cada
+    una, pero la tasa se convierte una sola vez para todo el lote.
+    """
+    tasa = TASA_IGV if tasa is None else a_decimal(tasa)
+    resultados = []
+    for productos in lista_productos:
+        resultado = {"subtotal": 0, "igv": 0, "total": 0, "tasa_igv": tasa, "lineas": []}
+        for producto in productos:
+            subtotal = _subtotal(producto["precio"], producto["cantidad"])
+            impuesto = _impuesto(subtotal, tasa)
+            resultado["subtotal"] += subtotal
+            resultado["igv"] += impuesto
+            resultado["total"] += subtotal + impuesto
+            resultado["lineas"].append({"subtotal": subtotal, "impuesto": impuesto, "total": subtotal + impuesto})
+        resultados.append(resultado)
+    return resultados
+
+
+def materializar(cotizacion, tasa=None):
+    """Guarda en la cotización los montos de cada línea y los totales (texto con dos decimales).
+
+    Se llama al guardar para que listados, PDFs y reportes lean los montos en
+    lugar de recalcularlos. Devuelve la misma cotización.
+    """
+    return _guardar_montos(cotizacion, calcular_totales(cotizacion["productos"], tasa))
+
+
+def materializar_lote(cotizaciones, tasa=None):
+    """Materializa (ver ``materializar``) las cotizaciones que todavía no tienen totales guardados.
+
+    Pensado para la migración y la compactación del almacén: los montos de
+    todo el lote se calculan juntos con ``totales_lote``. Las que ya tienen
+    totales no se tocan (pueden ser de otra tasa de IGV) y las que tienen
+    líneas que no se pueden calcular se dejan como están. Devuelve la lista.
+    """
+    cotizaciones = list(cotizaciones)
+    pendientes = [c for c in cotizaciones if not c.get("totales") and isinstance(c.get("productos"), list)]
+    try:
+        for cotizacion, totales in zip(pendientes, totales_lote([c["productos"] for c in pendientes], tasa)):
+            _guardar_montos(cotizacion, totales)
+    except (ArithmeticError, ValueError, KeyError, TypeError):
+        # Alguna línea dañada: se calcula de a una para no dejar sin montos al resto
+        for cotizacion in pendientes:
+            if not cotizacion.get("totales"):
+                try:
+                    materializar(cotizacion, tasa)
+                except (ArithmeticError, ValueError, KeyError, TypeError):
+                    continue
+    return cotizaciones
+
+
+def _guardar_montos(cotizacion, totales):
+    for producto, linea in zip(cotizacion["productos"], totales["lineas"]):
+        producto["subtotal"] = formatear(linea["subtotal"])
+        producto["impuesto"] = formatear(linea["impuesto"])
+        producto["total"] = formatear(linea["total"])
+    cotizacion["totales"] = {
+        "subtotal": formatear(totales["subtotal"]),
+        "igv": formatear(totales["igv"]),
+        "total": formatear(totales["total"]),
+        "tasa_igv": str(totales["tasa_igv"]),
+    }
+    return cotizacion
+
+
+def linea_de(producto, tasa=None):
+    """Montos de una línea en céntimos: los guardados si existen, si no se calculan."""
+    if "total" in producto:
+        return {
+            "subtotal": a_centimos(producto["subtotal"]),
+            "impuesto": a_centimos(producto["impuesto"]),
+            "total": a_centimos(producto["total"]),
+        }
+    return calcular_linea(producto["precio"], producto["cantidad"], tasa)
+
+
+def totales_de(cotizacion):
+    """Totales de la cotización en céntimos: los guardados si existen, si no se calculan."""
+    guardados = cotizacion.get("totales")
+    if guardados:
+        return {
+            "subtotal": a_centimos(guardados["subtotal"]),
+            "igv": a_centimos(guardados["igv"]),
+            "total": a_centimos(guardados["total"]),
+            "tasa_igv": a_decimal(guardados["tasa_igv"]),
+        }
+    totales = calcular_totales(cotizacion["productos"])
+    del totales["lineas"]
+    return totales
+
+
+def tasa_de(cotizacion):
+    """Tasa de IGV con la que se guardó la cotización (o la actual si es antigua)."""
+    guardados = cotizacion.get("totales")
+    if guardados:
+        return a_decimal(guardados["tasa_igv"])
+    return TASA_IGV
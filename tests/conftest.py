@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos de la aplicación están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen import AlmacenCotizaciones  # noqa: E402
+
+
+def cliente(nombre="Cliente A", ruc="20100070970"):
+    return {
+        "Nombre del cliente": nombre,
+        "RUC": ruc,
+        "Telefono": "952439843",
+        "E-mail": "compras@ejemplo.pe",
+        "Dirección": "Av. Argentina 1234, Lima",
+    }
+
+
+def productos(descripcion="Mesa de acero inoxidable", precio=100.0, cantidad=2):
+    return [{"descripcion": descripcion, "precio": precio, "cantidad": cantidad}]
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Directorio temporal que además es el directorio de trabajo (las rutas por defecto quedan ahí)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def almacen(directorio):
+    return AlmacenCotizaciones(str(directorio / "cotizaciones.jsonl"))
@@ -0,0 +1,212 @@
+import json
+from datetime import date
+
+import pytest
+
+from almacen import ID_INICIAL, AlmacenCotizaciones
+from conftest import cliente, productos
+
+
+def test_agregar_y_obtener(almacen):
+    guardada = almacen.agregar(cliente(), productos(), fecha="03/01/2024")
+
+    assert guardada["id"] == ID_INICIAL
+    leida = almacen.obtener(ID_INICIAL)
+    assert leida["datos del cliente"] == cliente()
+    assert leida["productos"][0]["descripcion"] == "Mesa de acero inoxidable"
+    assert leida["fecha"] == "03/01/2024"
+    assert len(almacen) == 1
+    assert almacen.obtener(ID_INICIAL + 1) is None
+
+
+def test_otro_proceso_ve_lo_anexado(almacen):
+    otro = AlmacenCotizaciones(almacen.ruta)
+    assert len(otro) == 0
+    almacen.agregar(cliente(), productos())
+    assert len(otro) == 1
+    assert otro.obtener(ID_INICIAL)["datos del cliente"]["RUC"] == "20100070970"
+
+
+def test_buscar_por_filtros(almacen):
+    almacen.agregar(cliente("Ángel Núñez S.A.C.", "20100070970"), productos(), fecha="10/02/2024")
+    almacen.agregar(cliente("Lácteos Andinos S.A.", "20258947518"), productos(), fecha="15/03/2024")
+
+    total, resumenes = almacen.buscar(nombre="angel")
+    assert total == 1 and resumenes[0]["nombre"] == "Ángel Núñez S.A.C."
+    total, resumenes = almacen.buscar(ruc="20258947518")
+    assert [r["id"] for r in resumenes] == [ID_INICIAL + 1]
+    total, _ = almacen.buscar(desde=date(2024, 3, 1), hasta=date(2024, 3, 31))
+    assert total == 1
+    total, resumenes = almacen.buscar()
+    assert total == 2 and [r["id"] for r in resumenes] == [ID_INICIAL + 1, ID_INICIAL]
+
+
+def test_secuencia_no_reutiliza_ids(almacen):
+    almacen.agregar_lote([{"datos del cliente": cliente(), "productos": productos()} for _ in range(3)])
+    # Aunque el log se vacíe, la secuencia guardada sigue adelante
+    almacen.reescribir([])
+    nueva = AlmacenCotizaciones(almacen.ruta).agregar(cliente(), productos())
+    assert nueva["id"] == ID_INICIAL + 3
+
+
+def test_secuencia_perdida_se_recupera_del_log(almacen):
+    almacen.agregar_lote([{"datos del cliente": cliente(), "productos": productos()} for _ in range(2)])
+    with open(almacen.ruta_secuencia, "w") as archivo:
+        archivo.write("no es un número")
+    assert AlmacenCotizaciones(almacen.ruta).agregar(cliente(), productos())["id"] == ID_INICIAL + 2
+
+
+def test_cola_cortada_se_repara_al_escribir(almacen):
+    almacen.agregar(cliente(), productos())
+    with open(almacen.ruta, "ab") as archivo:
+        archivo.write(b'{"id": 9999, "fecha": "01/0')  # corte a mitad de una escritura
+
+    abierto = AlmacenCotizaciones(almacen.ruta)
+    assert len(abierto) == 1  # la línea incompleta no se lee
+    guardada = abierto.agregar(cliente(), productos())
+
+    assert guardada["id"] == ID_INICIAL + 1
+    with open(almacen.ruta, "rb") as archivo:
+        lineas = archivo.read().splitlines()
+    assert len(lineas) == 2 and all(json.loads(linea)["id"] != 9999 for linea in lineas)
+    assert AlmacenCotizaciones(almacen.ruta).obtener(ID_INICIAL + 1) is not None
+
+
+def _json_antiguo(directorio, cotizaciones):
+    ruta = directorio / "cotizaciones.json"
+    ruta.write_text(json.dumps(cotizaciones), encoding="utf-8")
+    return str(ruta)
+
+
+def test_migracion_conserva_ids(almacen, directorio):
+    ruta_json = _json_antiguo(directorio, [
+        {"id": 1500, "fecha": "01/01/2023", "datos del cliente": cliente("A"), "productos": productos()},
+        {"id": 1501, "fecha": "02/01/2023", "datos del cliente": cliente("B"), "productos": productos()},
+    ])
+
+    migradas, reasignaciones = almacen.migrar_desde_json(ruta_json)
+
+    assert (migradas, reasignaciones) == (2, [])
+    assert almacen.obtener(1501)["datos del cliente"]["Nombre del cliente"] == "B"
+    assert (directorio / "cotizaciones.json.migrado").exists()
+    assert almacen.migrar_desde_json(ruta_json) == (0, [])  # solo una vez
+    assert almacen.agregar(cliente(), productos())["id"] == 1502
+
+
+def test_migracion_da_id_nuevo_a_los_repetidos(almacen, directorio):
+    ruta_json = _json_antiguo(directorio, [
+        {"id": 1500, "fecha": "01/01/2023", "datos del cliente": cliente("A"), "productos": productos("Mesa")},
+        {"id": 1500, "fecha": "01/01/2023", "datos del cliente": cliente("B"), "productos": productos("Lavadero")},
+        {"id": 1501, "fecha": "02/01/2023", "datos del cliente": cliente("C"), "productos": productos()},
+        {"fecha": "03/01/2023", "datos del cliente": cliente("D"), "productos": productos()},
+    ])
+
+    migradas, reasignaciones = almacen.migrar_desde_json(ruta_json)
+
+    assert migradas == 4
+    assert reasignaciones == [
+        {"posicion": 1, "id_anterior": 1500, "id_nuevo": 1502},
+        {"posicion": 3, "id_anterior": None, "id_nuevo": 1503},
+    ]
+    assert len(almacen) == 4
+    assert almacen.ids_repetidos() == []
+    assert almacen.obtener(1500)["datos del cliente"]["Nombre del cliente"] == "A"
+    b = almacen.obtener(1502)
+    assert b["datos del cliente"]["Nombre del cliente"] == "B" and b["id_anterior"] == 1500
+    assert b["productos"][0]["descripcion"] == "Lavadero"
+    assert almacen.buscar()[0] == 4
+    assert almacen.agregar(cliente(), productos())["id"] == 1504
+
+
+def test_renumerar_repetidos_de_un_log_ya_migrado(almacen):
+    with open(almacen.ruta, "wb") as archivo:
+        for nombre in ("A", "B"):
+            registro = {"id": 1500, "fecha": "01/01/2023", "datos del cliente": cliente(nombre), "productos": productos()}
+            archivo.write((json.dumps(registro) + "\n").encode("utf-8"))
+        archivo.write(b"linea corrupta\n")
+
+    assert almacen.ids_repetidos() == [1500]
+    assert almacen.obtener(1500)["datos del cliente"]["Nombre del cliente"] == "B"  # solo se ve la última
+
+    reasignaciones = almacen.renumerar_repetidos()
+
+    assert reasignaciones == [{"posicion": 1, "id_anterior": 1500, "id_nuevo": 1501}]
+    assert almacen.ids_repetidos() == []
+    assert almacen.obtener(1500)["datos del cliente"]["Nombre del cliente"] == "A"
+    assert almacen.obtener(1501)["datos del cliente"]["Nombre del cliente"] == "B"
+    with open(almacen.ruta, "rb") as archivo:
+        assert archivo.read().splitlines()[2] == b"linea corrupta"
+    assert almacen.renumerar_repetidos() == []
+    assert almacen.agregar(cliente(), productos())["id"] == 1502
+
+
+def _escribir_log(almacen, lineas):
+    with open(almacen.ruta, "wb") as archivo:
+        for linea in lineas:
+            archivo.write((linea if isinstance(linea, bytes) else json.dumps(linea).encode("utf-8")) + b"\n")
+
+
+def test_archivar_pasa_los_anios_anteriores(almacen):
+    almacen.agregar(cliente("A"), productos(), fecha="05/06/2022")
+    almacen.agregar(cliente("B"), productos(), fecha="07/08/2023")
+    almacen.agregar(cliente("C"), productos(), fecha="09/10/2024")
+
+    assert almacen.archivar(2024) == {2022: 1, 2023: 1}
+    assert len(almacen) == 3
+    assert almacen.obtener(ID_INICIAL)["datos del cliente"]["Nombre del cliente"] == "A"
+    assert almacen.buscar()[0] == 3
+    assert almacen.agregar(cliente(), productos())["id"] == ID_INICIAL + 3
+
+
+def test_archivar_no_pierde_lineas(almacen):
+    _escribir_log(almacen, [
+        {"id": 1500, "fecha": "01/01/2022", "datos del cliente": cliente("A"), "productos": productos()},
+        b"linea corrupta",
+        {"fecha": "01/01/2022", "datos del cliente": cliente("Sin id"), "productos": productos()},
+        {"id": 1501, "fecha": "sin fecha", "datos del cliente": cliente("B"), "productos": productos()},
+    ])
+
+    assert almacen.archivar(2024) == {2022: 1}
+    with open(almacen.ruta, "rb") as archivo:
+        lineas = archivo.read().splitlines()
+    assert lineas[0] == b"linea corrupta"
+    assert [json.loads(linea)["datos del cliente"]["Nombre del cliente"] for linea in lineas[1:]] == ["Sin id", "B"]
+
+
+def test_archivar_se_niega_con_ids_repetidos(almacen):
+    a = {"id": 1500, "fecha": "01/01/2022", "datos del cliente": cliente("A"), "productos": productos()}
+    b = {"id": 1500, "fecha": "01/01/2022", "datos del cliente": cliente("B"), "productos": productos()}
+    _escribir_log(almacen, [a, b])
+    with open(almacen.ruta, "rb") as archivo:
+        antes = archivo.read()
+
+    with pytest.raises(ValueError, match="1500.*renumerar"):
+        almacen.archivar(2024)
+    with open(almacen.ruta, "rb") as archivo:
+        assert archivo.read() == antes
+    assert almacen.archivo.obtener(1500) is None
+
+    almacen.renumerar_repetidos()
+    assert almacen.archivar(2024) == {2022: 2}
+    assert {almacen.obtener(i)["datos del cliente"]["Nombre del cliente"] for i in (1500, 1501)} == {"A", "B"}
+
+
+def test_migracion_y_compactacion_materializan_montos(almacen, directorio):
+    ruta_json = _json_antiguo(directorio, [
+        {"id": 1500, "fecha": "01/01/2023", "datos del cliente": cliente(), "productos": productos(precio=100.0, cantidad=2)},
+    ])
+    almacen.migrar_desde_json(ruta_json)
+    assert almacen.obtener(1500)["totales"]["total"] == "236.00"
+
+    # Un log escrito por una versión anterior, sin montos guardados
+    _escribir_log(almacen, [
+        {"id": 1501, "fecha": "01/01/2023", "datos del cliente": cliente(), "productos": productos(precio=50.0, cantidad=1)},
+    ])
+    almacen.reescribir(cotizacion for _, cotizacion in almacen.recorrer())
+    guardada = AlmacenCotizaciones(almacen.ruta).obtener(1501)
+    assert guardada["totales"]["total"] == "59.00"
+    assert guardada["productos"][0]["impuesto"] == "9.00"
+
+
+def test_almacen_vacio_no_vale_false(almacen):
+    assert len(almacen) == 0 and bool(almacen)
@@ -0,0 +1,15 @@
+from analitica import obtener_analitica
+from conftest import cliente, productos
+
+
+def test_analitica_de_un_almacen_vacio(almacen):
+    analitica = obtener_analitica(almacen)
+    assert analitica.almacen is almacen
+    assert analitica.resumen()["cotizaciones"] == 0
+
+    # Suscrita a las escrituras del almacén que se pasó
+    almacen.agregar(cliente(), productos(precio=100.0, cantidad=2))
+    resumen = analitica.resumen()
+    assert resumen["cotizaciones"] == 1
+    assert resumen["total"] == 23600
+    assert resumen["top_clientes"][0]["ruc"] == "20100070970"
@@ -0,0 +1,20 @@
+import pytest
+
+from api import ErrorAPI, validar_cotizacion
+from conftest import cliente
+
+
+def test_precio_nan_es_un_error_400():
+    cuerpo = {"datos del cliente": cliente(), "productos": [{"descripcion": "Mesa", "precio": "nan", "cantidad": 1}]}
+    with pytest.raises(ErrorAPI) as error:
+        validar_cotizacion(cuerpo)
+    assert error.value.estado == 400
+    assert "Línea 1: precio o cantidad no numéricos" in str(error.value)
+
+
+def test_cotizacion_valida():
+    cuerpo = {"datos del cliente": cliente(), "productos": [{"descripcion": "Mesa", "precio": "100", "cantidad": 2}]}
+    datos_cliente, productos, fecha = validar_cotizacion(cuerpo)
+    assert datos_cliente["RUC"] == "20100070970"
+    assert productos == [{"descripcion": "Mesa", "precio": 100.0, "cantidad": 2}]
+    assert fecha is None
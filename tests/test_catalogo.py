@@ -0,0 +1,154 @@
+from almacen import AlmacenCotizaciones
+from catalogo import CatalogoProductos
+from conftest import cliente, productos
+
+
+def test_reconstruir_desde_un_almacen_vacio(directorio):
+    # El almacén por defecto tiene cotizaciones; el que se pasa está vacío y es el que se usa
+    AlmacenCotizaciones().agregar(cliente(), productos("Mesa de acero"))
+    catalogo = CatalogoProductos(str(directorio / "catalogo.jsonl"))
+    catalogo.guardar_producto(None, "Producto cargado a mano", 10)
+
+    assert catalogo.reconstruir(AlmacenCotizaciones(str(directorio / "vacio.jsonl"))) == 1
+    assert [p["descripcion"] for p in catalogo.buscar("mesa")] == []
+
+
+def test_reconstruir_conserva_codigos(almacen, directorio):
+    catalogo = CatalogoProductos(str(directorio / "catalogo.jsonl"))
+    codigo = catalogo.guardar_producto(None, "Mesa de acero", 80)
+    almacen.agregar(cliente(), productos("Mesa de Acero", precio=95.5))
+    almacen.agregar(cliente(), productos("Lavadero doble", precio=300))
+
+    assert catalogo.reconstruir(almacen) == 2
+    mesa = catalogo.obtener(codigo)
+    assert mesa["precio"] == "95.50" and mesa["veces"] == 1
+    assert catalogo.buscar("lavadero")[0]["codigo"] == "P00002"
+
+
+def test_reconstruir_no_revive_los_eliminados(almacen, directorio):
+    catalogo = CatalogoProductos(str(directorio / "catalogo.jsonl"))
+    almacen.agregar(cliente(), productos("Silla"))  # anterior al catálogo, sin código
+    lineas = catalogo.registrar([{"descripcion": "Mesa", "precio": 100, "cantidad": 1},
+                                 {"descripcion": "Silla", "precio": 20, "cantidad": 1}])
+    almacen.agregar(cliente(), lineas)
+    catalogo.eliminar(lineas[1]["codigo"])
+
+    assert catalogo.reconstruir(almacen) == 1
+    assert catalogo.buscar("silla") == [] and catalogo.obtener(lineas[1]["codigo"]) is None
+    assert catalogo.obtener(lineas[0]["codigo"])["veces"] == 1
+    assert len(CatalogoProductos(catalogo.ruta)) == 1
+
+
+def test_buscar_por_veces_con_limite_y_ediciones_sin_ordenar(directorio):
+    catalogo = CatalogoProductos(str(directorio / "catalogo.jsonl"))
+    for i in range(20):
+        catalogo.guardar_producto(None, f"Mesa {i:02d}", 10)
+    for i in (3, 7, 7, 12, 12, 12):
+        catalogo.registrar([{"descripcion": f"Mesa {i:02d}", "precio": 10}])
+    # Ediciones seguidas sin búsquedas de por medio: se desindexa sobre la lista sin ordenar
+    catalogo.guardar_producto("P00001", "Lavadero 00", 10)
+    catalogo.guardar_producto("P00002", "Mesa plegable 01", 10)
+
+    assert [p["descripcion"] for p in catalogo.buscar("mesa", limite=3)] == ["Mesa 12", "Mesa 07", "Mesa 03"]
+    assert [p["descripcion"] for p in catalogo.buscar("plegable")] == ["Mesa plegable 01"]
+    assert [p["codigo"] for p in catalogo.buscar("lavadero")] == ["P00001"]
+    assert len(catalogo.buscar("mesa", limite=50)) == 19
+
+
+def _catalogo(directorio):
+    return CatalogoProductos(str(directorio / "catalogo.jsonl"))
+
+
+def test_registrar_anexa_y_otra_instancia_lee_la_cola(directorio):
+    catalogo, otro = _catalogo(directorio), _catalogo(directorio)
+    lineas = [{"descripcion": "Mesa de acero", "precio": 100}, {"descripcion": "Silla", "precio": 20}]
+    catalogo.registrar(lineas)
+    assert [l["codigo"] for l in lineas] == ["P00001", "P00002"]
+    assert len(otro) == 2
+
+    tamano = (directorio / "catalogo.jsonl").stat().st_size
+    catalogo.registrar([{"descripcion": "mesa de ACERO", "precio": 120}])
+    # Solo se anexa la línea del producto que cambió
+    assert (directorio / "catalogo.jsonl").read_bytes()[:tamano].count(b"\n") == 2
+    assert otro.obtener("P00001") == {"codigo": "P00001", "descripcion": "Mesa de acero", "precio": "120.00", "veces": 2}
+
+
+def test_instancias_concurrentes_no_repiten_codigos(directorio):
+    import threading
+
+    instancias = [_catalogo(directorio) for _ in range(4)]
+
+    def registrar(numero, catalogo):
+        for i in range(25):
+            catalogo.registrar([{"descripcion": f"Producto {numero}-{i}", "precio": 10}])
+
+    hilos = [threading.Thread(target=registrar, args=(n, c)) for n, c in enumerate(instancias)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    nuevo = _catalogo(directorio)
+    assert len(nuevo) == 100
+    assert {p["codigo"] for p in nuevo.buscar("producto", limite=200)} == {f"P{n:05d}" for n in range(1, 101)}
+
+
+def test_editar_eliminar_y_no_reutilizar_codigos(directorio):
+    catalogo = _catalogo(directorio)
+    mesa = catalogo.guardar_producto(None, "Mesa", 100)
+    silla = catalogo.guardar_producto(None, "Silla", 20)
+    catalogo.guardar_producto(mesa, "Mesa plegable", 110)
+    catalogo.eliminar(silla)
+
+    nuevo = _catalogo(directorio)
+    assert nuevo.obtener(silla) is None
+    assert [p["descripcion"] for p in nuevo.buscar("mesa")] == ["Mesa plegable"]
+    assert nuevo.guardar_producto(None, "Banco", 15) == "P00003"
+
+    catalogo.compactar()
+    assert _catalogo(directorio).guardar_producto(None, "Estante", 50) == "P00004"
+    assert len(catalogo) == 3 and catalogo.obtener("P00004")["descripcion"] == "Estante"
+
+
+def test_cola_cortada_y_lineas_corruptas(directorio):
+    catalogo = _catalogo(directorio)
+    catalogo.guardar_producto(None, "Mesa", 100)
+    with open(catalogo.ruta, "ab") as archivo:
+        archivo.write(b'{"codigo": "X"}\n{"codigo": "P00009", "descrip')
+
+    abierto = _catalogo(directorio)
+    assert len(abierto) == 1
+    assert abierto.guardar_producto(None, "Silla", 20) == "P00002"
+    assert len(_catalogo(directorio)) == 2
+
+
+def test_compacta_cuando_el_log_crece(directorio, monkeypatch):
+    import catalogo as modulo
+
+    monkeypatch.setattr(modulo, "LINEAS_MINIMAS_COMPACTACION", 10)
+    catalogo = _catalogo(directorio)
+    for _ in range(12):
+        catalogo.registrar([{"descripcion": "Mesa", "precio": 100}])
+    assert (directorio / "catalogo.jsonl").read_bytes().count(b"\n") < 10
+    assert _catalogo(directorio).obtener("P00001")["veces"] == 12
+
+
+def test_migrar_desde_json(directorio):
+    import json
+
+    (directorio / "catalogo.json").write_text(json.dumps([
+        {"codigo": "P00007", "descripcion": "Mesa", "precio": "100.00", "veces": 3},
+        {"codigo": "A1", "descripcion": "Silla", "precio": "20.00", "veces": 1},
+    ]), encoding="utf-8")
+    catalogo = _catalogo(directorio)
+
+    assert catalogo.migrar_desde_json(str(directorio / "catalogo.json")) == 2
+    assert (directorio / "catalogo.json.migrado").exists()
+    assert _catalogo(directorio).obtener("P00007")["veces"] == 3
+    assert catalogo.guardar_producto(None, "Banco", 15) == "P00008"
+    assert catalogo.migrar_desde_json(str(directorio / "catalogo.json")) == 0
+
+
+def test_catalogo_vacio_no_vale_false(directorio):
+    catalogo = _catalogo(directorio)
+    assert len(catalogo) == 0 and bool(catalogo)
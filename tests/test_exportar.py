@@ -0,0 +1,17 @@
+from almacen import AlmacenCotizaciones
+from conftest import cliente, productos
+from exportar import seleccionar_cotizaciones
+
+
+def test_seleccionar_en_almacen_vacio(directorio):
+    # El almacén por defecto tiene datos; el que se pasa está vacío y es el que se usa
+    AlmacenCotizaciones().agregar(cliente(), productos())
+    vacio = AlmacenCotizaciones(str(directorio / "vacio.jsonl"))
+    assert list(seleccionar_cotizaciones(vacio)) == []
+
+
+def test_seleccionar_filtra_por_ruc(almacen):
+    almacen.agregar(cliente("A", "20100070970"), productos())
+    almacen.agregar(cliente("B", "20258947518"), productos())
+    seleccionadas = list(seleccionar_cotizaciones(almacen, ruc="20258947518"))
+    assert [c["datos del cliente"]["Nombre del cliente"] for c in seleccionadas] == ["B"]
@@ -0,0 +1,89 @@
+import csv
+import json
+
+import pytest
+
+from almacen import AlmacenCotizaciones
+from conftest import cliente
+from importacion import importar, validar_producto
+
+
+def _csv(ruta, filas):
+    columnas = ["cotizacion", "fecha", "nombre", "ruc", "descripcion", "precio", "cantidad"]
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=columnas)
+        escritor.writeheader()
+        for fila in filas:
+            escritor.writerow(dict({"fecha": "01/02/2024", "nombre": "Cliente A", "ruc": "20100070970"}, **fila))
+    return str(ruta)
+
+
+def _rechazos(ruta):
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        return [(int(fila["linea"]), fila["motivo"]) for fila in csv.DictReader(archivo)]
+
+
+def test_validar_producto_rechaza_valores_fuera_de_rango():
+    assert validar_producto({"descripcion": "Mesa", "precio": "100", "cantidad": "1e30"})[1].startswith("la cantidad")
+    assert validar_producto({"descripcion": "Mesa", "precio": "1e12", "cantidad": "1"})[1].startswith("el precio")
+    producto, motivo = validar_producto({"descripcion": "Mesa", "precio": "100000000", "cantidad": "1000000"})
+    assert motivo is None and producto["cantidad"] == 1000000
+
+
+@pytest.mark.parametrize("precio, cantidad", [
+    ("nan", "1"), ("NaN", "1"), ("sNaN", "1"), ("-nan", "1"), ("inf", "1"), ("-Infinity", "1"),
+    ("100", "nan"), ("100", "inf"),
+])
+def test_validar_producto_rechaza_nan_e_infinito(precio, cantidad):
+    for precio_cero in (False, True):
+        producto, motivo = validar_producto({"descripcion": "Mesa", "precio": precio, "cantidad": cantidad},
+                                            precio_cero=precio_cero)
+        assert producto is None and motivo == "precio o cantidad no numéricos"
+
+
+def test_importar_en_almacen_vacio(directorio):
+    almacen = AlmacenCotizaciones(str(directorio / "propio.jsonl"))
+    ruta = _csv(directorio / "importar.csv", [
+        {"cotizacion": "1", "descripcion": "Mesa", "precio": "100", "cantidad": "2"},
+        {"cotizacion": "1", "descripcion": "Silla", "precio": "50", "cantidad": "4"},
+    ])
+
+    resultado = importar(ruta, almacen)
+
+    # El almacén vacío que se pasó es el que recibe lo importado
+    assert resultado["cotizaciones"] == 1 and len(almacen) == 1
+    assert len(almacen.obtener(resultado["primer_id"])["productos"]) == 2
+    assert not (directorio / "cotizaciones.jsonl").exists()
+
+
+def test_fila_fuera_de_rango_no_pierde_el_lote(directorio, almacen):
+    ruta = _csv(directorio / "importar.csv", [
+        {"cotizacion": "1", "descripcion": "Mesa", "precio": "100", "cantidad": "2"},
+        {"cotizacion": "2", "descripcion": "Mesa", "precio": "100", "cantidad": "1e30"},
+        {"cotizacion": "2", "descripcion": "Silla", "precio": "50", "cantidad": "1"},
+        {"cotizacion": "3", "descripcion": "Silla", "precio": "nan", "cantidad": "1"},
+        {"cotizacion": "4", "descripcion": "Silla", "precio": "50", "cantidad": "3"},
+    ])
+
+    resultado = importar(ruta, almacen, tamano_lote=10)
+
+    assert resultado["cotizaciones"] == 2 and len(almacen) == 2
+    assert resultado["filas_rechazadas"] == 3
+    assert _rechazos(resultado["rechazos"])[2] == (5, "precio o cantidad no numéricos")
+
+
+def test_jsonl_cotizaciones_completas_con_el_mismo_id(directorio):
+    ruta = directorio / "importar.jsonl"
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        for nombre in ("A", "B"):
+            archivo.write(json.dumps({
+                "id": 1500, "fecha": "01/02/2024", "datos del cliente": cliente(nombre),
+                "productos": [{"descripcion": "Mesa", "precio": 100, "cantidad": 1}],
+            }) + "\n")
+    almacen = AlmacenCotizaciones(str(directorio / "otro.jsonl"))
+
+    resultado = importar(str(ruta), almacen)
+
+    assert resultado["cotizaciones"] == 2
+    nombres = [almacen.obtener(i)["datos del cliente"]["Nombre del cliente"] for i in almacen.ids()]
+    assert sorted(nombres) == ["A", "B"]
@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+import subprocess
+
+from conftest import cliente, productos
+from pdf_cache import CachePDF, clave_cotizacion
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _cotizacion():
+    return {"id": 1500, "fecha": "03/01/2024", "datos del cliente": cliente(), "productos": productos()}
+
+
+def test_la_clave_depende_de_la_salida_compacta():
+    assert clave_cotizacion(_cotizacion()) == clave_cotizacion(_cotizacion())
+    assert clave_cotizacion(_cotizacion(), compacto=True) != clave_cotizacion(_cotizacion(), compacto=False)
+
+
+def test_un_proceso_sin_salida_compacta_no_usa_los_pdfs_compactos(directorio):
+    cache = CachePDF(str(directorio / "cache"), generador=lambda cotizacion: b"%PDF compacto")
+    assert cache.obtener(_cotizacion()) == b"%PDF compacto"
+
+    # Otro proceso con ACESMA_PDF_COMPACTO=0 sobre el mismo directorio de caché
+    codigo = (
+        "import sys, json; from pdf_cache import CachePDF, clave_cotizacion; "
+        "cotizacion = json.loads(sys.argv[2]); "
+        "print(json.dumps([clave_cotizacion(cotizacion), CachePDF(sys.argv[1]).buscar(cotizacion) is None]))"
+    )
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo, str(directorio / "cache"), json.dumps(_cotizacion())],
+        cwd=RAIZ, env=dict(os.environ, ACESMA_PDF_COMPACTO="0"), capture_output=True, text=True, check=True,
+    ).stdout
+    clave, sin_pdf = json.loads(salida)
+    assert clave == clave_cotizacion(_cotizacion(), compacto=False) != clave_cotizacion(_cotizacion())
+    assert sin_pdf
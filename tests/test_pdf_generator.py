@@ -0,0 +1,99 @@
+import sys
+import threading
+
+import pytest
+
+from conftest import cliente, productos
+
+pytest.importorskip("reportlab")
+
+from pdf_generator import QuotePdfRenderer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def renderizador():
+    return QuotePdfRenderer()
+
+
+def _cotizacion():
+    return {"id": 1500, "fecha": "03/01/2024", "datos del cliente": cliente(), "productos": productos()}
+
+
+def test_el_logo_se_incrusta_una_vez(renderizador):
+    pdf = renderizador.render(_cotizacion())
+    assert pdf.startswith(b"%PDF") and pdf.count(b"/Subtype /Image") >= 1
+    assert renderizador.render(_cotizacion()).count(b"/Subtype /Image") == pdf.count(b"/Subtype /Image")
+
+
+def test_renderizador_compartido_entre_hilos(renderizador):
+    # Cambios de hilo muy frecuentes para que los dibujos del logo se crucen
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    errores, barrera = [], threading.Barrier(48)
+
+    def generar():
+        barrera.wait()
+        for _ in range(3):
+            try:
+                assert b"/Subtype /Image" in renderizador.render(_cotizacion())
+            except Exception as error:  # noqa: BLE001 - se juntan para verlos todos
+                errores.append(repr(error))
+
+    hilos = [threading.Thread(target=generar) for _ in range(48)]
+    try:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        sys.setswitchinterval(intervalo)
+    assert errores == []
+
+
+# Presupuesto de la cotización típica y diferencia máxima con el logo a resolución
+# completa (los mismos límites que informa benchmarks/presupuesto_pdf.py)
+PRESUPUESTO_KIB = 48
+DIFERENCIA_MEDIA_MAXIMA = 0.5
+DIFERENCIA_P999_MAXIMA = 48
+
+
+def _cotizacion_tipica():
+    lineas = [
+        ("Mesa de trabajo de acero inoxidable 1.50 x 0.70 m con repisa inferior", 1850.0, 2),
+        ("Lavadero industrial de dos pozas con escurridero, acero AISI 304", 2390.5, 1),
+        ("Campana extractora mural 2.00 m con filtros de malla", 3120.0, 1),
+        ("Estante de cuatro niveles 1.20 x 0.45 x 1.80 m", 980.0, 3),
+        ("Instalación y puesta en marcha en obra", 450.0, 1),
+    ]
+    return {
+        "id": 1500, "fecha": "03/01/2024", "datos del cliente": cliente(),
+        "productos": [{"descripcion": d, "precio": p, "cantidad": c} for d, p, c in lineas],
+    }
+
+
+def _paginas(pdf, dpi):
+    pymupdf = pytest.importorskip("pymupdf")
+    np = pytest.importorskip("numpy")
+    with pymupdf.open(stream=pdf, filetype="pdf") as documento:
+        return [
+            np.frombuffer(imagen.samples, dtype=np.uint8).reshape(imagen.height, imagen.width, 3)
+            for imagen in (pagina.get_pixmap(dpi=dpi, alpha=False) for pagina in documento)
+        ]
+
+
+def test_pdf_compacto_dentro_del_presupuesto_y_sin_diferencia_visible():
+    np = pytest.importorskip("numpy")
+    cotizacion = _cotizacion_tipica()
+    pdf = QuotePdfRenderer(compacto=True).render(cotizacion)
+    referencia = QuotePdfRenderer(compacto=False).render(cotizacion)
+
+    assert len(pdf) <= PRESUPUESTO_KIB * 1024, f"el PDF pesa {len(pdf) / 1024:.1f} KiB"
+
+    paginas, paginas_referencia = _paginas(pdf, 150), _paginas(referencia, 150)
+    assert len(paginas) == len(paginas_referencia)
+    diferencias = np.concatenate([
+        np.abs(a.astype(np.int16) - b.astype(np.int16)).max(axis=2).ravel()
+        for a, b in zip(paginas, paginas_referencia)
+    ])
+    assert diferencias.mean() <= DIFERENCIA_MEDIA_MAXIMA
+    assert np.percentile(diferencias, 99.9) <= DIFERENCIA_P999_MAXIMA
@@ -0,0 +1,32 @@
+import random
+from decimal import Decimal
+
+from precios import calcular_totales, materializar, materializar_lote, totales_lote
+
+
+def _lista_productos(semilla=3, cantidad=200):
+    rng = random.Random(semilla)
+    return [
+        [{"precio": round(rng.uniform(0, 5000), rng.choice([0, 2, 3])), "cantidad": rng.choice([1, 2, 3, 0.5, 12])}
+         for _ in range(rng.randint(0, 6))]
+        for _ in range(cantidad)
+    ]
+
+
+def test_totales_lote_igual_a_calcular_totales():
+    lista = _lista_productos()
+    for tasa in (None, Decimal("0.18"), "0.105"):
+        assert totales_lote(lista, tasa) == [calcular_totales(productos, tasa) for productos in lista]
+
+
+def test_materializar_lote_completa_solo_las_que_no_tienen_montos():
+    antigua = {"productos": [{"precio": 100, "cantidad": 2}]}
+    guardada = materializar({"productos": [{"precio": 10, "cantidad": 1}]}, tasa="0.10")
+    danada = {"productos": [{"precio": "abc", "cantidad": 1}]}
+
+    materializar_lote([antigua, guardada, danada])
+
+    assert antigua["totales"] == {"subtotal": "200.00", "igv": "36.00", "total": "236.00", "tasa_igv": "0.18"}
+    assert antigua["productos"][0]["total"] == "236.00"
+    assert guardada["totales"]["tasa_igv"] == "0.10"  # no se recalcula con la tasa actual
+    assert "totales" not in danada
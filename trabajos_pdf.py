@@ -0,0 +1,269 @@
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import metricas
+from exportar import _iniciar_worker
+from pdf_cache import obtener_cache
+
+# Procesos que generan PDFs para todas las sesiones (ACESMA_PROCESOS_PDF para cambiarlo)
+PROCESOS_PDF = int(os.getenv("ACESMA_PROCESOS_PDF", min(4, os.cpu_count() or 1)))
+# Trabajos aceptados a la vez (en cola + generándose); por encima se rechazan
+MAX_TRABAJOS = int(os.getenv("ACESMA_MAX_TRABAJOS_PDF", 32))
+# Segundos que se conserva un PDF terminado a la espera de que la sesión lo descargue
+RETENCION_SEGUNDOS = 600
+# Latencias recientes usadas para las estadísticas
+MUESTRAS_LATENCIA = 200
+
+
+# Mediciones de la preparación del renderizador en este proceso del pool;
+# viajan al proceso principal con el primer PDF que se genere
+_muestras_inicio = []
+
+
+def _iniciar_worker_medido():
+    with metricas.capturar() as muestras:
+        _iniciar_worker()
+    _muestras_inicio.extend(muestras)
+
+
+def _preparado():
+    """Tarea vacía: sirve para que el pool arranque sus procesos (y su renderizador)."""
+    return os.getpid()
+
+
+def _renderizar_medido(cotizacion):
+    """Genera el PDF en el proceso del pool y devuelve también lo que se midió ahí."""
+    from pdf_generator import generar_cotizacion_pdf
+    with metricas.capturar() as muestras:
+        pdf_data = generar_cotizacion_pdf(cotizacion)
+    muestras[:0] = _muestras_inicio
+    _muestras_inicio.clear()
+    return pdf_data, muestras
+
+
+class TrabajoPDF:
+    """Estado de la generación de un PDF: 'en cola', 'generando', 'listo' o 'error'."""
+
+    def __init__(self, id_trabajo, cotizacion):
+        self.id = id_trabajo
+        self.cotizacion = cotizacion
+        self.estado = "en cola"
+        self.pdf = None
+        self.error = None
+        self.creado = time.monotonic()
+        self.terminado = None
+        self._future = None
+        self._hecho = threading.Event()
+
+    @property
+    def segundos(self):
+        """Tiempo desde que se envió hasta que terminó (o hasta ahora si sigue pendiente)."""
+        return (self.terminado or time.monotonic()) - self.creado
+
+    @property
+    def pendiente(self):
+        return self.estado in ("en cola", "generando")
+
+
+class ColaTrabajosPDF:
+    """Pool de procesos acotado y compartido por todas las sesiones para generar PDFs.
+
+    ``enviar`` devuelve al instante un id de trabajo; la sesión consulta su
+    estado con ``trabajo`` hasta que está listo. Los PDFs ya cacheados se
+    entregan sin pasar por el pool y los generados se guardan en la caché.
+    """
+
+    def __init__(self, procesos=PROCESOS_PDF, max_trabajos=MAX_TRABAJOS, cache=None):
+        self.procesos = procesos
+        self.max_trabajos = max_trabajos
+        self.cache = cache or obtener_cache()
+
+        self._lock = threading.Lock()
+        self._pool = None
+        self._precalentado = False
+        self._trabajos = OrderedDict()  # id -> TrabajoPDF, del más antiguo al más nuevo
+        self._pendientes = 0
+        self._latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self.completados = 0
+        self.errores = 0
+        self.rechazados = 0
+
+    def _obtener_pool(self):
+        # El pool se crea al primer trabajo para no lanzar procesos si nadie genera PDFs
+        if self._pool is None:
+            contexto = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.procesos, mp_context=contexto,
+                                             initializer=_iniciar_worker_medido)
+        return self._pool
+
+    def precalentar(self):
+        """Arranca en segundo plano los procesos del pool, una sola vez.
+
+        Cada proceso carga ReportLab y el logo en su inicializador, así que
+        el primer PDF que pida un usuario no paga ese costo.
+        """
+        with self._lock:
+            if self._precalentado:
+                return
+            self._precalentado = True
+        threading.Thread(target=self._precalentar, daemon=True).start()
+
+    def _precalentar(self):
+        with self._lock:
+            try:
+                pool = self._obtener_pool()
+                # Con "spawn" el pool crea un proceso por tarea enviada mientras no haya uno libre
+                for _ in range(self.procesos):
+                    pool.submit(_preparado)
+            except BrokenProcessPool:
+                self._pool = None
+
+    def cerrar(self):
+        """Termina los procesos del pool (espera a que terminen los PDFs en curso)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _purgar(self):
+        """Olvida los trabajos terminados hace más de RETENCION_SEGUNDOS (requiere el lock)."""
+        limite = time.monotonic() - RETENCION_SEGUNDOS
+        for id_trabajo in [t.id for t in self._trabajos.values() if t.terminado and t.terminado < limite]:
+            del self._trabajos[id_trabajo]
+
+    def enviar(self, cotizacion):
+        """Encola el PDF de la cotización y devuelve el id del trabajo, o None si la cola está llena."""
+        id_trabajo = uuid.uuid4().hex
+        trabajo = TrabajoPDF(id_trabajo, cotizacion)
+
+        pdf_data = self.cache.buscar(cotizacion)
+        with self._lock:
+            self._purgar()
+            if pdf_data is not None:
+                trabajo.estado = "listo"
+                trabajo.pdf = pdf_data
+                trabajo.terminado = time.monotonic()
+                trabajo._hecho.set()
+                self._trabajos[id_trabajo] = trabajo
+                return id_trabajo
+
+            if self._pendientes >= self.max_trabajos:
+                self.rechazados += 1
+                return None
+            try:
+                trabajo._future = self._obtener_pool().submit(_renderizar_medido, cotizacion)
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. por falta de memoria): se reemplaza el pool entero
+                self._pool = None
+                trabajo._future = self._obtener_pool().submit(_renderizar_medido, cotizacion)
+            self._pendientes += 1
+            self._trabajos[id_trabajo] = trabajo
+        trabajo._future.add_done_callback(lambda future: self._terminar(trabajo, future))
+        return id_trabajo
+
+    def _terminar(self, trabajo, future):
+        try:
+            pdf_data, muestras = future.result()
+            metricas.incorporar(muestras)
+            error = None
+        except Exception as e:
+            pdf_data, error = None, e
+
+        if pdf_data:
+            self.cache.guardar(trabajo.cotizacion, pdf_data)
+        with self._lock:
+            trabajo.terminado = time.monotonic()
+            self._pendientes -= 1
+            self._latencias.append(trabajo.terminado - trabajo.creado)
+            if pdf_data:
+                trabajo.pdf = pdf_data
+                trabajo.estado = "listo"
+                self.completados += 1
+            else:
+                trabajo.error = str(error) if error else "el archivo está vacío"
+                trabajo.estado = "error"
+                self.errores += 1
+        trabajo._hecho.set()
+        # Tiempo desde que se encoló hasta que el PDF quedó listo
+        metricas.registrar("pdf.trabajo", (trabajo.terminado - trabajo.creado) * 1000)
+
+    def generar(self, cotizacion, timeout=None):
+        """Genera el PDF en el pool y espera a que esté listo (para quien no puede volver a consultar).
+
+        Devuelve los bytes del PDF, o None si la cola está llena. Lanza
+        ``TimeoutError`` si no termina en ``timeout`` segundos y
+        ``RuntimeError`` si falla. El trabajo no queda guardado en la cola.
+        """
+        id_trabajo = self.enviar(cotizacion)
+        if id_trabajo is None:
+            return None
+        with self._lock:
+            trabajo = self._trabajos[id_trabajo]
+        try:
+            if not trabajo._hecho.wait(timeout):
+                raise TimeoutError(f"el PDF no estuvo listo en {timeout} s")
+        finally:
+            with self._lock:
+                self._trabajos.pop(id_trabajo, None)
+        if trabajo.estado == "error":
+            raise RuntimeError(trabajo.error)
+        return trabajo.pdf
+
+    def trabajo(self, id_trabajo):
+        """Devuelve el trabajo con su estado actualizado, o None si no existe o ya expiró."""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is not None and trabajo.estado == "en cola" and trabajo._future.running():
+                trabajo.estado = "generando"
+            return trabajo
+
+    def posicion(self, id_trabajo):
+        """Cantidad de trabajos en cola enviados antes que este."""
+        with self._lock:
+            delante = 0
+            for trabajo in self._trabajos.values():
+                if trabajo.id == id_trabajo:
+                    return delante
+                if trabajo.estado == "en cola" and not trabajo._future.running():
+                    delante += 1
+            return delante
+
+    def estadisticas(self):
+        """Profundidad de la cola, trabajos en curso y latencia (envío a PDF listo) reciente."""
+        with self._lock:
+            generando = sum(1 for t in self._trabajos.values() if t.pendiente and t._future.running())
+            latencias = sorted(self._latencias)
+
+        def percentil(p):
+            if not latencias:
+                return None
+            return round(latencias[min(len(latencias) - 1, int(len(latencias) * p))], 3)
+
+        return {
+            "procesos": self.procesos,
+            "en_cola": self._pendientes - generando,
+            "generando": generando,
+            "completados": self.completados,
+            "errores": self.errores,
+            "rechazados": self.rechazados,
+            "latencia_p50_s": percentil(0.5),
+            "latencia_p95_s": percentil(0.95),
+        }
+
+
+_cola = None
+_cola_lock = threading.Lock()
+
+
+def obtener_cola():
+    """Devuelve la cola de PDFs compartida por todas las sesiones del proceso."""
+    global _cola
+    with _cola_lock:
+        if _cola is None:
+            _cola = ColaTrabajosPDF()
+        return _cola